@@ -1,6 +1,8 @@
 import os
 import asyncio
 import time
+from collections import OrderedDict
+from pathlib import Path
 from typing import Any, Dict
 import psutil
 from langchain_openai import ChatOpenAI
@@ -9,16 +11,22 @@ from dotenv import load_dotenv
 # Load environment variables (for API keys)
 load_dotenv()
 from browser_use import Browser, BrowserConfig, Agent
+from browser_use.agent.checkpoint.service import load_checkpoint
 
 # Import centralized logging
-from logging_setup import get_logger, b64_to_png, PROFILES_DIR, get_agent_screenshot_path
+from logging_setup import get_logger, store_screenshot_async, CHECKPOINTS_DIR, MESSAGE_BLOBS_DIR, PROFILES_DIR, SCREENSHOTS_DIR
 
 # Initialize logger for this module
 logger = get_logger(__name__)
 
+# Agents whose screenshot URLs are remembered; the least recently used are forgotten first
+SCREENSHOT_URL_AGENTS = 40
+
 class AgentManager:
     def __init__(self):
         self.agents: Dict[str, Dict[str, Any]] = {}
+        # Screenshot URL per agent and step, so history requests don't re-save frames (LRU by agent)
+        self.screenshot_urls: "OrderedDict[str, Dict[int, str]]" = OrderedDict()
         self.max_agents = 40
         self._lock = asyncio.Lock()
         self.process = psutil.Process()
@@ -64,6 +72,9 @@ class AgentManager:
                         task=task,
                         llm=llm,
                         browser=browser,  # Pass the configured browser
+                        checkpoint_path=self.checkpoint_path(agent_id),
+                        # Keep screenshots and DOM text of the message history on disk
+                        message_blob_dir=MESSAGE_BLOBS_DIR,
                         initial_actions=[
                             {'open_tab': {'url': 'https://mingle-portal.inforcloudsuite.com/v2/ICSGDENA002_DEV/aa98233d-0f7f-4fe7-8ab8-b5b66eb494c6?favoriteContext=bookmark?OIS100%26%26%26undefined%26A%26Kundeordre.%20%C3%85pne%26OIS100%20Kundeordre.%20%C3%85pne&LogicalId=lid://infor.m3.m3prduse1b'}},
                             {'wait': {'seconds': 3}},
@@ -77,6 +88,9 @@ class AgentManager:
                         task=task,
                         llm=llm,
                         browser=browser,  # Pass the configured browser
+                        checkpoint_path=self.checkpoint_path(agent_id),
+                        # Keep screenshots and DOM text of the message history on disk
+                        message_blob_dir=MESSAGE_BLOBS_DIR,
                     )
                 
                 agent = {
@@ -88,11 +102,30 @@ class AgentManager:
                     'last_active': time.time(),
                 }
                 self.agents[agent_id] = agent
+                self.screenshot_urls.pop(agent_id, None)
                 logger.info(f'Created {mode} agent {agent_id} with persistent profile at {agent_profile_dir}. Total agents: {len(self.agents)}')
             except Exception as e:
                 logger.error(f'Failed to create agent {agent_id}: {str(e)}')
                 raise
 
+    @staticmethod
+    def checkpoint_path(agent_id: str) -> Path:
+        """Where the agent's state is written after every step"""
+        return Path(CHECKPOINTS_DIR) / f'{agent_id}.json'
+
+    def discard_checkpoint(self, agent_id: str):
+        self.checkpoint_path(agent_id).unlink(missing_ok=True)
+
+    async def restore_agent(self, agent_id: str, mode: str = "regular"):
+        """Recreate an agent from its last checkpoint, e.g. after a backend restart"""
+        path = self.checkpoint_path(agent_id)
+        if not path.exists():
+            raise ValueError(f'No checkpoint for agent {agent_id}')
+        checkpoint = load_checkpoint(path)
+        await self.create_agent(agent_id, checkpoint.task, mode)
+        self.get_agent(agent_id).resume(checkpoint)
+        logger.info(f'Restored agent {agent_id} at step {checkpoint.n_steps}')
+
     def get_system_stats(self) -> dict:
         stats = {
             'total_agents': len(self.agents),
@@ -138,11 +171,23 @@ class AgentManager:
             for agent_id, data in self.agents.items()
         }
         
-    def save_agent_screenshot(self, agent_id: str, screenshot_data: str, step_number: int = None) -> str:
-        """Save a screenshot to disk and return the URL path"""
-        filepath, url_path = get_agent_screenshot_path(agent_id, step_number)
-        
-        if b64_to_png(screenshot_data, filepath):
-            # Return the URL path that can be used by the frontend
-            return url_path
-        return None
\ No newline at end of file
+    async def save_agent_screenshot(self, agent_id: str, screenshot_data: str, step_number: int = None) -> str:
+        """Save a screenshot to disk (once per step) and return the URL path"""
+        cached = self.screenshot_urls.get(agent_id)
+        if cached is not None:
+            self.screenshot_urls.move_to_end(agent_id)
+            if step_number is not None and step_number in cached:
+                return cached[step_number]
+
+        filepath = await store_screenshot_async(screenshot_data, Path(SCREENSHOTS_DIR) / agent_id)
+        if filepath is None:
+            return None
+
+        # Return the URL path that can be used by the frontend
+        url_path = f"/screenshots/{agent_id}/{filepath.name}"
+        if step_number is not None:
+            self.screenshot_urls.setdefault(agent_id, {})[step_number] = url_path
+            self.screenshot_urls.move_to_end(agent_id)
+            while len(self.screenshot_urls) > SCREENSHOT_URL_AGENTS:
+                self.screenshot_urls.popitem(last=False)
+        return url_path
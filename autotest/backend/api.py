@@ -1,19 +1,20 @@
 #!/usr/bin/env python3
 
-import json
 from pathlib import Path
 from fastapi import FastAPI, Request
 import uvicorn
-from datetime import datetime
 
-import glob
 import os
-import subprocess
-import tempfile
+import threading
+from collections import OrderedDict
 from fastapi import HTTPException, Response, Body
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 
 # Import centralized logging
-from logging_setup import get_logger, b64_to_png, DATA_DIR
+from logging_setup import get_logger, store_screenshot_async, DATA_DIR
+from storage import RunStore
+from test_runner import TestRunnerPool
 
 # Initialize logger for this module
 logger = get_logger(__name__)
@@ -21,84 +22,21 @@ logger = get_logger(__name__)
 # Initialize FastAPI app
 app = FastAPI()
 
+# Runs, steps, testing records and logs are kept in SQLite (see storage.py)
+store = RunStore()
+
+# Generated scripts run on warm pytest workers instead of blocking the event loop
+test_runner = TestRunnerPool()
+
 @app.get("/")
 async def root():
     """Simple health check endpoint"""
     logger.info("Health check endpoint accessed")
     return {"status": "API is running"}
 
-@app.post("/post_agent_history_step")
-async def post_agent_history_step(request: Request):
-    data = await request.json()
-    
-    # Determine event type and agent_id
-    event_type = data.get("event_type", "unknown")
-    agent_id = data.get("agent_id", "unknown")
-    logger.info(f"Processing {event_type} data for agent {agent_id}")
-
-    # Ensure agent directory exists
-    agent_dir = Path(DATA_DIR) / agent_id
-    agent_dir.mkdir(exist_ok=True)
-
-    # Ensure screenshots directory exists
-    screenshots_dir = agent_dir / event_type / "screenshots"
-    screenshots_dir.mkdir(parents=True, exist_ok=True)
-
-    # Prepare clean data (handling screenshot)
-    website_screenshot = data.get("website_screenshot")
-    
-    # Remove large fields from the JSON before saving
-    clean = {**data}
-    if website_screenshot:
-        clean["website_screenshot"] = f"See screenshots/{agent_id}_{event_type}_{clean.get('step_number', '')}.png"
-        screenshot_path = screenshots_dir / f"{agent_id}_{event_type}_{clean.get('step_number', '')}.png"
-        try:
-            b64_to_png(website_screenshot, screenshot_path)
-        except Exception as e:
-            logger.error(f"Error saving screenshot: {e}")
-
-    # Aggregate into a single file per event_type
-    aggregate_file = agent_dir / f"{event_type}.json"
-    if aggregate_file.exists():
-        try:
-            existing = json.loads(aggregate_file.read_text(encoding="utf-8"))
-            if not isinstance(existing, list):
-                existing = []
-        except Exception:
-            existing = []
-    else:
-        existing = []
-
-    existing.append(clean)
-    with aggregate_file.open("w", encoding="utf-8") as f:
-        json.dump(existing, f, indent=2)
-
-    logger.info(f"Appended step {clean.get('step_number')} to {aggregate_file}")
-
-    # build testing_steps.json by combining pre_step and post_step info
-    testing_file = agent_dir / "testing_steps.json"
-    testing_file.parent.mkdir(parents=True, exist_ok=True)
-
-    # load or initialize testing array
-    try:
-        testing_data = json.loads(testing_file.read_text(encoding="utf-8"))
-        if not isinstance(testing_data, list):
-            testing_data = []
-    except Exception:
-        testing_data = []
-
-    # load pre-step records
-    pre_file = agent_dir / "pre_step.json"
-    if pre_file.exists():
-        try:
-            pre_data = json.loads(pre_file.read_text(encoding="utf-8"))
-        except Exception:
-            pre_data = []
-    else:
-        pre_data = []
-
+def build_testing_records(clean: dict, pre_record: dict) -> list[dict]:
+    """Distill the element actions of a recorded step into testing records, using the matching pre_step for fallbacks"""
     step_num = clean.get("step_number")
-    pre_record = next((r for r in pre_data if r.get("step_number") == step_num), {}) or {}
     ma = pre_record.get("model_actions") or {}
     new_records = []
 
@@ -189,16 +127,46 @@ async def post_agent_history_step(request: Request):
 
         new_records.append(rec)
 
-    # save merged steps
-    testing_data.extend(new_records)
-    with testing_file.open("w", encoding="utf-8") as tf:
-        json.dump(testing_data, tf, indent=2)
+    return new_records
 
-    logger.info(f"Appended {len(new_records)} records to {testing_file}")
+@app.post("/post_agent_history_step")
+async def post_agent_history_step(request: Request):
+    data = await request.json()
+    
+    # Determine event type and agent_id
+    event_type = data.get("event_type", "unknown")
+    agent_id = data.get("agent_id", "unknown")
+    logger.info(f"Processing {event_type} data for agent {agent_id}")
+
+    screenshots_dir = Path(DATA_DIR) / agent_id / event_type / "screenshots"
+
+    # Prepare clean data (handling screenshot)
+    website_screenshot = data.get("website_screenshot")
+    
+    # Remove large fields from the JSON before saving
+    clean = {**data}
+    if website_screenshot:
+        # Decoded and written in the screenshot pool; unchanged frames map to the same file
+        screenshot_path = await store_screenshot_async(website_screenshot, screenshots_dir)
+        if screenshot_path is not None:
+            clean["website_screenshot"] = f"See screenshots/{screenshot_path.name}"
+        else:
+            clean["website_screenshot"] = None
+
+    # build testing records by combining pre_step and post_step info
+    step_num = clean.get("step_number")
+    # Store calls are blocking sqlite queries, so they run in the threadpool
+    pre_record = await run_in_threadpool(store.get_step, agent_id, "pre_step", step_num) or {}
+    new_records = build_testing_records(clean, pre_record)
+
+    # The step and its testing records are committed together
+    await run_in_threadpool(store.record_step, agent_id, event_type, clean, new_records)
+
+    logger.info(f"Stored {event_type} step {step_num} with {len(new_records)} testing records for agent {agent_id}")
 
     return {
         "status": "ok",
-        "message": f"Appended step to {aggregate_file}",
+        "message": f"Stored {event_type} step {step_num}",
         "event_type": event_type,
         "agent_id": agent_id
     }
@@ -211,22 +179,7 @@ async def save_log(request: Request):
     log_entry = data.get("log_entry")
     
     logger.info(f"Saving log for agent {agent_id}")
-    
-    # Create agent-specific directory
-    agent_dir = Path(DATA_DIR) / agent_id
-    agent_dir.mkdir(exist_ok=True)
-    
-    # Create logs directory
-    logs_dir = agent_dir / "logs"
-    logs_dir.mkdir(exist_ok=True)
-    
-    # Get current date for log file naming
-    current_date = datetime.now().strftime("%Y-%m-%d")
-    log_file = logs_dir / f"{current_date}.log"
-    
-    # Append log entry to file
-    with open(log_file, "a", encoding="utf-8") as f:
-        f.write(f"{log_entry}\n")
+    await run_in_threadpool(store.add_log, agent_id, f"{log_entry}")
         
     return {
         "status": "ok",
@@ -234,50 +187,59 @@ async def save_log(request: Request):
         "agent_id": agent_id
     }
 
-@app.get("/api/generate")
-async def generate_test(agentId: str, mode: str = "regular"):
-    base_dir = Path(DATA_DIR) / agentId
-    # Log the received mode parameter
-    logger.info(f"Test generation requested for agent {agentId} with mode parameter: '{mode}'")
-    
-    # Normalize mode to lower‑case for flexible matching
-    mode = (mode or "regular").lower()
-    logger.info(f"Normalized mode: '{mode}', will use infor mode: {mode.startswith('infor')}")
-
-    # Hard‑coded Chrome path for Infor mode
-    INFOR_CHROME_PATH = '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome'
-    # Path to the signed‑in Chrome *user‑data* directory we want to reuse
-    # Root *user‑data* directory that contains the `Default/`, `Profile 1/`, … sub‑folders.
-    # Playwright expects the root, not the nested 'Default' folder.
-    INFOR_PROFILE_PATH = '/Users/nybruker/Library/Application Support/Google/Chrome'
-
-    # Initial actions for Infor portal (navigate, then save with Ctrl+S)
-    INFOR_INITIAL_ACTIONS = [
-        "        # Initial actions for Infor portal (navigate, then save with Ctrl+S)",
-        "        await page.goto('https://mingle-portal.inforcloudsuite.com/v2/ICSGDENA002_DEV/aa98233d-0f7f-4fe7-8ab8-b5b66eb494c6?favoriteContext=bookmark?OIS100%26%26%26undefined%26A%26Kundeordre.%20%C3%85pne%26OIS100%20Kundeordre.%20%C3%85pne&LogicalId=lid://infor.m3.m3prduse1b')",
-        "        await page.wait_for_timeout(3000)",
-        "        await page.goto('https://m3prduse1b.m3.inforcloudsuite.com/mne/infor?HybridCertified=1&xfo=https%3A%2F%2Fmingle-portal.inforcloudsuite.com&SupportWorkspaceFeature=0&Responsive=All&enable_health_service=true&portalV2Certified=1&LogicalId=lid%3A%2F%2Finfor.m3.m3&inforThemeName=Light&inforThemeColor=amber&inforCurrentLocale=en-US&inforCurrentLanguage=en-US&infor10WorkspaceShell=1&inforWorkspaceVersion=2025.03.03&inforOSPortalVersion=2025.03.03&inforTimeZone=(UTC%2B01%3A00)%20Dublin%2C%20Edinburgh%2C%20Lisbon%2C%20London&inforStdTimeZone=Europe%2FLondon&inforStartMode=3&inforTenantId=ICSGDENA002_DEV&inforSessionId=ICSGDENA002_DEV~6ba2f2fc-8f7b-4651-97de-06a45e5f54e7')",
-        "        # Ensure the page has focus and trigger Ctrl+S (capital S required for Playwright)",
-        "        await page.wait_for_timeout(3000)",
-        "        await page.keyboard.press('Control+S')",  
-    ]
-
-    # Load distilled testing steps
-    testing_file = base_dir / "testing_steps.json"
-    if testing_file.exists():
-        try:
-            steps = json.loads(testing_file.read_text(encoding="utf-8"))
-        except Exception as e:
-            raise HTTPException(500, f"Error reading testing_steps.json: {e}")
-        if not steps:
-            raise HTTPException(404, "No testing steps found for this agent")
-    else:
-        raise HTTPException(404, "No testing_steps.json for this agent")
-
-    # Build the Playwright script
-    logger.info(f"Mode check: mode='{mode}', startswith('infor')={mode.startswith('infor')}")
-    if mode.startswith("infor"):
-        lines = [
+# Handlers that only read the store are plain functions, so FastAPI runs them in its threadpool
+@app.get("/api/runs")
+def list_runs():
+    """List recorded runs, most recently updated first"""
+    return store.list_runs()
+
+@app.get("/api/history/{agent_id}")
+def get_run_history(agent_id: str, event_type: str | None = None):
+    """Recorded steps of a run, optionally filtered by event type (pre_step, post_step, ...)"""
+    if not store.has_run(agent_id):
+        raise HTTPException(404, f"No recorded run for agent {agent_id}")
+    return {"agent_id": agent_id, "steps": store.get_steps(agent_id, event_type)}
+
+@app.get("/api/history/{agent_id}/actions")
+def get_run_actions(agent_id: str, action: str | None = None, step: int | None = None):
+    """Distilled testing steps of a run, optionally filtered by action type and/or step number"""
+    if not store.has_run(agent_id):
+        raise HTTPException(404, f"No recorded run for agent {agent_id}")
+    return {"agent_id": agent_id, "actions": store.get_element_actions(agent_id, action=action, step_number=step)}
+
+@app.get("/api/history/{agent_id}/logs")
+def get_run_logs(agent_id: str, limit: int = 500):
+    """Most recent log lines saved for an agent"""
+    return {"agent_id": agent_id, "logs": store.get_logs(agent_id, limit=limit)}
+
+# Hard‑coded Chrome path for Infor mode
+INFOR_CHROME_PATH = '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome'
+# Path to the signed‑in Chrome *user‑data* directory we want to reuse
+# Root *user‑data* directory that contains the `Default/`, `Profile 1/`, … sub‑folders.
+# Playwright expects the root, not the nested 'Default' folder.
+INFOR_PROFILE_PATH = '/Users/nybruker/Library/Application Support/Google/Chrome'
+
+# Initial actions for Infor portal (navigate, then save with Ctrl+S)
+INFOR_INITIAL_ACTIONS = [
+    "        # Initial actions for Infor portal (navigate, then save with Ctrl+S)",
+    "        await page.goto('https://mingle-portal.inforcloudsuite.com/v2/ICSGDENA002_DEV/aa98233d-0f7f-4fe7-8ab8-b5b66eb494c6?favoriteContext=bookmark?OIS100%26%26%26undefined%26A%26Kundeordre.%20%C3%85pne%26OIS100%20Kundeordre.%20%C3%85pne&LogicalId=lid://infor.m3.m3prduse1b')",
+    "        await page.wait_for_timeout(3000)",
+    "        await page.goto('https://m3prduse1b.m3.inforcloudsuite.com/mne/infor?HybridCertified=1&xfo=https%3A%2F%2Fmingle-portal.inforcloudsuite.com&SupportWorkspaceFeature=0&Responsive=All&enable_health_service=true&portalV2Certified=1&LogicalId=lid%3A%2F%2Finfor.m3.m3&inforThemeName=Light&inforThemeColor=amber&inforCurrentLocale=en-US&inforCurrentLanguage=en-US&infor10WorkspaceShell=1&inforWorkspaceVersion=2025.03.03&inforOSPortalVersion=2025.03.03&inforTimeZone=(UTC%2B01%3A00)%20Dublin%2C%20Edinburgh%2C%20Lisbon%2C%20London&inforStdTimeZone=Europe%2FLondon&inforStartMode=3&inforTenantId=ICSGDENA002_DEV&inforSessionId=ICSGDENA002_DEV~6ba2f2fc-8f7b-4651-97de-06a45e5f54e7')",
+    "        # Ensure the page has focus and trigger Ctrl+S (capital S required for Playwright)",
+    "        await page.wait_for_timeout(3000)",
+    "        await page.keyboard.press('Control+S')",  
+]
+
+# Generated scripts are cached per ETag; bodies larger than this are streamed every time
+SCRIPT_CACHE_SIZE = 32
+SCRIPT_CACHE_MAX_BYTES = 1024 * 1024
+script_cache: "OrderedDict[str, str]" = OrderedDict()
+script_cache_lock = threading.Lock()
+
+def script_header(infor: bool) -> list[str]:
+    """Opening lines of a generated Playwright test"""
+    if infor:
+        return [
             "import pytest",
             "import asyncio",
             "from playwright.async_api import async_playwright",
@@ -291,72 +253,160 @@ async def generate_test(agentId: str, mode: str = "regular"):
             "        context = browser.contexts[0] if browser.contexts else await browser.new_context()",
             "        page = await context.new_page()",
         ] + INFOR_INITIAL_ACTIONS
-    else:
-        lines = [
-            "import pytest",
-            "import asyncio",
-            "from playwright.async_api import async_playwright",
-            "",
-            "@pytest.mark.asyncio",
-            "async def test_from_steps():",
-            "    async with async_playwright() as p:",
-            "        browser = await p.chromium.launch(headless=False)",
-            "        page = await browser.new_page()",
-        ]
-    for step in steps:
-        action = step.get("action")
-        sel = step.get("selector", "")
-        
-        # Check if selector is an element ID (not starting with #, ., or containing spaces/special chars)
-        # and add # prefix if needed
-        if sel and not sel.startswith(('#', '.')) and not any(c in sel for c in ' >+~:[]()'):
-            # This is likely an element ID without the # prefix
-            sel = f"#{sel}"
-            
-        if action == "navigate":
-            url = step.get("url", "")
-            lines.append(f"        await page.goto({url!r})")
-        elif action == "click":
-            btn = step.get("button", "left")
-            count = step.get("click_count", 1)
-            lines.append(f"        await page.click({sel!r}, button={btn!r}, click_count={count})")
-        elif action == "wait":
-            timeout = step.get("timeout", 0)
-            lines.append(f"        await page.wait_for_timeout({timeout})")
-        elif action in ("fill", "input"):
-            text = step.get("text", "")
-            lines.append(f"        await page.fill({sel!r}, {text!r})")
-
-    if mode.startswith("infor"):
-        lines.append("        await context.close()")
-    else:
-        lines.append("        await browser.close()")
-    script = "\n".join(lines)
-    return Response(script, media_type="text/plain")
+    return [
+        "import pytest",
+        "import asyncio",
+        "from playwright.async_api import async_playwright",
+        "",
+        "@pytest.mark.asyncio",
+        "async def test_from_steps():",
+        "    async with async_playwright() as p:",
+        "        browser = await p.chromium.launch(headless=False)",
+        "        page = await browser.new_page()",
+    ]
+
+def script_step_line(step: dict) -> str | None:
+    """Translate one testing record into a Playwright statement, or None if the action has no equivalent"""
+    action = step.get("action")
+    sel = step.get("selector", "")
+
+    # Check if selector is an element ID (not starting with #, ., or containing spaces/special chars)
+    # and add # prefix if needed
+    if sel and not sel.startswith(('#', '.')) and not any(c in sel for c in ' >+~:[]()'):
+        # This is likely an element ID without the # prefix
+        sel = f"#{sel}"
+
+    if action == "navigate":
+        url = step.get("url", "")
+        return f"        await page.goto({url!r})"
+    elif action == "click":
+        btn = step.get("button", "left")
+        count = step.get("click_count", 1)
+        return f"        await page.click({sel!r}, button={btn!r}, click_count={count})"
+    elif action == "wait":
+        timeout = step.get("timeout", 0)
+        return f"        await page.wait_for_timeout({timeout})"
+    elif action in ("fill", "input"):
+        text = step.get("text", "")
+        return f"        await page.fill({sel!r}, {text!r})"
+    return None
+
+def iter_script(agent_id: str, infor: bool, up_to_id: int, etag: str):
+    """Yield the Playwright script chunk by chunk, reading testing steps from the store in batches"""
+    cached = []
+    cached_bytes = 0
+
+    def emit(line: str, first: bool = False):
+        nonlocal cached, cached_bytes
+        chunk = line if first else "\n" + line
+        if cached is not None:
+            cached.append(chunk)
+            cached_bytes += len(chunk)
+            if cached_bytes > SCRIPT_CACHE_MAX_BYTES:
+                # Too large to keep around; stay in constant memory and just stream
+                cached = None
+        return chunk
+
+    header = script_header(infor)
+    yield emit(header[0], first=True)
+    for line in header[1:]:
+        yield emit(line)
+    for step in store.iter_element_actions(agent_id, up_to_id=up_to_id):
+        line = script_step_line(step)
+        if line is not None:
+            yield emit(line)
+    yield emit("        await context.close()" if infor else "        await browser.close()")
+
+    if cached is not None:
+        with script_cache_lock:
+            script_cache[etag] = "".join(cached)
+            script_cache.move_to_end(etag)
+            while len(script_cache) > SCRIPT_CACHE_SIZE:
+                script_cache.popitem(last=False)
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header (`*` or a list of possibly weak tags) matches etag, with weak comparison"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+@app.get("/api/generate")
+async def generate_test(request: Request, agentId: str, mode: str = "regular"):
+    # Log the received mode parameter
+    logger.info(f"Test generation requested for agent {agentId} with mode parameter: '{mode}'")
+    
+    # Normalize mode to lower‑case for flexible matching
+    mode = (mode or "regular").lower()
+    infor = mode.startswith("infor")
+    logger.info(f"Normalized mode: '{mode}', will use infor mode: {infor}")
+
+    # Testing steps are append-only, so their count and last id identify the generated script
+    if not await run_in_threadpool(store.has_run, agentId):
+        raise HTTPException(404, "No recorded run for this agent")
+    count, last_id = await run_in_threadpool(store.element_action_stats, agentId)
+    if not count:
+        raise HTTPException(404, "No testing steps found for this agent")
+
+    etag = f'"{agentId}-{"infor" if infor else "regular"}-{count}-{last_id}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+
+    with script_cache_lock:
+        script = script_cache.get(etag)
+        if script is not None:
+            script_cache.move_to_end(etag)
+    if script is not None:
+        logger.info(f"Serving cached script for agent {agentId} ({count} steps)")
+        return Response(script, media_type="text/plain", headers=headers)
+
+    # Sync generator: Starlette iterates it in a worker thread, so store reads stay off the event loop
+    return StreamingResponse(
+        iter_script(agentId, infor, last_id, etag),
+        media_type="text/plain",
+        headers=headers,
+    )
+
+@app.on_event("startup")
+async def start_test_runner():
+    await test_runner.start()
+
+@app.on_event("shutdown")
+async def stop_test_runner():
+    await test_runner.stop()
 
 @app.post("/api/run-test")
-async def run_test(body: dict = Body(...)):
+async def run_test(body: dict = Body(...), wait: bool = True):
+    """Queue a generated script on the test runner pool; waits for the output unless ?wait=false"""
     script = body.get("script")
     if not script:
         raise HTTPException(400, "No script provided")
-    tf = tempfile.NamedTemporaryFile(delete=False, suffix=".py")
-    tf.write(script.encode("utf-8"))
-    tf.flush()
-    tf.close()
-    try:
-        result = subprocess.run(
-            ["pytest", tf.name, "--maxfail=1", "--disable-warnings", "-q"],
-            capture_output=True, text=True, timeout=30
-        )
-        output = result.stdout + result.stderr
-    except subprocess.TimeoutExpired:
-        output = "Error: Test execution timed out."
-    finally:
-        try:
-            os.unlink(tf.name)
-        except:
-            pass
-    return Response(output, media_type="text/plain")
+    job = test_runner.submit(script, timeout=body.get("timeout"))
+    if not wait:
+        return JSONResponse(job.to_dict(include_output=False), status_code=202)
+    await job.wait()
+    return Response(job.text(), media_type="text/plain", headers={"X-Test-Job": job.id, "X-Test-Status": job.status})
+
+@app.get("/api/run-test")
+async def list_test_jobs():
+    """Status of the runner pool and of recent jobs"""
+    return {**test_runner.stats(), "recent": [job.to_dict(include_output=False) for job in reversed(test_runner.jobs.values())]}
+
+@app.get("/api/run-test/{job_id}")
+async def get_test_job(job_id: str):
+    job = test_runner.get(job_id)
+    if job is None:
+        raise HTTPException(404, f"Unknown test job {job_id}")
+    return job.to_dict()
+
+@app.get("/api/run-test/{job_id}/stream")
+async def stream_test_job(job_id: str):
+    """Stream pytest output of a job as it is produced"""
+    job = test_runner.get(job_id)
+    if job is None:
+        raise HTTPException(404, f"Unknown test job {job_id}")
+    return StreamingResponse(job.stream(), media_type="text/plain", headers={"X-Test-Job": job.id})
 
 if __name__ == "__main__":
     logger.info("Starting Browser-Use recording API on http://0.0.0.0:9000")
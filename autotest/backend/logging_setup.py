@@ -1,6 +1,9 @@
 import os
+import asyncio
 import base64
+import hashlib
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from logging.handlers import RotatingFileHandler
 from queue import Queue
 from threading import Lock
@@ -27,9 +30,12 @@ DATA_DIR = os.path.join(BASE_DIR, 'data')
 STATIC_DIR = os.path.join(BASE_DIR, 'static')
 PROFILES_DIR = os.path.join(BASE_DIR, 'profiles')
 SCREENSHOTS_DIR = os.path.join(BASE_DIR, 'screenshots')
+CHECKPOINTS_DIR = os.path.join(DATA_DIR, 'checkpoints')
+MESSAGE_BLOBS_DIR = os.path.join(DATA_DIR, 'message_blobs')
+DB_PATH = os.path.join(DATA_DIR, 'autotest.db')
 
 # Create necessary directories
-for directory in [LOGS_DIR, DATA_DIR, STATIC_DIR, PROFILES_DIR, SCREENSHOTS_DIR]:
+for directory in [LOGS_DIR, DATA_DIR, STATIC_DIR, PROFILES_DIR, SCREENSHOTS_DIR, CHECKPOINTS_DIR, MESSAGE_BLOBS_DIR]:
     os.makedirs(directory, exist_ok=True)
 
 # Thread-local storage for agent context (move from agent_context.py if it exists there)
@@ -189,32 +195,34 @@ def setup_agent_logger(agent_id):
         
         return agent_logger
 
-def b64_to_png(base64_str: str, output_path: Path) -> bool:
-    """Convert base64 string to PNG file"""
+# Screenshots are decoded and written off the event loop by this pool
+screenshot_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="screenshot-writer")
+
+def store_screenshot(base64_str: str, directory: Path) -> Path | None:
+    """Store a base64 screenshot as <sha256>.png in directory; identical frames are written only once"""
     logger = get_logger("utils")
     try:
         img_data = base64.b64decode(base64_str)
-        with open(output_path, 'wb') as f:
-            f.write(img_data)
+        digest = hashlib.sha256(img_data).hexdigest()
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        output_path = directory / f"{digest}.png"
+        if output_path.exists():
+            return output_path
+        # Write to a temp file first so concurrent writers of the same frame never see a partial PNG
+        tmp_path = directory / f"{digest}.{threading.get_ident()}.tmp"
+        tmp_path.write_bytes(img_data)
+        os.replace(tmp_path, output_path)
         logger.info(f"Saved screenshot to {output_path}")
-        return True
+        return output_path
     except Exception as e:
         logger.error(f"Failed to save screenshot: {str(e)}")
-        return False
+        return None
 
-def get_agent_screenshot_path(agent_id: str, step_number: int = None) -> tuple:
-    """Get the path for an agent's screenshot"""
-    # Create agent-specific directory
-    agent_dir = Path(SCREENSHOTS_DIR) / agent_id
-    agent_dir.mkdir(exist_ok=True)
-    
-    # Generate filename based on timestamp and step number
-    import time
-    timestamp = time.strftime("%Y%m%d-%H%M%S")
-    step_info = f"_step{step_number}" if step_number is not None else ""
-    filename = f"{timestamp}{step_info}.png"
-    
-    return agent_dir / filename, f"/screenshots/{agent_id}/{filename}"
+async def store_screenshot_async(base64_str: str, directory: Path) -> Path | None:
+    """Run store_screenshot in the screenshot thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(screenshot_executor, store_screenshot, base64_str, directory)
 
 # Initialize logging
 setup_logging()
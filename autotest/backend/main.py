@@ -8,7 +8,7 @@ from datetime import datetime, timezone
 import uuid
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from langchain_openai import ChatOpenAI
 from pydantic import BaseModel
@@ -22,6 +22,7 @@ from pyobjtojson import obj_to_json
 # Load environment variables (for API keys)
 load_dotenv()
 from browser_use import Agent
+from browser_use.utils import metrics
 
 # Start API server at application init time
 import subprocess
@@ -361,6 +362,7 @@ async def run_agent(agent_id: str, request: RunRequest):
         # Create a brand-new agent with this query
         # Pass infor_mode to create_agent
         mode = "infor" if request.infor_mode else "regular"
+        agent_manager.discard_checkpoint(agent_id)
         await agent_manager.create_agent(agent_id, request.query, mode)
 
         agent = agent_manager.get_agent(agent_id)
@@ -392,6 +394,38 @@ async def ping():
 	return {'status': 'ok'}
 
 
+@app.get('/metrics')
+async def get_metrics():
+	"""Prometheus scrape endpoint for the browser-use operation timings of agents in this process"""
+	return PlainTextResponse(metrics.to_prometheus(), media_type='text/plain; version=0.0.4')
+
+
+@app.post('/agent/{agent_id}/restore')
+async def restore_agent(agent_id: str, infor_mode: bool = False):
+    """
+    Continue an agent from its last checkpoint (messages, history, step counter, tabs and cookies),
+    e.g. after the backend restarted mid-run.
+    """
+    try:
+        set_current_agent_id(agent_id)
+        if agent_id in agent_manager.agents:
+            raise ValueError(f'Agent {agent_id} is still loaded')
+
+        await agent_manager.restore_agent(agent_id, "infor" if infor_mode else "regular")
+        agent = agent_manager.get_agent(agent_id)
+        agent_manager.set_running(agent_id, True)
+
+        asyncio.create_task(
+            agent.run(
+                on_step_start=record_activity_before(agent_id),
+                on_step_end=record_activity_after(agent_id),
+                ))
+
+        return {'status': 'running', 'agent_id': agent_id, 'step': agent.n_steps}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.post('/agent/{agent_id}/pause')
 async def pause_agent(agent_id: str):
 	try:
@@ -485,7 +519,7 @@ async def get_agent_history(agent_id: str, save_screenshots: bool = True):
                 # Save screenshot if available and requested
                 screenshot_url = None
                 if save_screenshots and hasattr(step, "state") and hasattr(step.state, "screenshot") and step.state.screenshot:
-                    screenshot_url = agent_manager.save_agent_screenshot(agent_id, step.state.screenshot, i)
+                    screenshot_url = await agent_manager.save_agent_screenshot(agent_id, step.state.screenshot, i)
                 
                 step_info = {
                     "step_number": i,
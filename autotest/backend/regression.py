@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Batch regression runner for scripts produced by `/api/generate`.
+
+Generated tests open their own browser through `async_playwright()`. The runner
+imports each test module and swaps that name for a shim, so every test runs on a
+context owned by one of N shards of a single shared browser instead of launching
+Chromium per test. Shards pull tests from a shared queue, each attempt gets its own
+timeout, failed tests are retried after the first pass, and every awaited page call
+is timed so the JSON/JUnit reports include per-step durations. With --cdp-url the
+shards share the attached Chrome's default context (and its session) and leave that
+browser running.
+
+    python regression.py generated_tests/ --shards 8 --timeout 120 --retries 1 \
+        --json report.json --junit report.xml
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import inspect
+import json
+import sys
+import time
+import traceback
+import xml.etree.ElementTree as ET
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class StepTiming:
+    action: str
+    target: str
+    duration: float
+    ok: bool = True
+
+
+@dataclass
+class TestResult:
+    file: str
+    name: str
+    status: str = "pending"  # passed | failed | timeout | error | skipped
+    attempts: int = 0
+    shard: int | None = None
+    duration: float = 0.0
+    error: str | None = None
+    steps: list[StepTiming] = field(default_factory=list)
+
+    __test__ = False
+
+    @property
+    def id(self) -> str:
+        return f"{self.file}::{self.name}"
+
+
+# --- playwright shims handed to the generated scripts ---
+
+class _TimedProxy:
+    """Wraps a page (or page.keyboard/mouse) and records every awaited call as a step"""
+
+    def __init__(self, target, steps: list[StepTiming], prefix: str = ""):
+        self._target = target
+        self._steps = steps
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name in ("keyboard", "mouse"):
+            return _TimedProxy(attr, self._steps, f"{name}.")
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if not inspect.isawaitable(result):
+                return result
+            return self._timed(f"{self._prefix}{name}", str(args[0])[:200] if args else "", result)
+
+        return call
+
+    async def _timed(self, action: str, target: str, awaitable):
+        start = time.perf_counter()
+        try:
+            result = await awaitable
+        except BaseException:
+            self._steps.append(StepTiming(action, target, time.perf_counter() - start, ok=False))
+            raise
+        self._steps.append(StepTiming(action, target, time.perf_counter() - start))
+        return result
+
+
+class _ShardBrowser:
+    """Stands in for the Browser a generated script launches; pages come from the shard's context"""
+
+    def __init__(self, context, steps: list[StepTiming]):
+        self._context = context
+        self._steps = steps
+        self.contexts = [_ShardContext(context, steps)]
+
+    async def new_page(self, **kwargs):
+        return _TimedProxy(await self._context.new_page(), self._steps)
+
+    async def new_context(self, **kwargs):
+        return self.contexts[0]
+
+    async def close(self):
+        # The shared browser outlives the test
+        pass
+
+
+class _ShardContext:
+    def __init__(self, context, steps: list[StepTiming]):
+        self._context = context
+        self._steps = steps
+
+    @property
+    def pages(self):
+        return [_TimedProxy(page, self._steps) for page in self._context.pages]
+
+    async def new_page(self):
+        return _TimedProxy(await self._context.new_page(), self._steps)
+
+    async def close(self):
+        # The shard resets its context between tests
+        pass
+
+
+class _ShardChromium:
+    async def launch(self, *args, **kwargs):
+        return _current_browser.get()
+
+    async def connect_over_cdp(self, *args, **kwargs):
+        return _current_browser.get()
+
+
+class _BorrowedContext:
+    """A shard's view of a context it doesn't own, e.g. the default context of a Chrome attached over CDP.
+
+    Only the pages the shard opened are listed and closed; the context's cookies and lifetime stay with its owner.
+    """
+
+    def __init__(self, context):
+        self._context = context
+        self._pages = []
+
+    @property
+    def pages(self):
+        return [page for page in self._pages if not page.is_closed()]
+
+    async def new_page(self):
+        page = await self._context.new_page()
+        self._pages.append(page)
+        return page
+
+    async def clear_cookies(self):
+        # The session (e.g. an Infor login) belongs to the attached browser
+        pass
+
+    async def close(self):
+        for page in self.pages:
+            await page.close()
+        self._pages.clear()
+
+
+class _ShardPlaywright:
+    """Replacement for `async_playwright()` in generated test modules; resolves to the running shard's browser"""
+
+    chromium = _ShardChromium()
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+# Set per test attempt; each shard runs in its own task, so concurrent tests of one module don't share it
+_current_browser: ContextVar[_ShardBrowser] = ContextVar("regression_browser")
+_playwright_shim = _ShardPlaywright()
+
+
+# --- discovery ---
+
+def _load_module(path: Path):
+    name = f"regression_{abs(hash(str(path.resolve())))}_{path.stem}"
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def discover(test_dir: str | Path, pattern: str = "test_*.py") -> list[tuple[TestResult, object]]:
+    """Find async test functions in generated scripts; anything else is reported as skipped"""
+    found = []
+    for path in sorted(Path(test_dir).rglob(pattern)):
+        rel = str(path.relative_to(test_dir))
+        try:
+            module = _load_module(path)
+        except Exception as e:
+            found.append((TestResult(rel, "<module>", status="error", error=f"Import failed: {e}"), None))
+            continue
+        tests = [
+            (name, fn) for name, fn in vars(module).items()
+            if name.startswith("test") and inspect.iscoroutinefunction(fn)
+        ]
+        if not tests or not hasattr(module, "async_playwright"):
+            found.append((TestResult(rel, "<module>", status="skipped", error="Not a generated async Playwright test"), None))
+            continue
+        module.async_playwright = _playwright_shim
+        for name, fn in tests:
+            found.append((TestResult(rel, name), (module, fn)))
+    return found
+
+
+# --- running ---
+
+async def _reset_context(context):
+    for page in list(context.pages):
+        await page.close()
+    await context.clear_cookies()
+
+
+async def _run_one(result: TestResult, target, context, timeout: float):
+    _, fn = target
+    steps: list[StepTiming] = []
+    token = _current_browser.set(_ShardBrowser(context, steps))
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(fn(), timeout=timeout)
+        result.status, result.error = "passed", None
+    except asyncio.TimeoutError:
+        result.status, result.error = "timeout", f"Timed out after {timeout}s"
+    except AssertionError as e:
+        result.status, result.error = "failed", str(e) or traceback.format_exc(limit=3)
+    except Exception as e:
+        result.status, result.error = "failed", f"{type(e).__name__}: {e}"
+    finally:
+        _current_browser.reset(token)
+    result.duration = time.perf_counter() - start
+    result.steps = steps
+
+
+async def run_suite(
+    browser,
+    tests: list[tuple[TestResult, object]],
+    shards: int = 4,
+    timeout: float = 120.0,
+    retries: int = 1,
+    context_options: dict | None = None,
+    context=None,
+) -> list[TestResult]:
+    """Run discovered tests on `shards` contexts of `browser`; failures are retried after the first pass.
+
+    With `context`, shards share that existing context instead of creating their own and leave it open.
+    """
+    runnable = [(result, target) for result, target in tests if target is not None]
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in runnable:
+        queue.put_nowait(item)
+    retry_queue: list = []
+    shared_context = context
+
+    async def open_context():
+        if shared_context is not None:
+            return _BorrowedContext(shared_context)
+        return await browser.new_context(**(context_options or {}))
+
+    async def shard(index: int, work: asyncio.Queue):
+        context = await open_context()
+        try:
+            while True:
+                try:
+                    result, target = work.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                result.attempts += 1
+                result.shard = index
+                await _run_one(result, target, context, timeout)
+                logger.info(f"[shard {index}] {result.id}: {result.status} in {result.duration:.1f}s (attempt {result.attempts})")
+                if result.status != "passed" and result.attempts <= retries:
+                    retry_queue.append((result, target))
+                try:
+                    await _reset_context(context)
+                except Exception:
+                    # A test that timed out mid-navigation can leave the context unusable
+                    await context.close()
+                    context = await open_context()
+        finally:
+            await context.close()
+
+    pending = queue
+    while not pending.empty():
+        await asyncio.gather(*(shard(i, pending) for i in range(min(shards, pending.qsize()))))
+        pending = asyncio.Queue()
+        for item in retry_queue:
+            pending.put_nowait(item)
+        retry_queue.clear()
+
+    return [result for result, _ in tests]
+
+
+# --- reports ---
+
+def summarize(results: list[TestResult], wall_time: float) -> dict:
+    counts: dict[str, int] = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    return {
+        "total": len(results),
+        "counts": counts,
+        "flaky": sum(1 for r in results if r.status == "passed" and r.attempts > 1),
+        "wall_time": wall_time,
+        "test_time": sum(r.duration for r in results),
+    }
+
+
+def write_json(results: list[TestResult], summary: dict, path: str | Path):
+    report = {"summary": summary, "tests": [{"id": r.id, **asdict(r)} for r in results]}
+    Path(path).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+def write_junit(results: list[TestResult], summary: dict, path: str | Path):
+    counts = summary["counts"]
+    suite = ET.Element(
+        "testsuite",
+        name="regression",
+        tests=str(summary["total"]),
+        failures=str(counts.get("failed", 0) + counts.get("timeout", 0)),
+        errors=str(counts.get("error", 0)),
+        skipped=str(counts.get("skipped", 0)),
+        time=f"{summary['wall_time']:.3f}",
+    )
+    for r in results:
+        case = ET.SubElement(suite, "testcase", classname=r.file, name=r.name, time=f"{r.duration:.3f}")
+        if r.status in ("failed", "timeout"):
+            ET.SubElement(case, "failure", message=r.error or r.status, type=r.status)
+        elif r.status == "error":
+            ET.SubElement(case, "error", message=r.error or "error")
+        elif r.status == "skipped":
+            ET.SubElement(case, "skipped", message=r.error or "")
+        props = ET.SubElement(case, "properties")
+        ET.SubElement(props, "property", name="attempts", value=str(r.attempts))
+        ET.SubElement(props, "property", name="shard", value=str(r.shard))
+        if r.steps:
+            ET.SubElement(case, "system-out").text = "\n".join(
+                f"{s.duration * 1000:8.1f} ms  {'ok  ' if s.ok else 'FAIL'}  {s.action} {s.target}" for s in r.steps
+            )
+    ET.ElementTree(suite).write(path, encoding="utf-8", xml_declaration=True)
+
+
+async def main(args) -> int:
+    from playwright.async_api import async_playwright
+
+    tests = discover(args.test_dir, args.pattern)
+    logger.info(f"Discovered {sum(1 for _, t in tests if t)} tests in {args.test_dir}, running on {args.shards} shards")
+    start = time.perf_counter()
+    async with async_playwright() as p:
+        context = None
+        if args.cdp_url:
+            # Run in the attached Chrome's own context so tests see its session
+            browser = await p.chromium.connect_over_cdp(args.cdp_url)
+            context = browser.contexts[0] if browser.contexts else None
+        else:
+            browser = await p.chromium.launch(headless=not args.headed)
+        try:
+            results = await run_suite(
+                browser, tests, shards=args.shards, timeout=args.timeout, retries=args.retries, context=context
+            )
+        finally:
+            # An attached Chrome is not ours to close; leaving async_playwright() disconnects from it
+            if not args.cdp_url:
+                await browser.close()
+    summary = summarize(results, time.perf_counter() - start)
+
+    if args.json:
+        write_json(results, summary, args.json)
+    if args.junit:
+        write_junit(results, summary, args.junit)
+    print(f"{summary['total']} tests in {summary['wall_time']:.1f}s: {summary['counts']} ({summary['flaky']} flaky)")
+    return 0 if all(r.status in ("passed", "skipped") for r in results) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay generated Playwright tests in parallel on a shared browser")
+    parser.add_argument("test_dir", help="directory containing generated test_*.py scripts")
+    parser.add_argument("--pattern", default="test_*.py", help="glob for test files")
+    parser.add_argument("--shards", type=int, default=4, help="number of concurrent browser contexts")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-test timeout in seconds")
+    parser.add_argument("--retries", type=int, default=1, help="times a failed test is retried")
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    parser.add_argument("--cdp-url", help="attach to a running Chrome (e.g. http://localhost:9222 for Infor) instead of launching one")
+    parser.add_argument("--json", help="write a JSON report to this path")
+    parser.add_argument("--junit", help="write a JUnit XML report to this path")
+    sys.exit(asyncio.run(main(parser.parse_args())))
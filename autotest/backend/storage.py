@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+SQLite storage backend for the recording API.
+
+Runs, recorded steps, distilled element actions (the rows `/api/generate` turns
+into a Playwright script) and log lines live in one WAL-mode database instead of
+a directory of JSON files per agent. Every public write method runs in a single
+transaction, so all rows produced by one request are committed together.
+"""
+
+import argparse
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from logging_setup import get_logger, DATA_DIR, DB_PATH
+
+logger = get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    agent_id    TEXT PRIMARY KEY,
+    created_at  TEXT NOT NULL,
+    updated_at  TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS steps (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    agent_id     TEXT NOT NULL REFERENCES runs(agent_id),
+    event_type   TEXT NOT NULL,
+    step_number  INTEGER,
+    timestamp    TEXT,
+    url          TEXT,
+    payload      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_steps_agent_event_step ON steps(agent_id, event_type, step_number);
+
+CREATE TABLE IF NOT EXISTS element_actions (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    agent_id     TEXT NOT NULL REFERENCES runs(agent_id),
+    step_number  INTEGER,
+    action       TEXT,
+    record       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_actions_agent_step ON element_actions(agent_id, step_number);
+CREATE INDEX IF NOT EXISTS idx_actions_agent_action ON element_actions(agent_id, action);
+
+CREATE TABLE IF NOT EXISTS logs (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    agent_id    TEXT NOT NULL,
+    created_at  TEXT NOT NULL,
+    entry       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_logs_agent ON logs(agent_id, created_at);
+"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class RunStore:
+    """Thread-safe wrapper around the recording database"""
+
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode; transactions are opened explicitly in transaction()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(SCHEMA)
+        logger.info(f"RunStore opened at {self.db_path}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """Yield a cursor whose statements are committed (or rolled back) together"""
+        with self._lock:
+            cur = self._conn.cursor()
+            try:
+                cur.execute("BEGIN")
+                yield cur
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+            finally:
+                cur.close()
+
+    def _query(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _touch_run(cur, agent_id: str):
+        now = _now()
+        cur.execute(
+            "INSERT INTO runs (agent_id, created_at, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(agent_id) DO UPDATE SET updated_at = excluded.updated_at",
+            (agent_id, now, now),
+        )
+
+    # --- writes ---
+
+    def record_step(self, agent_id: str, event_type: str, step: dict, element_actions: list[dict] | None = None) -> None:
+        """Store one recorded step and the element actions distilled from it in a single transaction"""
+        with self.transaction() as cur:
+            self._touch_run(cur, agent_id)
+            cur.execute(
+                "INSERT INTO steps (agent_id, event_type, step_number, timestamp, url, payload) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    agent_id,
+                    event_type,
+                    step.get("step_number"),
+                    step.get("timestamp"),
+                    step.get("url") if isinstance(step.get("url"), str) else None,
+                    json.dumps(step),
+                ),
+            )
+            cur.executemany(
+                "INSERT INTO element_actions (agent_id, step_number, action, record) VALUES (?, ?, ?, ?)",
+                [(agent_id, rec.get("step"), rec.get("action"), json.dumps(rec)) for rec in element_actions or []],
+            )
+
+    def add_log(self, agent_id: str, entry: str) -> None:
+        with self.transaction() as cur:
+            cur.execute(
+                "INSERT INTO logs (agent_id, created_at, entry) VALUES (?, ?, ?)",
+                (agent_id, _now(), entry),
+            )
+
+    # --- reads ---
+
+    def list_runs(self) -> list[dict]:
+        rows = self._query(
+            "SELECT r.agent_id, r.created_at, r.updated_at, "
+            "(SELECT COUNT(*) FROM steps s WHERE s.agent_id = r.agent_id) AS step_count "
+            "FROM runs r ORDER BY r.updated_at DESC"
+        )
+        return [dict(row) for row in rows]
+
+    def has_run(self, agent_id: str) -> bool:
+        return bool(self._query("SELECT 1 FROM runs WHERE agent_id = ?", (agent_id,)))
+
+    def get_steps(self, agent_id: str, event_type: str | None = None) -> list[dict]:
+        if event_type:
+            rows = self._query(
+                "SELECT payload FROM steps WHERE agent_id = ? AND event_type = ? ORDER BY id",
+                (agent_id, event_type),
+            )
+        else:
+            rows = self._query("SELECT payload FROM steps WHERE agent_id = ? ORDER BY id", (agent_id,))
+        return [json.loads(row["payload"]) for row in rows]
+
+    def get_step(self, agent_id: str, event_type: str, step_number) -> dict | None:
+        rows = self._query(
+            "SELECT payload FROM steps WHERE agent_id = ? AND event_type = ? AND step_number IS ? ORDER BY id LIMIT 1",
+            (agent_id, event_type, step_number),
+        )
+        return json.loads(rows[0]["payload"]) if rows else None
+
+    def get_element_actions(self, agent_id: str, action: str | None = None, step_number: int | None = None) -> list[dict]:
+        sql = "SELECT record FROM element_actions WHERE agent_id = ?"
+        params: list = [agent_id]
+        if action:
+            sql += " AND action = ?"
+            params.append(action)
+        if step_number is not None:
+            sql += " AND step_number = ?"
+            params.append(step_number)
+        rows = self._query(sql + " ORDER BY id", tuple(params))
+        return [json.loads(row["record"]) for row in rows]
+
+    def element_action_stats(self, agent_id: str) -> tuple[int, int]:
+        """Return (count, last row id) of an agent's element actions; the table is append-only, so this identifies its contents"""
+        row = self._query(
+            "SELECT COUNT(*) AS n, COALESCE(MAX(id), 0) AS last_id FROM element_actions WHERE agent_id = ?",
+            (agent_id,),
+        )[0]
+        return row["n"], row["last_id"]
+
+    def iter_element_actions(self, agent_id: str, up_to_id: int | None = None, batch_size: int = 500):
+        """Yield element actions in insertion order, reading batch_size rows at a time instead of the whole run"""
+        last_id = 0
+        while True:
+            sql = "SELECT id, record FROM element_actions WHERE agent_id = ? AND id > ?"
+            params: list = [agent_id, last_id]
+            if up_to_id is not None:
+                sql += " AND id <= ?"
+                params.append(up_to_id)
+            rows = self._query(sql + " ORDER BY id LIMIT ?", (*params, batch_size))
+            for row in rows:
+                yield json.loads(row["record"])
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1]["id"]
+
+    def get_logs(self, agent_id: str, limit: int = 500) -> list[dict]:
+        rows = self._query(
+            "SELECT created_at, entry FROM logs WHERE agent_id = ? ORDER BY id DESC LIMIT ?",
+            (agent_id, limit),
+        )
+        return [dict(row) for row in reversed(rows)]
+
+
+# --- migration of the old per-agent JSON directories ---
+
+def _read_json_list(path: Path) -> list:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except Exception as e:
+        logger.warning(f"Skipping unreadable {path}: {e}")
+        return []
+    return data if isinstance(data, list) else []
+
+
+def migrate_data_dir(store: RunStore, data_dir: str | Path = DATA_DIR, overwrite: bool = False) -> dict:
+    """
+    Import existing `data/<agent_id>/` directories into the store.
+
+    Each `<event_type>.json` aggregate becomes rows in `steps`, `testing_steps.json`
+    becomes rows in `element_actions` and `logs/*.log` become rows in `logs`.
+    Agents already present in the store are skipped unless `overwrite` is set.
+    """
+    summary = {"migrated": [], "skipped": []}
+    for agent_dir in sorted(Path(data_dir).iterdir()):
+        if not agent_dir.is_dir():
+            continue
+        agent_id = agent_dir.name
+
+        if store.has_run(agent_id):
+            if not overwrite:
+                summary["skipped"].append(agent_id)
+                continue
+            with store.transaction() as cur:
+                for table in ("element_actions", "steps", "logs", "runs"):
+                    cur.execute(f"DELETE FROM {table} WHERE agent_id = ?", (agent_id,))
+
+        with store.transaction() as cur:
+            store._touch_run(cur, agent_id)
+
+            for event_file in sorted(agent_dir.glob("*.json")):
+                if event_file.name == "testing_steps.json":
+                    continue
+                event_type = event_file.stem
+                cur.executemany(
+                    "INSERT INTO steps (agent_id, event_type, step_number, timestamp, url, payload) VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            agent_id,
+                            event_type,
+                            rec.get("step_number"),
+                            rec.get("timestamp"),
+                            rec.get("url") if isinstance(rec.get("url"), str) else None,
+                            json.dumps(rec),
+                        )
+                        for rec in _read_json_list(event_file)
+                        if isinstance(rec, dict)
+                    ],
+                )
+
+            testing_file = agent_dir / "testing_steps.json"
+            if testing_file.exists():
+                cur.executemany(
+                    "INSERT INTO element_actions (agent_id, step_number, action, record) VALUES (?, ?, ?, ?)",
+                    [
+                        (agent_id, rec.get("step"), rec.get("action"), json.dumps(rec))
+                        for rec in _read_json_list(testing_file)
+                        if isinstance(rec, dict)
+                    ],
+                )
+
+            for log_file in sorted((agent_dir / "logs").glob("*.log")):
+                # Log files are named by day; keep that date as the row timestamp
+                created_at = log_file.stem
+                with log_file.open(encoding="utf-8") as f:
+                    cur.executemany(
+                        "INSERT INTO logs (agent_id, created_at, entry) VALUES (?, ?, ?)",
+                        [(agent_id, created_at, line.rstrip("\n")) for line in f if line.strip()],
+                    )
+
+        summary["migrated"].append(agent_id)
+        logger.info(f"Migrated {agent_dir} into {store.db_path}")
+
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate recorded agent data directories into SQLite")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="directory containing one folder per agent")
+    parser.add_argument("--db", default=DB_PATH, help="path of the SQLite database")
+    parser.add_argument("--overwrite", action="store_true", help="re-import agents that already exist in the database")
+    args = parser.parse_args()
+
+    store = RunStore(args.db)
+    result = migrate_data_dir(store, args.data_dir, overwrite=args.overwrite)
+    store.close()
+    print(f"Migrated {len(result['migrated'])} agents, skipped {len(result['skipped'])} already present")
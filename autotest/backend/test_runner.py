@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Async pool of warm pytest workers for the recording API's `/api/run-test`.
+
+Each worker is a long-lived `python test_runner.py --worker` process that imports
+pytest, pytest-asyncio and Playwright once and then runs submitted scripts with
+`pytest.main()` in a private temp directory. Jobs are queued, get an id, and their
+output is collected line by line so it can be polled or streamed while the test
+runs. A job that exceeds its timeout gets its worker killed and replaced, and
+workers are recycled after a fixed number of jobs so leaked state doesn't pile up.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+DONE_MARKER = "__TEST_RUNNER_DONE__"
+READY_MARKER = "__TEST_RUNNER_READY__"
+
+DEFAULT_WORKERS = int(os.getenv("TEST_RUNNER_WORKERS", "2"))
+DEFAULT_TIMEOUT = float(os.getenv("TEST_RUNNER_TIMEOUT", "30"))
+JOBS_PER_WORKER = int(os.getenv("TEST_RUNNER_JOBS_PER_WORKER", "50"))
+MAX_FINISHED_JOBS = 200
+
+
+@dataclass
+class TestJob:
+    """A submitted script and everything known about its run"""
+    id: str
+    script: str
+    timeout: float
+    status: str = "queued"  # queued | running | passed | failed | timeout | error
+    exit_code: int | None = None
+    output: list[str] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    _changed: asyncio.Condition = field(default_factory=asyncio.Condition, repr=False)
+
+    __test__ = False  # not a pytest test class
+
+    @property
+    def done(self) -> bool:
+        return self.status not in ("queued", "running")
+
+    def text(self) -> str:
+        return "".join(self.output)
+
+    def to_dict(self, include_output: bool = True) -> dict:
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "exit_code": self.exit_code,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration": (self.finished_at - self.started_at) if self.started_at and self.finished_at else None,
+        }
+        if include_output:
+            data["output"] = self.text()
+        return data
+
+    async def _append(self, line: str):
+        async with self._changed:
+            self.output.append(line)
+            self._changed.notify_all()
+
+    async def _finish(self, status: str, exit_code: int | None = None):
+        async with self._changed:
+            self.status = status
+            self.exit_code = exit_code
+            self.finished_at = time.time()
+            self._changed.notify_all()
+
+    async def wait(self):
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.done)
+
+    async def stream(self):
+        """Yield output lines as they arrive, ending when the job finishes"""
+        sent = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: len(self.output) > sent or self.done)
+                lines = self.output[sent:]
+                finished = self.done
+            sent += len(lines)
+            for line in lines:
+                yield line
+            if finished and sent >= len(self.output):
+                return
+
+
+class _Worker:
+    """One warm worker process, restarted on timeout or after JOBS_PER_WORKER jobs"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.proc: asyncio.subprocess.Process | None = None
+        self.jobs_run = 0
+        self.workdir = tempfile.mkdtemp(prefix=f"{name}-")
+
+    async def start(self):
+        self.proc = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.abspath(__file__), "--worker",
+            cwd=self.workdir,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        self.jobs_run = 0
+        # Wait until the heavy imports are done so the first job doesn't pay for them
+        while True:
+            line = await self.proc.stdout.readline()
+            if not line:
+                raise RuntimeError(f"{self.name} exited during startup")
+            if line.decode(errors="replace").startswith(READY_MARKER):
+                break
+        logger.info(f"Test runner {self.name} ready (pid {self.proc.pid})")
+
+    async def stop(self):
+        if self.proc and self.proc.returncode is None:
+            self.proc.kill()
+            await self.proc.wait()
+        self.proc = None
+
+    async def run(self, job: TestJob):
+        if self.proc is None or self.proc.returncode is not None or self.jobs_run >= JOBS_PER_WORKER:
+            await self.stop()
+            await self.start()
+
+        script_path = os.path.join(self.workdir, f"test_{job.id.replace('-', '_')}.py")
+        with open(script_path, "w", encoding="utf-8") as f:
+            f.write(job.script)
+
+        job.status = "running"
+        job.started_at = time.time()
+        self.jobs_run += 1
+        self.proc.stdin.write((json.dumps({"id": job.id, "path": script_path}) + "\n").encode())
+        await self.proc.stdin.drain()
+
+        try:
+            exit_code = await asyncio.wait_for(self._collect(job), timeout=job.timeout)
+            await job._finish("passed" if exit_code == 0 else "failed", exit_code)
+        except asyncio.TimeoutError:
+            # The interpreter may be stuck inside the test; replace it rather than trust it
+            await job._append("Error: Test execution timed out.\n")
+            await job._finish("timeout")
+            await self.stop()
+        except Exception as e:
+            await job._append(f"Error: {e}\n")
+            await job._finish("error")
+            await self.stop()
+        finally:
+            try:
+                os.unlink(script_path)
+            except OSError:
+                pass
+
+    async def _collect(self, job: TestJob) -> int:
+        while True:
+            raw = await self.proc.stdout.readline()
+            if not raw:
+                raise RuntimeError(f"{self.name} exited while running job {job.id}")
+            line = raw.decode(errors="replace")
+            if line.startswith(DONE_MARKER):
+                _, job_id, code = line.split()
+                if job_id == job.id:
+                    return int(code)
+                continue
+            await job._append(line)
+
+
+class TestRunnerPool:
+    """Queue of TestJobs served by a fixed number of warm workers"""
+
+    __test__ = False
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, timeout: float = DEFAULT_TIMEOUT):
+        self.size = max(1, workers)
+        self.timeout = timeout
+        self.jobs: "OrderedDict[str, TestJob]" = OrderedDict()
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._workers: list[_Worker] = []
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [_Worker(f"test-worker-{i}") for i in range(self.size)]
+        self._tasks = [asyncio.create_task(self._serve(worker)) for worker in self._workers]
+        logger.info(f"Test runner pool started with {self.size} workers, timeout {self.timeout}s")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for worker in self._workers:
+            await worker.stop()
+        self._tasks = []
+        self._workers = []
+
+    def submit(self, script: str, timeout: float | None = None) -> TestJob:
+        if self._queue is None:
+            raise RuntimeError("Test runner pool is not started")
+        job = TestJob(id=uuid.uuid4().hex, script=script, timeout=timeout or self.timeout)
+        self.jobs[job.id] = job
+        self._prune()
+        self._queue.put_nowait(job)
+        logger.info(f"Queued test job {job.id} ({self._queue.qsize()} waiting)")
+        return job
+
+    def get(self, job_id: str) -> TestJob | None:
+        return self.jobs.get(job_id)
+
+    def stats(self) -> dict:
+        counts: dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"workers": self.size, "queued": self._queue.qsize() if self._queue else 0, "jobs": counts}
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        for job_id in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    async def _serve(self, worker: _Worker):
+        try:
+            await worker.start()
+        except Exception as e:
+            # run() retries the start when the first job arrives
+            logger.error(f"Failed to start {worker.name}: {e}")
+        while True:
+            job = await self._queue.get()
+            try:
+                await worker.run(job)
+                logger.info(f"Test job {job.id} finished on {worker.name}: {job.status}")
+            except Exception as e:
+                logger.error(f"Test job {job.id} crashed on {worker.name}: {e}")
+                if not job.done:
+                    await job._finish("error")
+            finally:
+                self._queue.task_done()
+
+
+def _worker_main():
+    """Worker process loop: read one JSON job per line from stdin, run it with pytest, report the exit code"""
+    import pytest
+    # Import the plugins generated scripts rely on up front, so each job starts warm
+    try:
+        import pytest_asyncio  # noqa: F401
+        import playwright.async_api  # noqa: F401
+    except ImportError:
+        pass
+
+    print(READY_MARKER, flush=True)
+    for raw in sys.stdin:
+        if not raw.strip():
+            continue
+        job = json.loads(raw)
+        try:
+            code = int(pytest.main([
+                job["path"], "--maxfail=1", "--disable-warnings", "-q",
+                "-p", "no:cacheprovider", "--rootdir", os.path.dirname(job["path"]),
+            ]))
+        except Exception as e:
+            # KeyboardInterrupt and SystemExit end the worker; the pool replaces it for the next job
+            print(f"Error: {e}")
+            code = 1
+        sys.modules.pop(os.path.splitext(os.path.basename(job["path"]))[0], None)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        print(f"{DONE_MARKER} {job['id']} {code}", flush=True)
+
+
+if __name__ == "__main__" and "--worker" in sys.argv:
+    _worker_main()
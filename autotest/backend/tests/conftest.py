@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The backend modules import each other by name, as when the API is started from backend/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
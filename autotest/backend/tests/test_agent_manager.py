@@ -0,0 +1,34 @@
+import asyncio
+from pathlib import Path
+
+import agent_manager
+from agent_manager import AgentManager
+
+# run with (from autotest/backend):
+# python -m pytest tests/test_agent_manager.py
+
+
+def test_screenshot_urls_are_cached_per_step_and_bounded(monkeypatch):
+    writes = []
+
+    async def store_screenshot_async(data, directory):
+        writes.append(data)
+        return Path(directory) / f"{data}.png"
+
+    monkeypatch.setattr(agent_manager, "store_screenshot_async", store_screenshot_async)
+    monkeypatch.setattr(agent_manager, "SCREENSHOT_URL_AGENTS", 2)
+    manager = AgentManager()
+
+    async def history_requests():
+        for _ in range(2):
+            assert await manager.save_agent_screenshot("a", "frame0", 0) == "/screenshots/a/frame0.png"
+        await manager.save_agent_screenshot("b", "frame1", 0)
+        # "a" was used more recently than "b", so "b" is forgotten first
+        await manager.save_agent_screenshot("a", "frame2", 1)
+        await manager.save_agent_screenshot("c", "frame3", 0)
+
+    asyncio.run(history_requests())
+
+    assert writes == ["frame0", "frame1", "frame2", "frame3"]
+    assert list(manager.screenshot_urls) == ["a", "c"]
+    assert manager.screenshot_urls["a"] == {0: "/screenshots/a/frame0.png", 1: "/screenshots/a/frame2.png"}
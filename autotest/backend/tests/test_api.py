@@ -0,0 +1,93 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+from storage import RunStore
+
+# run with (from autotest/backend):
+# python -m pytest tests/test_api.py
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    store = RunStore(tmp_path / "runs.db")
+    monkeypatch.setattr(api, "store", store)
+    monkeypatch.setattr(api, "DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setattr(api, "script_cache", api.OrderedDict())
+    yield TestClient(api.app)
+    store.close()
+
+
+def post_step(client, step_number, **data):
+    response = client.post(
+        "/post_agent_history_step",
+        json={"agent_id": "agent-1", "event_type": "post_step", "step_number": step_number, **data},
+    )
+    assert response.status_code == 200
+
+
+def test_recorded_steps_are_served_from_the_store(client):
+    client.post("/post_agent_history_step", json={"agent_id": "agent-1", "event_type": "pre_step", "step_number": 1})
+    post_step(client, 1, url="https://example.com", element_actions=[{"action": "go_to_url", "url": "https://example.com"}])
+    client.post("/save_log", json={"agent_id": "agent-1", "log_entry": "hello"})
+
+    assert [run["agent_id"] for run in client.get("/api/runs").json()] == ["agent-1"]
+    assert len(client.get("/api/history/agent-1").json()["steps"]) == 2
+    actions = client.get("/api/history/agent-1/actions", params={"action": "navigate"}).json()["actions"]
+    assert [action["url"] for action in actions] == ["https://example.com"]
+    assert [log["entry"] for log in client.get("/api/history/agent-1/logs").json()["logs"]] == ["hello"]
+    assert client.get("/api/history/agent-2").status_code == 404
+
+
+def record_script(client):
+    post_step(client, 1, element_actions=[{"action": "go_to_url", "url": "https://example.com"}])
+    post_step(client, 2, element_actions=[{"action": "click", "selector": "save"}])
+
+
+@pytest.mark.parametrize(
+    "if_none_match",
+    ['{etag}', 'W/{etag}', '"other", {etag}', '"other",W/{etag}', "*"],
+)
+def test_generate_answers_a_matching_etag_with_304(client, if_none_match):
+    record_script(client)
+    etag = client.get("/api/generate", params={"agentId": "agent-1"}).headers["etag"]
+
+    response = client.get(
+        "/api/generate", params={"agentId": "agent-1"}, headers={"If-None-Match": if_none_match.format(etag=etag)}
+    )
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+
+def test_generate_streams_then_serves_the_cached_script(client, monkeypatch):
+    record_script(client)
+
+    first = client.get("/api/generate", params={"agentId": "agent-1"})
+    assert first.status_code == 200
+    lines = first.text.splitlines()
+    assert lines[0] == "import pytest"
+    assert "        await page.goto('https://example.com')" in lines
+    assert "        await page.click('#save', button='left', click_count=1)" in lines
+    assert lines[-1] == "        await browser.close()"
+    assert client.get("/api/generate", params={"agentId": "agent-1"}, headers={"If-None-Match": '"other"'}).status_code == 200
+
+    # The second request is answered from the cache without reading the steps again
+    reads = []
+    iter_element_actions = api.store.iter_element_actions
+
+    def counting_iter(*args, **kwargs):
+        reads.append(args)
+        return iter_element_actions(*args, **kwargs)
+
+    monkeypatch.setattr(api.store, "iter_element_actions", counting_iter)
+    second = client.get("/api/generate", params={"agentId": "agent-1"})
+    assert second.text == first.text
+    assert second.headers["etag"] == first.headers["etag"]
+    assert reads == []
+
+    # A new step changes the ETag
+    post_step(client, 3, element_actions=[{"action": "wait", "timeout": 100}])
+    third = client.get("/api/generate", params={"agentId": "agent-1"})
+    assert third.headers["etag"] != first.headers["etag"]
+    assert "        await page.wait_for_timeout(100)" in third.text
@@ -0,0 +1,204 @@
+import asyncio
+import json
+import textwrap
+import xml.etree.ElementTree as ET
+from argparse import Namespace
+
+import pytest
+
+import regression
+
+# run with (from autotest/backend):
+# python -m pytest tests/test_regression.py
+
+
+class StubPage:
+    def __init__(self, context):
+        self.context = context
+        self.closed = False
+
+    async def goto(self, url):
+        self.context.browser.visits.append(url)
+        await asyncio.sleep(0.01)
+
+    async def title(self):
+        return "Stub"
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+class StubContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.opened: list[StubPage] = []
+        self.cookies_cleared = 0
+        self.closed = False
+
+    @property
+    def pages(self):
+        return [page for page in self.opened if not page.closed]
+
+    async def new_page(self):
+        page = StubPage(self)
+        self.opened.append(page)
+        return page
+
+    async def clear_cookies(self):
+        self.cookies_cleared += 1
+
+    async def close(self):
+        self.closed = True
+
+
+class StubBrowser:
+    """Stands in for a Playwright browser; contexts[0] plays the attached Chrome's default context"""
+
+    def __init__(self):
+        self.visits: list[str] = []
+        self.created: list[StubContext] = []
+        self.contexts = [StubContext(self)]
+        self.closed = False
+
+    async def new_context(self, **kwargs):
+        context = StubContext(self)
+        self.created.append(context)
+        return context
+
+    async def close(self):
+        self.closed = True
+
+
+def write_test(directory, name, body):
+    source = "from playwright.async_api import async_playwright\n\n" + textwrap.dedent(body)
+    (directory / name).write_text(source, encoding="utf-8")
+
+
+PAGE_TEST = """
+async def test_{name}():
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        page = await browser.new_page()
+        await page.goto("https://example.test/{name}")
+        assert await page.title() == "Stub"
+        await browser.close()
+"""
+
+
+@pytest.fixture
+def suite(tmp_path):
+    for name in ("one", "two", "three", "four"):
+        write_test(tmp_path, f"test_{name}.py", PAGE_TEST.format(name=name))
+    # Fails on its first attempt only; the counter lives on the module, which is imported once
+    write_test(tmp_path, "test_flaky.py", """
+        attempts = []
+
+        async def test_flaky():
+            attempts.append(1)
+            async with async_playwright() as p:
+                page = await (await p.chromium.launch()).new_page()
+                await page.goto("https://example.test/flaky")
+            assert len(attempts) > 1, "first attempt fails"
+    """)
+    write_test(tmp_path, "test_hangs.py", """
+        import asyncio
+
+        async def test_hangs():
+            await asyncio.sleep(60)
+    """)
+    (tmp_path / "test_plain.py").write_text("def test_sync():\n    pass\n", encoding="utf-8")
+    return tmp_path
+
+
+def run(browser, tests, **kwargs):
+    return asyncio.run(regression.run_suite(browser, tests, **kwargs))
+
+
+def test_tests_are_spread_over_shards_and_failures_retried_after_the_first_pass(suite):
+    browser = StubBrowser()
+    results = {r.name: r for r in run(browser, regression.discover(suite), shards=2, timeout=1, retries=1)}
+
+    assert {name: r.status for name, r in results.items()} == {
+        "test_flaky": "passed", "test_four": "passed", "test_hangs": "timeout", "test_one": "passed",
+        "test_three": "passed", "test_two": "passed", "<module>": "skipped",
+    }
+    assert {r.shard for r in results.values() if r.attempts} == {0, 1}
+    assert results["test_one"].attempts == 1
+    assert results["test_flaky"].attempts == results["test_hangs"].attempts == 2
+    # The flaky test's retry came after every test's first attempt
+    assert browser.visits.index("https://example.test/flaky") < browser.visits.index("https://example.test/four")
+    assert browser.visits[-1] == "https://example.test/flaky"
+    assert [(s.action, s.target) for s in results["test_one"].steps] == [
+        ("goto", "https://example.test/one"), ("title", ""),
+    ]
+    # Two shards per pass, each with a fresh context it closed when the queue ran dry
+    assert len(browser.created) == 4
+    assert all(context.closed for context in browser.created)
+    assert not browser.closed
+
+
+def test_shared_context_is_reused_and_left_open(suite):
+    browser = StubBrowser()
+    default = browser.contexts[0]
+    existing = asyncio.run(default.new_page())
+    results = run(browser, regression.discover(suite), shards=3, timeout=1, retries=0, context=default)
+
+    assert sum(r.status == "passed" for r in results) == 4
+    assert browser.created == []
+    assert not default.closed and default.cookies_cleared == 0
+    # Only the pages the tests opened were closed
+    assert default.pages == [existing]
+    assert len(default.opened) == 1 + 5
+
+
+def test_reports(suite, tmp_path):
+    results = run(StubBrowser(), regression.discover(suite), shards=2, timeout=1, retries=1)
+    summary = regression.summarize(results, wall_time=3.0)
+    regression.write_json(results, summary, tmp_path / "report.json")
+    regression.write_junit(results, summary, tmp_path / "report.xml")
+
+    assert summary["counts"] == {"passed": 5, "timeout": 1, "skipped": 1}
+    assert summary["flaky"] == 1
+    report = json.loads((tmp_path / "report.json").read_text(encoding="utf-8"))
+    assert report["summary"] == summary
+    flaky = next(t for t in report["tests"] if t["id"] == "test_flaky.py::test_flaky")
+    assert (flaky["status"], flaky["attempts"]) == ("passed", 2)
+    assert flaky["steps"][0]["action"] == "goto"
+
+    suite_el = ET.parse(tmp_path / "report.xml").getroot()
+    assert (suite_el.get("tests"), suite_el.get("failures"), suite_el.get("skipped")) == ("7", "1", "1")
+    cases = {case.get("name"): case for case in suite_el.iter("testcase")}
+    assert cases["test_hangs"].find("failure").get("type") == "timeout"
+    assert "goto https://example.test/one" in cases["test_one"].find("system-out").text
+    assert cases["<module>"].find("skipped") is not None
+
+
+def test_attached_chrome_is_not_closed(suite, tmp_path, monkeypatch):
+    browser = StubBrowser()
+
+    class StubChromium:
+        async def connect_over_cdp(self, url):
+            return browser
+
+    class StubPlaywright:
+        chromium = StubChromium()
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    monkeypatch.setattr("playwright.async_api.async_playwright", StubPlaywright)
+    args = Namespace(
+        test_dir=suite, pattern="test_[ot]*.py", shards=2, timeout=1.0, retries=0, headed=False,
+        cdp_url="http://localhost:9222", json=str(tmp_path / "report.json"), junit=None,
+    )
+
+    assert asyncio.run(regression.main(args)) == 0
+    assert not browser.closed
+    assert browser.created == [] and not browser.contexts[0].closed
+    assert json.loads((tmp_path / "report.json").read_text(encoding="utf-8"))["summary"]["counts"] == {"passed": 3}
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from storage import RunStore, migrate_data_dir
+
+# run with (from autotest/backend):
+# python -m pytest tests/test_storage.py
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RunStore(tmp_path / "runs.db")
+    yield store
+    store.close()
+
+
+def test_step_and_its_actions_are_stored_together(store):
+    actions = [
+        {"step": 1, "action": "navigate", "url": "https://example.com"},
+        {"step": 1, "action": "click", "selector": "#save"},
+    ]
+    store.record_step("agent-1", "post_step", {"step_number": 1, "url": "https://example.com"}, actions)
+    store.record_step("agent-1", "pre_step", {"step_number": 2})
+
+    assert store.has_run("agent-1") and not store.has_run("agent-2")
+    assert [run["step_count"] for run in store.list_runs()] == [2]
+    assert store.get_step("agent-1", "post_step", 1)["url"] == "https://example.com"
+    assert store.get_step("agent-1", "post_step", 2) is None
+    assert [step["step_number"] for step in store.get_steps("agent-1")] == [1, 2]
+    assert store.get_element_actions("agent-1", action="click") == actions[1:]
+    assert store.get_element_actions("agent-1", step_number=1) == actions
+    assert store.element_action_stats("agent-1")[0] == 2
+    assert list(store.iter_element_actions("agent-1", batch_size=1)) == actions
+
+
+def test_failed_write_leaves_no_rows(store):
+    with pytest.raises(TypeError):
+        store.record_step("agent-1", "post_step", {"step_number": 1}, [{"step": 1, "action": "click", "bad": object()}])
+
+    assert not store.has_run("agent-1")
+    assert store.get_steps("agent-1") == []
+
+
+def test_logs_keep_the_most_recent_lines(store):
+    for i in range(5):
+        store.add_log("agent-1", f"line {i}")
+
+    assert [log["entry"] for log in store.get_logs("agent-1", limit=2)] == ["line 3", "line 4"]
+
+
+@pytest.mark.parametrize(
+    "sql, params, index",
+    [
+        (
+            "SELECT payload FROM steps WHERE agent_id = ? AND event_type = ? AND step_number IS ?",
+            ("a", "pre_step", 1),
+            "idx_steps_agent_event_step",
+        ),
+        ("SELECT record FROM element_actions WHERE agent_id = ? AND action = ?", ("a", "click"), "idx_actions_agent_action"),
+        ("SELECT record FROM element_actions WHERE agent_id = ? AND step_number = ?", ("a", 1), "idx_actions_agent_step"),
+    ],
+)
+def test_lookups_use_an_index(store, sql, params, index):
+    plan = " ".join(row["detail"] for row in store._query("EXPLAIN QUERY PLAN " + sql, params))
+
+    assert index in plan
+
+
+def test_migrate_data_dir(store, tmp_path):
+    agent_dir = tmp_path / "data" / "agent-1"
+    (agent_dir / "logs").mkdir(parents=True)
+    (agent_dir / "post_step.json").write_text(json.dumps([{"step_number": 1}, {"step_number": 2}]))
+    (agent_dir / "testing_steps.json").write_text(json.dumps([{"step": 1, "action": "click"}]))
+    (agent_dir / "broken.json").write_text("{not json")
+    (agent_dir / "logs" / "2025-01-02.log").write_text("first\n\nsecond\n")
+
+    assert migrate_data_dir(store, tmp_path / "data") == {"migrated": ["agent-1"], "skipped": []}
+    assert len(store.get_steps("agent-1", "post_step")) == 2
+    assert store.get_element_actions("agent-1") == [{"step": 1, "action": "click"}]
+    assert [(log["created_at"], log["entry"]) for log in store.get_logs("agent-1")] == [
+        ("2025-01-02", "first"),
+        ("2025-01-02", "second"),
+    ]
+
+    # Already imported agents are skipped, or replaced with overwrite
+    assert migrate_data_dir(store, tmp_path / "data") == {"migrated": [], "skipped": ["agent-1"]}
+    migrate_data_dir(store, tmp_path / "data", overwrite=True)
+    assert len(store.get_steps("agent-1", "post_step")) == 2
@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+from test_runner import TestRunnerPool
+
+# run with (from autotest/backend):
+# python -m pytest tests/test_test_runner.py
+
+PASSING = "def test_ok():\n    print('hello from the test')\n"
+FAILING = "def test_broken():\n    assert 1 == 2\n"
+HANGING = "import time\n\ndef test_hangs():\n    time.sleep(60)\n"
+
+
+def run_jobs(*jobs, workers=1):
+    """Run (script, timeout) jobs on a fresh pool and return them once all are done"""
+
+    async def main():
+        pool = TestRunnerPool(workers=workers, timeout=30)
+        await pool.start()
+        try:
+            submitted = [pool.submit(script, timeout=timeout) for script, timeout in jobs]
+            for job in submitted:
+                await job.wait()
+            return submitted, pool.stats()
+        finally:
+            await pool.stop()
+
+    return asyncio.run(main())
+
+
+def test_jobs_report_pass_and_fail():
+    (passed, failed), stats = run_jobs((PASSING, None), (FAILING, None))
+
+    assert (passed.status, passed.exit_code) == ("passed", 0)
+    assert "1 passed" in passed.text()
+    assert failed.status == "failed" and failed.exit_code != 0
+    assert "assert 1 == 2" in failed.text()
+    assert stats["jobs"] == {"passed": 1, "failed": 1}
+
+
+def test_timed_out_job_kills_its_worker_and_the_next_job_runs():
+    (hanging, after), _ = run_jobs((HANGING, 2), (PASSING, None))
+
+    assert hanging.status == "timeout"
+    assert hanging.finished_at - hanging.started_at < 10
+    assert "timed out" in hanging.text()
+    assert after.status == "passed"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(api, "test_runner", TestRunnerPool(workers=1, timeout=30))
+    with TestClient(api.app) as client:
+        yield client
+
+
+def test_submitted_job_is_polled_to_completion(client):
+    response = client.post("/api/run-test", params={"wait": "false"}, json={"script": PASSING})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert response.json()["status"] in ("queued", "running")
+
+    deadline = time.monotonic() + 60
+    while (job := client.get(f"/api/run-test/{job_id}").json())["status"] in ("queued", "running"):
+        assert time.monotonic() < deadline
+        time.sleep(0.1)
+
+    assert job["status"] == "passed"
+    assert "1 passed" in job["output"]
+    assert "1 passed" in client.get(f"/api/run-test/{job_id}/stream").text
+    listing = client.get("/api/run-test").json()
+    assert listing["jobs"] == {"passed": 1}
+    assert [recent["job_id"] for recent in listing["recent"]] == [job_id]
+    assert client.get("/api/run-test/unknown").status_code == 404
+
+
+def test_waiting_run_returns_the_output(client):
+    response = client.post("/api/run-test", json={"script": FAILING})
+
+    assert response.headers["x-test-status"] == "failed"
+    assert "assert 1 == 2" in response.text
+    assert client.post("/api/run-test", json={}).status_code == 400
@@ -2,11 +2,14 @@ from browser_use.logging_config import setup_logging
 
 setup_logging()
 
+from browser_use.agent.pool.service import AgentPool as AgentPool
+from browser_use.agent.pool.service import run_many as run_many
 from browser_use.agent.prompts import SystemPrompt as SystemPrompt
 from browser_use.agent.service import Agent as Agent
 from browser_use.agent.views import ActionModel as ActionModel
 from browser_use.agent.views import ActionResult as ActionResult
 from browser_use.agent.views import AgentHistoryList as AgentHistoryList
+from browser_use.agent.views import RunBudget as RunBudget
 from browser_use.browser.browser import Browser as Browser
 from browser_use.browser.browser import BrowserConfig as BrowserConfig
 from browser_use.controller.service import Controller as Controller
@@ -14,6 +17,8 @@ from browser_use.dom.service import DomService as DomService
 
 __all__ = [
 	'Agent',
+	'AgentPool',
+	'run_many',
 	'Browser',
 	'BrowserConfig',
 	'Controller',
@@ -22,4 +27,5 @@ __all__ = [
 	'ActionResult',
 	'ActionModel',
 	'AgentHistoryList',
+	'RunBudget',
 ]
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+
+from browser_use.agent.checkpoint.views import AgentCheckpoint, BrowserSnapshot
+from browser_use.browser.context import BrowserContext
+
+logger = logging.getLogger(__name__)
+
+
+def save_checkpoint(checkpoint: AgentCheckpoint, path: str | Path) -> None:
+	"""Write the checkpoint atomically, so a crash mid-write keeps the previous one"""
+	path = Path(path)
+	path.parent.mkdir(parents=True, exist_ok=True)
+	tmp = path.with_suffix(f'{path.suffix}.{os.getpid()}.tmp')
+	tmp.write_text(checkpoint.model_dump_json(), encoding='utf-8')
+	os.replace(tmp, path)
+
+
+def load_checkpoint(path: str | Path) -> AgentCheckpoint:
+	return AgentCheckpoint.model_validate_json(Path(path).read_text(encoding='utf-8'))
+
+
+async def capture_browser(browser_context: BrowserContext) -> BrowserSnapshot:
+	session = await browser_context.get_session()
+	pages = session.context.pages
+	return BrowserSnapshot(
+		tabs=[page.url for page in pages],
+		current_tab=pages.index(session.current_page) if session.current_page in pages else 0,
+		cookies=await session.context.cookies(),
+	)
+
+
+async def restore_browser(browser_context: BrowserContext, snapshot: BrowserSnapshot) -> None:
+	"""Restore cookies first, then reopen the tabs so pages load with the restored session"""
+	session = await browser_context.get_session()
+	if snapshot.cookies:
+		await session.context.add_cookies(snapshot.cookies)  # type: ignore
+	for i, url in enumerate(snapshot.tabs):
+		try:
+			if i == 0:
+				await browser_context.navigate_to(url)
+			else:
+				await browser_context.create_new_tab(url)
+		except Exception as e:
+			logger.warning(f'Could not reopen {url}: {e}')
+	if snapshot.tabs:
+		try:
+			await browser_context.switch_to_tab(snapshot.current_tab)
+		except Exception as e:
+			logger.warning(f'Could not switch back to tab {snapshot.current_tab}: {e}')
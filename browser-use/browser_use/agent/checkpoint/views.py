@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Optional
+
+from pydantic import BaseModel, Field
+
+from browser_use.agent.views import ActionResult, RunUsage
+
+
+class BrowserSnapshot(BaseModel):
+	"""Open tabs and cookies, enough to put a fresh browser context back where the agent was"""
+
+	tabs: list[str] = Field(default_factory=list)  # URLs in tab order
+	current_tab: int = 0
+	cookies: list[dict[str, Any]] = Field(default_factory=list)
+
+
+class AgentCheckpoint(BaseModel):
+	"""State of an agent after a step, written by Agent(checkpoint_path=...) and read by Agent.resume()"""
+
+	version: int = 1
+	agent_id: str
+	task: str
+	created_at: float = Field(default_factory=time.time)
+	n_steps: int
+	consecutive_failures: int = 0
+	messages: list[dict[str, Any]]  # langchain messages_to_dict()
+	message_tokens: list[int]
+	history: dict[str, Any]  # AgentHistoryList.model_dump(), without screenshots
+	last_result: Optional[list[ActionResult]] = None
+	usage: RunUsage = Field(default_factory=RunUsage)
+	browser: BrowserSnapshot = Field(default_factory=BrowserSnapshot)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Optional, Type
+from urllib.parse import parse_qsl, urlsplit
+
+from pydantic import ValidationError
+
+from browser_use.agent.decision_cache.views import CachedDecision
+from browser_use.agent.views import AgentOutput
+from browser_use.browser.views import BrowserState
+
+logger = logging.getLogger(__name__)
+
+# Path segments that look like ids (numbers, uuids, long hex/base64 tokens) are normalized away
+_ID_SEGMENT = re.compile(r'^(\d+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-zA-Z_-]{24,})$', re.I)
+
+
+def normalize_url(url: str) -> str:
+	"""URL pattern used in the page fingerprint: host and path with ids replaced, query keys without values"""
+	parts = urlsplit(url)
+	path = '/'.join(':id' if _ID_SEGMENT.match(segment) else segment for segment in parts.path.split('/'))
+	query_keys = sorted({key for key, _ in parse_qsl(parts.query, keep_blank_values=True)})
+	pattern = f'{parts.scheme}://{parts.netloc.lower()}{path}'
+	if query_keys:
+		pattern += '?' + '&'.join(query_keys)
+	return pattern
+
+
+class DecisionCache:
+	"""
+	Opt-in on-disk cache of model decisions for recurring tasks.
+
+	A decision is keyed by the page fingerprint (URL pattern plus a hash of the clickable-element
+	string the model sees), the task and the actions of the previous step. On a hit, Agent.step
+	replays the stored AgentOutput instead of calling the LLM. Entries expire after `ttl` seconds
+	and are removed as soon as one of their actions fails.
+	"""
+
+	def __init__(
+		self,
+		cache_dir: str | Path = '~/.cache/browser_use/decisions',
+		ttl: Optional[float] = 7 * 24 * 3600,
+		include_attributes: Optional[list[str]] = None,
+	):
+		self.cache_dir = Path(cache_dir).expanduser()
+		self.cache_dir.mkdir(parents=True, exist_ok=True)
+		self.ttl = ttl
+		self.include_attributes = include_attributes
+		self.hits = 0
+		self.misses = 0
+		self._lock = threading.Lock()
+
+	def make_key(
+		self,
+		state: BrowserState,
+		task: str,
+		previous_actions: list[dict[str, Any]],
+		include_attributes: list[str],
+	) -> tuple[str, str]:
+		"""Return (key, url pattern) for the decision to take on this page"""
+		url_pattern = normalize_url(state.url)
+		elements = state.element_tree.clickable_elements_to_string(
+			include_attributes=self.include_attributes or include_attributes
+		)
+		material = json.dumps(
+			{
+				'url': url_pattern,
+				'elements': hashlib.sha256(elements.encode()).hexdigest(),
+				'task': task,
+				'previous_actions': previous_actions,
+			},
+			sort_keys=True,
+			default=str,
+		)
+		return hashlib.sha256(material.encode()).hexdigest(), url_pattern
+
+	def _path(self, key: str) -> Path:
+		return self.cache_dir / f'{key}.json'
+
+	def get(self, key: str, output_model: Type[AgentOutput]) -> Optional[AgentOutput]:
+		"""Return the cached decision for key, or None if missing, expired or no longer valid for output_model"""
+		path = self._path(key)
+		try:
+			entry = CachedDecision.model_validate_json(path.read_text(encoding='utf-8'))
+		except FileNotFoundError:
+			self.misses += 1
+			return None
+		except (OSError, ValidationError, ValueError) as e:
+			logger.debug(f'Dropping unreadable decision cache entry {path.name}: {e}')
+			self.invalidate(key)
+			self.misses += 1
+			return None
+
+		if entry.is_expired(self.ttl):
+			self.invalidate(key)
+			self.misses += 1
+			return None
+
+		try:
+			output = output_model.model_validate(entry.output)
+		except ValidationError:
+			# The registered actions changed since the decision was stored
+			self.invalidate(key)
+			self.misses += 1
+			return None
+
+		# Hits are only counted in memory: a hit must not cost a file write
+		self.hits += 1
+		return output
+
+	def put(self, key: str, url_pattern: str, output: AgentOutput) -> None:
+		entry = CachedDecision(key=key, url_pattern=url_pattern, output=json.loads(output.model_dump_json(exclude_unset=True)))
+		self._write(entry)
+
+	def invalidate(self, key: str) -> None:
+		with self._lock:
+			try:
+				self._path(key).unlink()
+			except FileNotFoundError:
+				pass
+
+	def clear(self) -> None:
+		with self._lock:
+			for path in self.cache_dir.glob('*.json'):
+				path.unlink(missing_ok=True)
+
+	def _write(self, entry: CachedDecision) -> None:
+		path = self._path(entry.key)
+		tmp = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+		with self._lock:
+			tmp.write_text(entry.model_dump_json(), encoding='utf-8')
+			os.replace(tmp, path)
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class CachedDecision(BaseModel):
+	"""A validated model output stored for one (page fingerprint, task, step context) key"""
+
+	key: str
+	url_pattern: str
+	output: dict[str, Any]
+	created_at: float = Field(default_factory=time.time)
+
+	def is_expired(self, ttl: float | None) -> bool:
+		return ttl is not None and time.time() - self.created_at > ttl
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import shutil
+import tempfile
+import uuid
+import weakref
+from pathlib import Path
+from typing import Optional
+
+
+class BlobStore:
+	"""
+	On-disk store for bulky message content of one agent (screenshots, long DOM strings).
+
+	Blobs live in their own directory, which is removed when the store is garbage collected
+	or closed; they are only needed while the messages referencing them are in the history.
+	"""
+
+	def __init__(self, directory: Optional[str | Path] = None):
+		if directory is None:
+			self.directory = Path(tempfile.mkdtemp(prefix='browser_use_blobs_'))
+		else:
+			self.directory = Path(directory)
+			self.directory.mkdir(parents=True, exist_ok=True)
+		self._finalizer = weakref.finalize(self, shutil.rmtree, str(self.directory), True)
+
+	def _path(self, blob_id: str) -> Path:
+		return self.directory / f'{blob_id}.blob'
+
+	def put(self, data: str) -> str:
+		blob_id = uuid.uuid4().hex
+		self._path(blob_id).write_text(data, encoding='utf-8')
+		return blob_id
+
+	def get(self, blob_id: str) -> str:
+		return self._path(blob_id).read_text(encoding='utf-8')
+
+	def delete(self, blob_id: str) -> None:
+		self._path(blob_id).unlink(missing_ok=True)
+
+	def size(self) -> int:
+		"""Bytes currently stored"""
+		return sum(p.stat().st_size for p in self.directory.glob('*.blob'))
+
+	def close(self) -> None:
+		"""Remove the store's directory and everything in it"""
+		self._finalizer()
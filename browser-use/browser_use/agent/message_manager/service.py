@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 import logging
 from datetime import datetime
 from typing import List, Optional, Type
@@ -10,17 +11,28 @@ from langchain_core.messages import (
 	AIMessage,
 	BaseMessage,
 	HumanMessage,
+	SystemMessage,
 	ToolMessage,
 )
-from langchain_openai import ChatOpenAI
 
-from browser_use.agent.message_manager.views import MessageHistory, MessageMetadata
+from browser_use.agent.message_manager.blob_store import BlobStore
+from browser_use.agent.message_manager.token_counter import TokenCounter, get_token_counter, llm_provider
+from browser_use.agent.message_manager.views import ManagedMessage, MessageHistory, MessageMetadata
 from browser_use.agent.prompts import AgentMessagePrompt, SystemPrompt
 from browser_use.agent.views import ActionResult, AgentOutput, AgentStepInfo
 from browser_use.browser.views import BrowserState
+from browser_use.dom.diff.service import DOMDiffer
+from browser_use.dom.ranking.service import ElementRanker
+from browser_use.dom.views import DOMBaseNode
+from browser_use.profiler.service import profile_span
 
 logger = logging.getLogger(__name__)
 
+# System prompt, task and the example tool call with its response are never compacted
+_PROTECTED_MESSAGES = 4
+_SUMMARY_PREFIX = 'Summary of earlier steps:'
+_DOM_REFERENCE_ID = 'dom_reference'
+
 
 class MessageManager:
 	def __init__(
@@ -35,6 +47,15 @@ class MessageManager:
 		include_attributes: list[str] = [],
 		max_error_length: int = 400,
 		max_actions_per_step: int = 10,
+		token_counter: Optional[TokenCounter] = None,
+		max_history_steps: Optional[int] = None,
+		keep_recent_steps: int = 3,
+		max_summary_lines: int = 50,
+		prompt_caching: bool = True,
+		dom_differ: Optional[DOMDiffer] = None,
+		element_ranker: Optional[ElementRanker] = None,
+		blob_store: Optional[BlobStore] = None,
+		blob_threshold: int = 2000,
 	):
 		self.llm = llm
 		self.system_prompt_class = system_prompt_class
@@ -44,8 +65,20 @@ class MessageManager:
 		self.action_descriptions = action_descriptions
 		self.ESTIMATED_TOKENS_PER_CHARACTER = estimated_tokens_per_character
 		self.IMG_TOKENS = image_tokens
+		self.token_counter = token_counter or get_token_counter(llm, estimated_tokens_per_character)
 		self.include_attributes = include_attributes
 		self.max_error_length = max_error_length
+		self.max_history_steps = max_history_steps
+		self.keep_recent_steps = keep_recent_steps
+		self.max_summary_lines = max_summary_lines
+		# OpenAI caches matching prefixes on its own; Anthropic only caches up to explicit markers
+		self.cache_markers = prompt_caching and llm_provider(llm) == 'anthropic'
+		self.dom_differ = dom_differ
+		self.element_ranker = element_ranker
+		self.blob_store = blob_store
+		self.blob_threshold = blob_threshold
+		self._next_goal = ''
+		self._last_selector_map: dict = {}
 
 		system_message = self.system_prompt_class(
 			self.action_descriptions,
@@ -113,6 +146,11 @@ class MessageManager:
 						self._add_message_with_tokens(msg)
 					result = None  # if result in history, we dont want to add it again
 
+		elements_text = None
+		if self.dom_differ or self.element_ranker:
+			elements_text = self._elements_text(state)
+		self._last_selector_map = state.selector_map
+
 		# otherwise add state message and result to next message (which will not stay in memory)
 		state_message = AgentMessagePrompt(
 			state,
@@ -120,18 +158,74 @@ class MessageManager:
 			include_attributes=self.include_attributes,
 			max_error_length=self.max_error_length,
 			step_info=step_info,
+			current_date=datetime.now(),
+			elements_text=elements_text,
 		).get_user_message()
 		self._add_message_with_tokens(state_message)
 
+	def _elements_text(self, state: BrowserState) -> str:
+		"""Element list for the state message, as a diff and/or ranked to fit the element token budget"""
+		entries = state.element_tree.clickable_element_entries(self.include_attributes)
+		if self.dom_differ:
+			return self._diff_elements(state, entries)
+		return self._ranked_text(entries)
+
+	def _ranked_text(self, entries: list[tuple[str, str, DOMBaseNode]]) -> str:
+		"""Lines of the entries that fit the element token budget, followed by a marker for the rest"""
+		omitted = 0
+		if self.element_ranker:
+			entries, omitted = self.element_ranker.rank(entries, f'{self.task} {self._next_goal}', self.token_counter.count)
+		text = '\n'.join(line for _, line, _ in entries)
+		marker = ElementRanker.marker(omitted)
+		return f'{text}\n{marker}' if marker else text
+
+	def _diff_elements(self, state: BrowserState, entries: list[tuple[str, str, DOMBaseNode]]) -> str:
+		"""
+		Element list text for the state message in diff mode. Full lists are kept in the history as
+		a reference message (replacing the previous one); other states only list the changes. The
+		diff is taken on all elements and ranked afterwards, so elements that only dropped out of
+		the ranking are not reported as removed
+		"""
+		reference = self._dom_reference_index()
+		if reference is None:
+			# e.g. after restoring a checkpoint: the differ's reference is not in the history
+			self.dom_differ.reset()
+
+		diff = self.dom_differ.update(state.url, entries, self.include_attributes)
+		if not diff.full:
+			if not diff.text:
+				return 'No changes since the full element list above.'
+			return (
+				'Changes since the full element list above (+ added, - removed, ~ changed; '
+				'elements not listed are unchanged and keep their index):\n' + self._ranked_text(diff.entries)
+			)
+
+		if reference is not None:
+			self._remove_message(reference)
+		elements = self._ranked_text(diff.entries) or 'empty page'
+		message = HumanMessage(content=f'Full element list of {state.url}:\n{elements}', id=_DOM_REFERENCE_ID)
+		self._add_message_with_tokens(message)
+		return 'See the full element list above.'
+
+	def _dom_reference_index(self) -> Optional[int]:
+		return next((i for i, m in enumerate(self.history.messages) if m.message.id == _DOM_REFERENCE_ID), None)
+
 	def _remove_last_state_message(self) -> None:
 		"""Remove last state message from history"""
 		if len(self.history.messages) > 2 and isinstance(
 			self.history.messages[-1].message, HumanMessage
 		):
-			self.history.remove_message()
+			self._remove_message()
 
 	def add_model_output(self, model_output: AgentOutput) -> None:
 		"""Add model output as AI message"""
+		if self.element_ranker:
+			# The next element list is ranked against this goal and the elements acted on
+			self._next_goal = model_output.current_state.next_goal
+			indexes = [index for action in model_output.action for index in action.get_indexes()]
+			self.element_ranker.record_interaction(
+				self._last_selector_map[i].xpath for i in indexes if i in self._last_selector_map
+			)
 		tool_calls = [
 			{
 				'name': 'AgentOutput',
@@ -158,7 +252,9 @@ class MessageManager:
 	def get_messages(self) -> List[BaseMessage]:
 		"""Get current message list, potentially trimmed to max tokens"""
 
-		msg = [m.message for m in self.history.messages]
+		msg = self.history_messages()
+		if self.cache_markers:
+			msg = self._add_cache_markers(msg)
 		# debug which messages are in history with token count # log
 		total_input_tokens = 0
 		logger.debug(f'Messages in history: {len(self.history.messages)}:')
@@ -169,10 +265,81 @@ class MessageManager:
 
 		return msg
 
+	def history_messages(self) -> List[BaseMessage]:
+		"""Messages of the history with their full content, loading spilled content from the blob store"""
+		return [self._load(m) for m in self.history.messages]
+
+	def restore_history(self, messages: List[BaseMessage], token_counts: List[int]) -> None:
+		"""Replace the history, e.g. with one from a checkpoint; bulky content goes to the blob store again"""
+		while self.history.messages:
+			self._remove_message()
+		for message, tokens in zip(messages, token_counts):
+			metadata = MessageMetadata(input_tokens=tokens)
+			self.history.add_message(self._spill(message, metadata), metadata)
+
+	def _load(self, managed: ManagedMessage) -> BaseMessage:
+		if managed.metadata.blob_id is None:
+			return managed.message
+		content = json.loads(self.blob_store.get(managed.metadata.blob_id))
+		return managed.message.model_copy(update={'content': content})
+
+	def _spill(self, message: BaseMessage, metadata: MessageMetadata) -> BaseMessage:
+		"""
+		Move bulky content to the blob store and keep a stub: the start of the text, so checks on
+		message prefixes keep working without loading the content
+		"""
+		if self.blob_store is None:
+			return message
+		content = message.content
+		if isinstance(content, str):
+			size, text = len(content), content
+		else:
+			parts = [item for item in content if isinstance(item, dict)]
+			size = sum(len(str(item.get('text') or item.get('image_url') or '')) for item in parts)
+			text = next((item['text'] for item in parts if 'text' in item), '')
+		if size < self.blob_threshold:
+			return message
+		metadata.blob_id = self.blob_store.put(json.dumps(content))
+		return message.model_copy(update={'content': text[:200]})
+
+	def _set_content(self, managed: ManagedMessage, content: str | list) -> None:
+		"""Replace a history message's content, spilling it again if it is still bulky"""
+		self._release(managed)
+		managed.message = self._spill(managed.message.model_copy(update={'content': content}), managed.metadata)
+
+	def _release(self, managed: ManagedMessage) -> None:
+		if managed.metadata.blob_id is not None:
+			self.blob_store.delete(managed.metadata.blob_id)
+			managed.metadata.blob_id = None
+
+	def _remove_message(self, index: int = -1) -> None:
+		managed = self.history.remove_message(index)
+		if managed is not None:
+			self._release(managed)
+
+	@staticmethod
+	def _add_cache_markers(messages: List[BaseMessage]) -> List[BaseMessage]:
+		"""
+		Copies of the messages with cache breakpoints after the system prompt and at the end of
+		the history that the next step will send again (the last text message before the state)
+		"""
+		marked = list(messages)
+		candidates = [
+			i
+			for i, m in enumerate(messages[:-1])
+			if isinstance(m, (SystemMessage, HumanMessage)) and isinstance(m.content, str) and m.content
+		]
+		for i in {candidates[0], candidates[-1]} if candidates else ():
+			block = {'type': 'text', 'text': messages[i].content, 'cache_control': {'type': 'ephemeral'}}
+			marked[i] = messages[i].model_copy(update={'content': [block]})
+		return marked
+
 	def _add_message_with_tokens(self, message: BaseMessage) -> None:
 		"""Add message with token count metadata"""
-		token_count = self._count_tokens(message)
+		with profile_span('token_counting'):
+			token_count = self._count_tokens(message)
 		metadata = MessageMetadata(input_tokens=token_count)
+		message = self._spill(message, metadata)
 		self.history.add_message(message, metadata)
 
 	def _count_tokens(self, message: BaseMessage) -> int:
@@ -185,58 +352,203 @@ class MessageManager:
 				elif isinstance(item, dict) and 'text' in item:
 					tokens += self._count_text_tokens(item['text'])
 		else:
-			msg = message.content
-			if hasattr(message, 'tool_calls'):
-				msg += str(message.tool_calls)  # type: ignore
-			tokens += self._count_text_tokens(msg)
+			tokens += self._count_text_tokens(message.content)
+			tool_calls = getattr(message, 'tool_calls', None)
+			if tool_calls:
+				# Counted like the provider sees them: name plus JSON arguments
+				tokens += sum(
+					self._count_text_tokens(call['name'] + json.dumps(call['args'], separators=(',', ':'), default=str))
+					for call in tool_calls
+				)
 		return tokens
 
 	def _count_text_tokens(self, text: str) -> int:
-		"""Count tokens in a text string"""
-		if isinstance(self.llm, (ChatOpenAI)):
-			try:
-				tokens = self.llm.get_num_tokens(text)
-			except Exception:
-				tokens = (
-					len(text) // self.ESTIMATED_TOKENS_PER_CHARACTER
-				)  # Rough estimate if no tokenizer available
-		else:
-			tokens = (
-				len(text) // self.ESTIMATED_TOKENS_PER_CHARACTER
-			)  # Rough estimate if no tokenizer available
-		return tokens
+		"""Count tokens in a text string (locally, memoized by content)"""
+		return self.token_counter.count(text)
+
+	def cut_messages(self) -> None:
+		"""
+		Compact the history so it fits max_input_tokens.
+
+		If max_history_steps is set and exceeded, the older half is folded into a rolling
+		summary in one go, so the cached prompt prefix only changes every few steps.
+		While still over budget: images are dropped from older messages, the oldest model
+		output / tool message pairs are folded into the summary, old action results are pruned,
+		the full element list of diff mode is trimmed, and only then is the current state message
+		trimmed.
+		"""
+		if self.max_history_steps is not None and len(self._step_pairs()) > self.max_history_steps:
+			keep = max(self.keep_recent_steps, self.max_history_steps // 2)
+			while len(self._step_pairs()) > keep and self._summarize_oldest_step():
+				pass
+
+		if self.history.total_tokens <= self.max_input_tokens:
+			return None
 
-	def cut_messages(self):
-		"""Get current message list, potentially trimmed to max tokens"""
-		diff = self.history.total_tokens - self.max_input_tokens
-		if diff <= 0:
+		for index in range(len(self.history.messages) - 1):
+			self._remove_images(index)
+			if self.history.total_tokens <= self.max_input_tokens:
+				return None
+
+		while self.history.total_tokens > self.max_input_tokens and self._summarize_oldest_step():
+			pass
+		while self.history.total_tokens > self.max_input_tokens and self._prune_oldest_result():
+			pass
+		if self.history.total_tokens <= self.max_input_tokens:
 			return None
 
-		msg = self.history.messages[-1]
+		self._trim_dom_reference()
+		if self.history.total_tokens <= self.max_input_tokens:
+			return None
 
-		# if list with image remove image
-		if isinstance(msg.message.content, list):
-			text = ''
-			for item in msg.message.content:
-				if 'image_url' in item:
-					msg.message.content.remove(item)
-					diff -= self.IMG_TOKENS
-					msg.metadata.input_tokens -= self.IMG_TOKENS
-					self.history.total_tokens -= self.IMG_TOKENS
-					logger.debug(
-						f'Removed image with {self.IMG_TOKENS} tokens - total tokens now: {self.history.total_tokens}/{self.max_input_tokens}'
-					)
-				elif 'text' in item and isinstance(item, dict):
-					text += item['text']
-			msg.message.content = text
-			self.history.messages[-1] = msg
+		self._remove_images(len(self.history.messages) - 1)
+		self._trim_last_message()
+
+	def _recent_start(self) -> int:
+		"""Index of the first message of the last keep_recent_steps steps, which are never compacted"""
+		pairs = self._step_pairs()
+		if not self.keep_recent_steps or not pairs:
+			return len(self.history.messages) - 1
+		return pairs[max(0, len(pairs) - self.keep_recent_steps)]
+
+	def _step_pairs(self) -> list[int]:
+		"""Indexes of model outputs in history that are followed by their tool message"""
+		messages = self.history.messages
+		return [
+			i
+			for i in range(_PROTECTED_MESSAGES, len(messages) - 1)
+			if isinstance(messages[i].message, AIMessage)
+			and messages[i].message.tool_calls
+			and isinstance(messages[i + 1].message, ToolMessage)
+		]
+
+	def _summary_index(self) -> Optional[int]:
+		for i, m in enumerate(self.history.messages[:_PROTECTED_MESSAGES + 1]):
+			if isinstance(m.message, HumanMessage) and str(m.message.content).startswith(_SUMMARY_PREFIX):
+				return i
+		return None
+
+	def _summarize_oldest_step(self) -> bool:
+		"""Fold the oldest step outside the recent window, with its action results, into the summary"""
+		pairs = self._step_pairs()
+		if not pairs or pairs[0] >= self._recent_start():
+			return False
+		index = pairs[0]
+		call = self.history.messages[index].message.tool_calls[0]
+		self._remove_message(index + 1)
+		self._remove_message(index)
+		results = []
+		while index < len(self.history.messages) - 1 and self._is_result(self.history.messages[index].message):
+			results.append(self._load(self.history.messages[index]).content)
+			self._remove_message(index)
+		self._add_to_summary(self._summarize_step(call, results))
+		logger.debug(f'Summarized step {call["id"]} - total tokens now: {self.history.total_tokens}/{self.max_input_tokens}')
+		return True
 
+	@staticmethod
+	def _is_result(message: BaseMessage) -> bool:
+		return isinstance(message.content, str) and message.content.startswith(('Action result: ', 'Action error: '))
+
+	@staticmethod
+	def _summarize_step(call: dict, results: list[str]) -> str:
+		args = call.get('args') or {}
+		state = args.get('current_state') or {}
+		actions = ', '.join(name for action in args.get('action') or [] for name in action) or 'none'
+		line = (
+			f'- Step {int(call["id"]) - 1}: {str(state.get("evaluation_previous_goal", ""))[:100]}'
+			f' | goal: {str(state.get("next_goal", ""))[:100]} | actions: {actions}'
+		)
+		for result in results:
+			line += f' | {result[:100]}'
+		return line
+
+	def _add_to_summary(self, line: str) -> None:
+		index = self._summary_index()
+		lines = []
+		if index is not None:
+			lines = str(self._load(self.history.messages[index]).content).splitlines()[1:]
+			self._remove_message(index)
+		omitted = 0
+		if lines and lines[0].startswith('- ... '):
+			omitted = int(lines.pop(0).split()[2])
+		lines.append(line)
+		while len(lines) >= self.max_summary_lines:
+			lines.pop(0)
+			omitted += 1
+		if omitted:
+			lines.insert(0, f'- ... {omitted} earlier steps omitted')
+		message = HumanMessage(content='\n'.join([_SUMMARY_PREFIX] + lines))
+		metadata = MessageMetadata(input_tokens=self._count_tokens(message))
+		self.history.insert_message(_PROTECTED_MESSAGES, self._spill(message, metadata), metadata)
+
+	def _prune_oldest_result(self) -> bool:
+		"""Remove the oldest action result kept in memory outside the recent window"""
+		for i in range(_PROTECTED_MESSAGES, self._recent_start()):
+			message = self.history.messages[i].message
+			if isinstance(message.content, str) and message.content.startswith('Action result: '):
+				self._remove_message(i)
+				return True
+		return False
+
+	def _trim_dom_reference(self) -> None:
+		"""
+		Cut the end of the full element list of diff mode by the tokens over budget (it is what
+		holds the elements in that mode, the state message only refers to it). The differ is reset,
+		so the next state sends a fresh full list instead of changes against a truncated one.
+		"""
+		index = self._dom_reference_index()
+		diff = self.history.total_tokens - self.max_input_tokens
+		if index is None or diff <= 0:
+			return None
+		managed = self.history.messages[index]
+		content = str(self._load(managed).content)
+		header, _, elements = content.partition('\n')
+		marker = '... (rest of the element list omitted to fit the context)'
+		# Whole lines only, so no element is listed with a cut-off description
+		lines = elements.splitlines()
+		budget = managed.metadata.input_tokens - diff
+		keep = int(len(lines) * max(0.0, budget / managed.metadata.input_tokens)) if managed.metadata.input_tokens else 0
+		while True:
+			content = '\n'.join([header] + lines[:keep] + [marker])
+			tokens = self._count_tokens(HumanMessage(content=content))
+			if keep == 0 or tokens <= budget:
+				break
+			keep -= max(1, keep // 20)
+
+		self.history.total_tokens += tokens - managed.metadata.input_tokens
+		managed.metadata.input_tokens = tokens
+		self._set_content(managed, content)
+		if self.dom_differ:
+			self.dom_differ.reset()
+		logger.debug(f'Trimmed the full element list - total tokens now: {self.history.total_tokens}/{self.max_input_tokens}')
+
+	def _remove_images(self, index: int) -> None:
+		msg = self.history.messages[index]
+		content = self._load(msg).content
+		if not isinstance(content, list):
+			return
+		text = ''
+		for item in content:
+			if 'image_url' in item:
+				msg.metadata.input_tokens -= self.IMG_TOKENS
+				self.history.total_tokens -= self.IMG_TOKENS
+				logger.debug(
+					f'Removed image with {self.IMG_TOKENS} tokens - total tokens now: {self.history.total_tokens}/{self.max_input_tokens}'
+				)
+			elif isinstance(item, dict) and 'text' in item:
+				text += item['text']
+		self._set_content(msg, text)
+
+	def _trim_last_message(self) -> None:
+		"""Last resort: remove text from the state message proportionally to the tokens over budget"""
+		diff = self.history.total_tokens - self.max_input_tokens
 		if diff <= 0:
 			return None
+		msg = self.history.messages[-1]
+		if len(self.history.messages) <= _PROTECTED_MESSAGES or not isinstance(msg.message, HumanMessage):
+			raise ValueError('Max token limit reached - history is too long - reduce the system prompt or task.')
 
-		# if still over, remove text from state message proportionally to the number of tokens needed with buffer
-		# Calculate the proportion of content to remove
-		proportion_to_remove = diff / msg.metadata.input_tokens
+		proportion_to_remove = diff / msg.metadata.input_tokens if msg.metadata.input_tokens else 1.0
 		if proportion_to_remove > 0.99:
 			raise ValueError(
 				f'Max token limit reached - history is too long - reduce the system prompt or task. '
@@ -246,12 +558,12 @@ class MessageManager:
 			f'Removing {proportion_to_remove * 100:.2f}% of the last message  {proportion_to_remove * msg.metadata.input_tokens:.2f} / {msg.metadata.input_tokens:.2f} tokens)'
 		)
 
-		content = msg.message.content
+		content = self._load(msg).content
 		characters_to_remove = int(len(content) * proportion_to_remove)
 		content = content[:-characters_to_remove]
 
 		# remove tokens and old long message
-		self.history.remove_message(index=-1)
+		self._remove_message(index=-1)
 
 		# new message with updated content
 		msg = HumanMessage(content=content)
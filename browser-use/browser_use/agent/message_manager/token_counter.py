@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Optional
+
+from langchain_core.language_models import BaseChatModel
+
+logger = logging.getLogger(__name__)
+
+# Approximate token counts of other providers relative to the OpenAI cl100k tokenizer, whose
+# tokenizers are not available locally; adjust here or pass MessageManager a token_counter
+PROVIDER_TOKEN_RATIOS = {
+	'anthropic': 1.15,
+	'google': 0.95,
+	'mistral': 1.1,
+	'deepseek': 1.05,
+}
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: Optional[str]) -> Any:
+	"""tiktoken encoding for a model, loaded once per process; None if tiktoken or its data is unavailable"""
+	try:
+		import tiktoken
+	except ImportError:
+		return None
+	try:
+		try:
+			return tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding('cl100k_base')
+		except KeyError:
+			# Unknown or non-OpenAI model name: newer OpenAI models use o200k, everything else is scaled from cl100k
+			newer = model and model.startswith(('gpt-4o', 'gpt-4.1', 'o1', 'o3', 'o4'))
+			return tiktoken.get_encoding('o200k_base' if newer else 'cl100k_base')
+	except Exception as e:
+		# The encoding files are downloaded on first use; without network fall back to estimates
+		logger.warning(f'Could not load tokenizer for {model or "cl100k_base"}, estimating token counts: {e}')
+		return None
+
+
+class TokenCounter:
+	"""
+	Counts tokens of text without calling the LLM.
+
+	Counts are memoized by content hash, so re-counting a DOM string that is already known is
+	a dictionary lookup. Uses the model's tiktoken encoding when it has one, otherwise cl100k
+	counts scaled by `ratio`, and `len(text) / chars_per_token` without tiktoken (or with
+	use_tiktoken=False).
+	"""
+
+	def __init__(
+		self,
+		model: Optional[str] = None,
+		ratio: float = 1.0,
+		chars_per_token: float = 3.0,
+		use_tiktoken: bool = True,
+		cache_size: int = 2048,
+	):
+		self.model = model
+		self.ratio = ratio
+		self.chars_per_token = chars_per_token
+		self.cache_size = cache_size
+		self._encoding = _get_encoding(model) if use_tiktoken else None
+		self._cache: OrderedDict[bytes, int] = OrderedDict()
+
+	def count(self, text: str) -> int:
+		if not text:
+			return 0
+		# A 128-bit digest, so two different texts never realistically share a count
+		key = hashlib.blake2b(text.encode(), digest_size=16).digest()
+		tokens = self._cache.get(key)
+		if tokens is not None:
+			self._cache.move_to_end(key)
+			return tokens
+
+		tokens = self._count(text)
+		self._cache[key] = tokens
+		if len(self._cache) > self.cache_size:
+			self._cache.popitem(last=False)
+		return tokens
+
+	def _count(self, text: str) -> int:
+		if self._encoding is None:
+			return int(len(text) / self.chars_per_token)
+		return round(len(self._encoding.encode(text, disallowed_special=())) * self.ratio)
+
+
+def llm_provider(llm: BaseChatModel) -> str:
+	"""Provider family of an LLM, guessed from its class"""
+	name = f'{type(llm).__module__}.{type(llm).__name__}'.lower()
+	if 'openai' in name:
+		return 'openai'
+	return next((provider for provider in PROVIDER_TOKEN_RATIOS if provider in name), 'other')
+
+
+def get_token_counter(llm: BaseChatModel, chars_per_token: float = 3.0) -> TokenCounter:
+	"""Token counter matching the LLM's provider"""
+	provider = llm_provider(llm)
+	if provider == 'openai':
+		model = getattr(llm, 'model_name', None)
+		return TokenCounter(model=model if isinstance(model, str) else None, chars_per_token=chars_per_token)
+	if provider in PROVIDER_TOKEN_RATIOS:
+		return TokenCounter(ratio=PROVIDER_TOKEN_RATIOS[provider], chars_per_token=chars_per_token)
+	# Unknown tokenizer: keep the plain character estimate
+	return TokenCounter(chars_per_token=chars_per_token, use_tiktoken=False)
@@ -10,6 +10,7 @@ class MessageMetadata(BaseModel):
 	"""Metadata for a message including token counts"""
 
 	input_tokens: int = 0
+	blob_id: Optional[str] = None  # content stored in the manager's BlobStore; the message holds a stub
 
 
 class ManagedMessage(BaseModel):
@@ -30,8 +31,15 @@ class MessageHistory(BaseModel):
 		self.messages.append(ManagedMessage(message=message, metadata=metadata))
 		self.total_tokens += metadata.input_tokens
 
-	def remove_message(self, index: int = -1) -> None:
+	def insert_message(self, index: int, message: BaseMessage, metadata: MessageMetadata) -> None:
+		"""Insert a message with metadata at index"""
+		self.messages.insert(index, ManagedMessage(message=message, metadata=metadata))
+		self.total_tokens += metadata.input_tokens
+
+	def remove_message(self, index: int = -1) -> Optional[ManagedMessage]:
 		"""Remove last message from history"""
 		if self.messages:
 			msg = self.messages.pop(index)
 			self.total_tokens -= msg.metadata.input_tokens
+			return msg
+		return None
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from browser_use.agent.pool.views import PoolResult, PoolStats, PoolTask, TaskRun
+from browser_use.agent.service import Agent
+from browser_use.agent.views import AgentHistoryList
+from browser_use.browser.browser import Browser, BrowserConfig
+from browser_use.browser.context import BrowserContext
+
+logger = logging.getLogger(__name__)
+
+
+class AgentPool:
+	"""
+	Runs many agent tasks on a small set of shared browsers.
+
+	Each attempt gets its own BrowserContext (isolated cookies and storage) on one of the
+	pool's browsers, picked round-robin. At most `max_concurrency` agents run at once; each
+	is limited to `max_steps` steps and `max_time` seconds, and tasks that don't finish
+	successfully are retried up to `max_retries` times with a fresh context.
+	"""
+
+	def __init__(
+		self,
+		llm: BaseChatModel,
+		browsers: Optional[Sequence[Browser]] = None,
+		num_browsers: int = 1,
+		browser_config: Optional[BrowserConfig] = None,
+		max_concurrency: int = 4,
+		max_steps: int = 100,
+		max_time: Optional[float] = None,
+		max_retries: int = 1,
+		agent_kwargs: Optional[dict[str, Any]] = None,
+	):
+		self.llm = llm
+		self._owns_browsers = not browsers
+		self.browsers = (
+			list(browsers) if browsers else [Browser(config=browser_config or BrowserConfig()) for _ in range(num_browsers)]
+		)
+		self.max_concurrency = max_concurrency
+		self.max_steps = max_steps
+		self.max_time = max_time
+		self.max_retries = max_retries
+		# GIFs are off by default: a batch would otherwise write one file per task into the working directory
+		self.agent_kwargs = {'generate_gif': False, **(agent_kwargs or {})}
+		self._next_browser = 0
+
+	def _pick_browser(self) -> Browser:
+		browser = self.browsers[self._next_browser % len(self.browsers)]
+		self._next_browser += 1
+		return browser
+
+	async def run(self, tasks: Sequence[str | PoolTask]) -> PoolResult:
+		"""Run all tasks and return their histories in input order with aggregate stats"""
+		pool_tasks = [t if isinstance(t, PoolTask) else PoolTask(task=t) for t in tasks]
+		semaphore = asyncio.Semaphore(self.max_concurrency)
+		start = time.perf_counter()
+
+		# Launch browsers up front so concurrent contexts don't race to start the same browser
+		await asyncio.gather(*(browser.get_playwright_browser() for browser in self.browsers))
+
+		async def run_task(pool_task: PoolTask) -> TaskRun:
+			async with semaphore:
+				return await self._run_with_retries(pool_task)
+
+		try:
+			runs = await asyncio.gather(*(run_task(t) for t in pool_tasks))
+		finally:
+			if self._owns_browsers:
+				for browser in self.browsers:
+					await browser.close()
+
+		stats = self._stats(runs, time.perf_counter() - start)
+		logger.info(
+			f'🏁 Pool finished {stats.total} tasks in {stats.wall_time:.1f}s: {stats.succeeded} succeeded, '
+			f'{stats.failed} failed, {stats.retries} retries, {stats.tasks_per_minute:.1f} tasks/min'
+		)
+		return PoolResult(runs=list(runs), stats=stats)
+
+	async def _run_with_retries(self, pool_task: PoolTask) -> TaskRun:
+		task_start = time.perf_counter()
+		total_steps = 0
+		attempt = 0
+		while True:
+			attempt += 1
+			history, timed_out, error = await self._run_once(pool_task)
+			total_steps += len(history.history)
+			success = history.is_done() and not timed_out and error is None
+			if success or attempt > self.max_retries:
+				break
+			logger.info(f'🔁 Retrying task ({attempt}/{self.max_retries}): {pool_task.task}')
+
+		return TaskRun(
+			task=pool_task.task,
+			history=history,
+			success=success,
+			attempts=attempt,
+			steps=total_steps,
+			duration=time.perf_counter() - task_start,
+			timed_out=timed_out,
+			error=error,
+		)
+
+	async def _run_once(self, pool_task: PoolTask) -> tuple[AgentHistoryList, bool, Optional[str]]:
+		browser = self._pick_browser()
+		context = BrowserContext(browser=browser, config=browser.config.new_context_config)
+		agent = Agent(
+			task=pool_task.task,
+			llm=self.llm,
+			browser=browser,
+			browser_context=context,
+			**{**self.agent_kwargs, **pool_task.agent_kwargs},
+		)
+		max_steps = pool_task.max_steps or self.max_steps
+		max_time = pool_task.max_time or self.max_time
+		timed_out = False
+		error = None
+		try:
+			await asyncio.wait_for(agent.run(max_steps=max_steps), timeout=max_time)
+		except asyncio.TimeoutError:
+			timed_out = True
+			agent.stop()
+			logger.warning(f'⏱️ Task exceeded its {max_time}s budget: {pool_task.task}')
+		except Exception as e:
+			error = f'{type(e).__name__}: {e}'
+			logger.error(f'❌ Task crashed: {pool_task.task}: {error}')
+		finally:
+			await context.close()
+		return agent.history, timed_out, error
+
+	@staticmethod
+	def _stats(runs: Sequence[TaskRun], wall_time: float) -> PoolStats:
+		total_steps = sum(r.steps for r in runs)
+		return PoolStats(
+			total=len(runs),
+			succeeded=sum(1 for r in runs if r.success),
+			failed=sum(1 for r in runs if not r.success),
+			retries=sum(r.attempts - 1 for r in runs),
+			timed_out=sum(1 for r in runs if r.timed_out),
+			total_steps=total_steps,
+			wall_time=wall_time,
+			mean_task_time=sum(r.duration for r in runs) / len(runs) if runs else 0.0,
+			tasks_per_minute=len(runs) / wall_time * 60 if wall_time else 0.0,
+			steps_per_second=total_steps / wall_time if wall_time else 0.0,
+		)
+
+
+async def run_many(tasks: Sequence[str | PoolTask], llm: BaseChatModel, **pool_kwargs: Any) -> PoolResult:
+	"""Run tasks on an AgentPool created for this call; see AgentPool for the options"""
+	return await AgentPool(llm=llm, **pool_kwargs).run(tasks)
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from browser_use.agent.views import AgentHistoryList
+
+
+@dataclass
+class PoolTask:
+	"""A task for AgentPool with optional per-task overrides of the pool budgets"""
+
+	task: str
+	max_steps: Optional[int] = None
+	max_time: Optional[float] = None
+	agent_kwargs: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class TaskRun:
+	"""Outcome of one pool task, including its retries"""
+
+	task: str
+	history: AgentHistoryList
+	success: bool
+	attempts: int
+	steps: int
+	duration: float
+	timed_out: bool = False
+	error: Optional[str] = None
+
+
+@dataclass
+class PoolStats:
+	total: int
+	succeeded: int
+	failed: int
+	retries: int
+	timed_out: int
+	total_steps: int
+	wall_time: float
+	mean_task_time: float
+	tasks_per_minute: float
+	steps_per_second: float
+
+
+@dataclass
+class PoolResult:
+	runs: list[TaskRun]
+	stats: PoolStats
+
+	@property
+	def histories(self) -> list[AgentHistoryList]:
+		"""One history per task, in the order the tasks were given"""
+		return [run.history for run in self.runs]
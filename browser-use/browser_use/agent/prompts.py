@@ -8,8 +8,9 @@ from browser_use.browser.views import BrowserState
 
 
 class SystemPrompt:
-	def __init__(self, action_description: str, current_date: datetime, max_actions_per_step: int = 10):
+	def __init__(self, action_description: str, current_date: Optional[datetime] = None, max_actions_per_step: int = 10):
 		self.default_action_description = action_description
+		# Kept for custom prompts; the default prompt leaves the date to the state message so it stays byte-stable
 		self.current_date = current_date
 		self.max_actions_per_step = max_actions_per_step
 
@@ -120,15 +121,11 @@ Notes:
 		Returns:
 		    str: Formatted system prompt
 		"""
-		time_str = self.current_date.strftime('%Y-%m-%d %H:%M')
-
 		AGENT_PROMPT = f"""You are a precise browser automation agent that interacts with websites through structured commands. Your role is to:
 1. Analyze the provided webpage elements and structure
 2. Plan a sequence of actions to accomplish the given task
 3. Respond with valid JSON containing your action sequence and state assessment
 
-Current date and time: {time_str}
-
 {self.input_format()}
 
 {self.important_rules()}
@@ -154,20 +151,30 @@ class AgentMessagePrompt:
 		include_attributes: list[str] = [],
 		max_error_length: int = 400,
 		step_info: Optional[AgentStepInfo] = None,
+		current_date: Optional[datetime] = None,
+		elements_text: Optional[str] = None,
 	):
 		self.state = state
 		self.result = result
 		self.max_error_length = max_error_length
 		self.include_attributes = include_attributes
 		self.step_info = step_info
+		self.current_date = current_date
+		# Replaces the element list of the state, e.g. with a diff against an earlier list
+		self.elements_text = elements_text
 
 	def get_user_message(self) -> HumanMessage:
 		if self.step_info:
 			step_info_description = f'Current step: {self.step_info.step_number + 1}/{self.step_info.max_steps}'
 		else:
 			step_info_description = ''
+		if self.current_date:
+			step_info_description += f'\nCurrent date and time: {self.current_date.strftime("%Y-%m-%d %H:%M")}'
 
-		elements_text = self.state.element_tree.clickable_elements_to_string(include_attributes=self.include_attributes)
+		if self.elements_text is not None:
+			elements_text = self.elements_text
+		else:
+			elements_text = self.state.element_tree.clickable_elements_to_string(include_attributes=self.include_attributes)
 
 		has_content_above = (self.state.pixels_above or 0) > 0
 		has_content_below = (self.state.pixels_below or 0) > 0
@@ -8,9 +8,12 @@ import logging
 import os
 import platform
 import textwrap
+import time
 import uuid
+from contextlib import asynccontextmanager, nullcontext
 from io import BytesIO
 from pathlib import Path
+from types import SimpleNamespace
 from typing import Any, Callable, Dict, List, Optional, Type, TypeVar
 
 from dotenv import load_dotenv
@@ -18,14 +21,23 @@ from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import (
 	BaseMessage,
 	SystemMessage,
+	messages_from_dict,
+	messages_to_dict,
 )
+from langchain_core.runnables import RunnableSequence
+from langchain_core.utils.json import parse_json_markdown
 from lmnr import observe
 from openai import RateLimitError
 from PIL import Image, ImageDraw, ImageFont
 from pydantic import BaseModel, ValidationError
 
+from browser_use.agent.checkpoint.service import capture_browser, load_checkpoint, restore_browser, save_checkpoint
+from browser_use.agent.checkpoint.views import AgentCheckpoint, BrowserSnapshot
+from browser_use.agent.decision_cache.service import DecisionCache
+from browser_use.agent.message_manager.blob_store import BlobStore
 from browser_use.agent.message_manager.service import MessageManager
 from browser_use.agent.prompts import AgentMessagePrompt, SystemPrompt
+from browser_use.agent.streaming import ActionStreamParser
 from browser_use.agent.views import (
 	ActionResult,
 	AgentError,
@@ -33,16 +45,23 @@ from browser_use.agent.views import (
 	AgentHistoryList,
 	AgentOutput,
 	AgentStepInfo,
+	RunBudget,
+	RunUsage,
+	ValidationResult,
 )
 from browser_use.browser.browser import Browser
 from browser_use.browser.context import BrowserContext
 from browser_use.browser.views import BrowserState, BrowserStateHistory
 from browser_use.controller.registry.views import ActionModel
 from browser_use.controller.service import Controller
+from browser_use.dom.diff.service import DOMDiffer
 from browser_use.dom.history_tree_processor.service import (
 	DOMHistoryElement,
 	HistoryTreeProcessor,
 )
+from browser_use.dom.ranking.service import ElementRanker
+from browser_use.profiler.service import Profiler
+from browser_use.scheduler.service import LLMScheduler
 from browser_use.telemetry.service import ProductTelemetry
 from browser_use.telemetry.views import (
 	AgentEndTelemetryEvent,
@@ -56,6 +75,8 @@ logger = logging.getLogger(__name__)
 
 T = TypeVar('T', bound=BaseModel)
 
+_BUDGET_ATTRIBUTES = ('type', 'name', 'role', 'aria-label', 'placeholder')
+
 
 class Agent:
 	def __init__(
@@ -94,6 +115,18 @@ class Agent:
 		register_new_step_callback: Callable[['BrowserState', 'AgentOutput', int], None] | None = None,
 		register_done_callback: Callable[['AgentHistoryList'], None] | None = None,
 		tool_calling_method: Optional[str] = 'auto',
+		pipeline_steps: bool = False,
+		stream_actions: bool = False,
+		decision_cache: Optional[DecisionCache] = None,
+		profile_steps: bool = False,
+		checkpoint_path: Optional[str | Path] = None,
+		use_llm_scheduler: bool = False,
+		llm_priority: int = 0,
+		max_history_steps: Optional[int] = None,
+		dom_diff: bool = False,
+		dom_refresh_steps: int = 10,
+		max_element_tokens: Optional[int] = None,
+		message_blob_dir: Optional[str | Path] = None,
 	):
 		self.agent_id = str(uuid.uuid4())  # unique identifier for the agent
 
@@ -151,6 +184,13 @@ class Agent:
 			include_attributes=self.include_attributes,
 			max_error_length=self.max_error_length,
 			max_actions_per_step=self.max_actions_per_step,
+			max_history_steps=max_history_steps,
+			# Only send element changes since the last full list, with a full list every dom_refresh_steps steps
+			dom_differ=DOMDiffer(refresh_every=dom_refresh_steps) if dom_diff else None,
+			# On huge pages keep only the elements most relevant to the task within this many tokens
+			element_ranker=ElementRanker(max_element_tokens) if max_element_tokens else None,
+			# Screenshots and long texts in the history are kept on disk instead of in memory
+			blob_store=BlobStore(Path(message_blob_dir) / self.agent_id) if message_blob_dir else None,
 		)
 
 		# Step callback
@@ -164,6 +204,7 @@ class Agent:
 		self.max_failures = max_failures
 		self.retry_delay = retry_delay
 		self.validate_output = validate_output
+		self._validator_llm = None
 		self.initial_actions = self._convert_initial_actions(initial_actions) if initial_actions else None
 		if save_conversation_path:
 			logger.info(f'Saving conversation to {save_conversation_path}')
@@ -171,6 +212,34 @@ class Agent:
 		self._paused = False
 		self._stopped = False
 
+		# Resources used so far, checked against the budget passed to run()
+		self.usage = RunUsage()
+		self.budget_stop_reason: Optional[str] = None
+		# use_vision and include_attributes from before a budget switched to cheaper steps
+		self._settings_before_budget: Optional[tuple[bool, list[str]]] = None
+
+		# Pipelined steps: the next state is extracted while the previous step is booked
+		self.pipeline_steps = pipeline_steps
+		self._prefetched_state: Optional[asyncio.Task[BrowserState]] = None
+
+		# Streaming mode: actions are dispatched while the rest of the response is still generated
+		self.stream_actions = stream_actions
+		self.streaming_stats: list[dict[str, Any]] = []
+
+		# Opt-in replay of earlier decisions for the same page, task and step context
+		self.decision_cache = decision_cache
+
+		# Written after every step so a run can continue with resume(checkpoint) after a restart
+		self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+		self._pending_browser_restore: Optional[BrowserSnapshot] = None
+
+		# Opt-in per-step timing spans, stored on each AgentHistory item and summarized at the end of run()
+		self.profiler = Profiler(enabled=profile_steps)
+
+		# Opt-in: LLM calls of all agents in the process share rate-limit buckets per model and API key
+		self.llm_scheduler = LLMScheduler() if use_llm_scheduler else None
+		self.llm_priority = llm_priority
+
 	def _set_version_and_source(self) -> None:
 		try:
 			import pkg_resources
@@ -205,6 +274,12 @@ class Agent:
 		self.ActionModel = self.controller.registry.create_action_model()
 		# Create output model with the dynamic actions
 		self.AgentOutput = AgentOutput.type_with_custom_actions(self.ActionModel)
+		self._action_set_key = self.controller.registry.action_set_key()
+		# Structured-output wrappers are built lazily and reused until the action set changes
+		self._structured_llm = None
+		self._structured_llm_method = None
+		self._streaming_llm = None
+		self._streaming_llm_method = None
 
 	def set_tool_calling_method(self, tool_calling_method: Optional[str]) -> Optional[str]:
 		if tool_calling_method == 'auto':
@@ -220,58 +295,162 @@ class Agent:
 	@time_execution_async('--step')
 	async def step(self, step_info: Optional[AgentStepInfo] = None) -> None:
 		"""Execute one step of the task"""
+		history_len = len(self.history.history)
+		with self.profiler.activate(), self.profiler.span('step', step=self.n_steps):
+			await self._step(step_info)
+		spans = self.profiler.collect()
+		if len(self.history.history) > history_len:
+			self.history.history[-1].spans = spans
+		if self.checkpoint_path:
+			await self._save_checkpoint()
+
+	async def _step(self, step_info: Optional[AgentStepInfo] = None) -> None:
 		logger.info(f'\n📍 Step {self.n_steps}')
 		state = None
 		model_output = None
 		result: list[ActionResult] = []
+		act_task: Optional[asyncio.Task[list[ActionResult]]] = None
+		cache_key = None
+		cache_hit = False
 
 		try:
-			state = await self.browser_context.get_state(use_vision=self.use_vision)
-			self.message_manager.add_state_message(state, self._last_result, step_info)
-			input_messages = self.message_manager.get_messages()
+			with self.profiler.span('get_state', 'browser'):
+				state = await self._get_step_state()
+			with self.profiler.span('prompt_build'):
+				self.message_manager.add_state_message(state, self._last_result, step_info)
+				try:
+					self.message_manager.cut_messages()
+				except ValueError:
+					self.message_manager._remove_last_state_message()
+					raise
+				input_messages = self.message_manager.get_messages()
 
 			try:
-				model_output = await self.get_next_action(input_messages)
+				if self.decision_cache:
+					cache_key, url_pattern = self.decision_cache.make_key(
+						state, self.task, self._previous_step_actions(), self.include_attributes
+					)
+					model_output = self.decision_cache.get(cache_key, self.AgentOutput)
+					cache_hit = model_output is not None
+
+				if cache_hit:
+					logger.info('♻️ Reusing cached decision for this page')
+					self._log_response(model_output)
+					self.n_steps += 1
+				elif self.stream_actions:
+					# Actions are already running; the bookkeeping below overlaps with them
+					with self.profiler.span('llm_call', 'llm', streaming=True):
+						model_output, act_task = await self._get_next_action_streaming(input_messages)
+				else:
+					with self.profiler.span('llm_call', 'llm'):
+						model_output = await self.get_next_action(input_messages)
 
-				if self.register_new_step_callback:
-					self.register_new_step_callback(state, model_output, self.n_steps)
+				with self.profiler.span('step_callbacks'):
+					if self.register_new_step_callback:
+						self.register_new_step_callback(state, model_output, self.n_steps)
 
-				self._save_conversation(input_messages, model_output)
-				self.message_manager._remove_last_state_message()  # we dont want the whole state in the chat history
-				self.message_manager.add_model_output(model_output)
+					self._save_conversation(input_messages, model_output)
+					self.message_manager._remove_last_state_message()  # we dont want the whole state in the chat history
+					self.message_manager.add_model_output(model_output)
 			except Exception as e:
 				# model call failed, remove last state message from history
 				self.message_manager._remove_last_state_message()
+				if act_task is not None:
+					act_task.cancel()
+					await asyncio.gather(act_task, return_exceptions=True)
 				raise e
 
-			result: list[ActionResult] = await self.controller.multi_act(model_output.action, self.browser_context)
+			with self.profiler.span('actions', 'action'):
+				if act_task is not None:
+					result = await act_task
+				else:
+					result = await self.controller.multi_act(model_output.action, self.browser_context)
 			self._last_result = result
 
+			if cache_key:
+				if any(r.error for r in result):
+					# A decision that no longer works on this page must not be replayed again
+					self.decision_cache.invalidate(cache_key)
+				elif not cache_hit:
+					self.decision_cache.put(cache_key, url_pattern, model_output)
+
 			if len(result) > 0 and result[-1].is_done:
 				logger.info(f'📄 Result: {result[-1].extracted_content}')
+			elif self.pipeline_steps:
+				await self._start_state_prefetch()
 
 			self.consecutive_failures = 0
 
 		except Exception as e:
+			if cache_hit:
+				self.decision_cache.invalidate(cache_key)
 			result = await self._handle_step_error(e)
 			self._last_result = result
 
 		finally:
-			actions = [a.model_dump(exclude_unset=True) for a in model_output.action] if model_output else []
-			self.telemetry.capture(
-				AgentStepTelemetryEvent(
-					agent_id=self.agent_id,
-					step=self.n_steps,
-					actions=actions,
-					consecutive_failures=self.consecutive_failures,
-					step_error=[r.error for r in result if r.error] if result else ['No result'],
+			with self.profiler.span('post_step'):
+				actions = [a.model_dump(exclude_unset=True) for a in model_output.action] if model_output else []
+				self.telemetry.capture(
+					AgentStepTelemetryEvent(
+						agent_id=self.agent_id,
+						step=self.n_steps,
+						actions=actions,
+						consecutive_failures=self.consecutive_failures,
+						step_error=[r.error for r in result if r.error] if result else ['No result'],
+					)
 				)
-			)
-			if not result:
-				return
+				if result and state:
+					self._make_history_item(model_output, state, result)
 
-			if state:
-				self._make_history_item(model_output, state, result)
+	def _previous_step_actions(self) -> list[dict[str, Any]]:
+		"""Actions of the last recorded step, used as step context in the decision cache key"""
+		if not self.history.history or not self.history.history[-1].model_output:
+			return []
+		return [a.model_dump(exclude_unset=True) for a in self.history.history[-1].model_output.action]
+
+	async def _start_state_prefetch(self) -> None:
+		"""
+		Start extracting the next step's browser state in the background (pipeline_steps mode).
+
+		The history item, telemetry and the run loop's bookkeeping for the current step then
+		overlap with the network settle and DOM extraction of the next one. Ordering guarantees:
+		- the prefetch starts only after every action of the current step has finished, so the
+			next step never sees a state from before those actions
+		- the current step's history item, telemetry event and callbacks are all recorded before
+			the next step's LLM call, which waits for the prefetched state
+		- no prefetch is started after a done action or a failed step, and a pending prefetch is
+			discarded when the agent pauses, stops, validates its output or closes the browser
+		- if the prefetch fails, the next step extracts the state again the regular way
+		"""
+		await self._discard_state_prefetch()
+		self._prefetched_state = asyncio.create_task(self.browser_context.get_state(use_vision=self.use_vision))
+		# Let the task send its first browser commands before the synchronous bookkeeping runs
+		await asyncio.sleep(0)
+
+	async def _discard_state_prefetch(self) -> None:
+		"""Cancel a pending state prefetch, e.g. because the page may change before it is used"""
+		task, self._prefetched_state = self._prefetched_state, None
+		if task is None:
+			return
+		if not task.done():
+			task.cancel()
+		try:
+			await task
+		except BaseException:
+			pass
+
+	async def _get_step_state(self) -> BrowserState:
+		"""Return the prefetched state if one is pending, otherwise extract it now"""
+		task, self._prefetched_state = self._prefetched_state, None
+		if task is not None:
+			start = time.perf_counter()
+			try:
+				state = await task
+				logger.debug(f'Waited {time.perf_counter() - start:.2f}s for prefetched state')
+				return state
+			except Exception as e:
+				logger.debug(f'State prefetch failed, extracting again: {e}')
+		return await self.browser_context.get_state(use_vision=self.use_vision)
 
 	async def _handle_step_error(self, error: Exception) -> list[ActionResult]:
 		"""Handle all types of errors that can occur during a step"""
@@ -282,10 +461,9 @@ class Agent:
 		if isinstance(error, (ValidationError, ValueError)):
 			logger.error(f'{prefix}{error_msg}')
 			if 'Max token limit reached' in error_msg:
-				# cut tokens from history
+				# the next step compacts the history to the lowered limit
 				self.message_manager.max_input_tokens = self.max_input_tokens - 500
 				logger.info(f'Cutting tokens from history - new max input tokens: {self.message_manager.max_input_tokens}')
-				self.message_manager.cut_messages()
 			elif 'Could not parse response' in error_msg:
 				# give model a hint how output should look like
 				error_msg += '\n\nReturn a valid JSON object with the required fields.'
@@ -293,7 +471,9 @@ class Agent:
 			self.consecutive_failures += 1
 		elif isinstance(error, RateLimitError):
 			logger.warning(f'{prefix}{error_msg}')
-			await asyncio.sleep(self.retry_delay)
+			if self.llm_scheduler is None:
+				await asyncio.sleep(self.retry_delay)
+			# else the scheduler has paused this model's bucket and holds the next call until it resets
 			self.consecutive_failures += 1
 		else:
 			logger.error(f'{prefix}{error_msg}')
@@ -313,8 +493,10 @@ class Agent:
 
 		if model_output:
 			interacted_elements = AgentHistory.get_interacted_element(model_output, state.selector_map)
+			interacted_fields = AgentHistory.get_interacted_fields(model_output, state.selector_map)
 		else:
 			interacted_elements = [None]
+			interacted_fields = []
 
 		state_history = BrowserStateHistory(
 			url=state.url,
@@ -322,6 +504,7 @@ class Agent:
 			tabs=state.tabs,
 			interacted_element=interacted_elements,
 			screenshot=state.screenshot,
+			interacted_fields=interacted_fields,
 		)
 
 		history_item = AgentHistory(model_output=model_output, result=result, state=state_history)
@@ -331,12 +514,11 @@ class Agent:
 	@time_execution_async('--get_next_action')
 	async def get_next_action(self, input_messages: list[BaseMessage]) -> AgentOutput:
 		"""Get next action from LLM based on current state"""
-		if self.tool_calling_method is None:
-			structured_llm = self.llm.with_structured_output(self.AgentOutput, include_raw=True)
-		else:
-			structured_llm = self.llm.with_structured_output(self.AgentOutput, include_raw=True, method=self.tool_calling_method)
+		structured_llm = self._get_structured_llm()
 
-		response: dict[str, Any] = await structured_llm.ainvoke(input_messages)  # type: ignore
+		async with self._llm_slot() as slot:
+			response: dict[str, Any] = await structured_llm.ainvoke(input_messages)  # type: ignore
+			slot.record(response.get('raw'))
 
 		parsed: AgentOutput | None = response['parsed']
 		if parsed is None:
@@ -349,6 +531,206 @@ class Agent:
 
 		return parsed
 
+	@asynccontextmanager
+	async def _llm_slot(self):
+		"""Context for one LLM call (a scheduler slot unless the scheduler is disabled); record() books the response"""
+		estimated_tokens = getattr(self.message_manager.history, 'total_tokens', 0)
+		estimated_tokens = estimated_tokens if isinstance(estimated_tokens, int) else 0
+		slot = (
+			self.llm_scheduler.slot(
+				self.llm, agent_id=self.agent_id, priority=self.llm_priority, estimated_tokens=estimated_tokens
+			)
+			if self.llm_scheduler
+			else nullcontext()
+		)
+		async with slot as ticket:
+
+			def record(message: Any) -> None:
+				self._record_usage(message, estimated_tokens)
+				if ticket is not None:
+					ticket.record(message)
+
+			yield SimpleNamespace(record=record)
+
+	def _record_usage(self, message: Any, estimated_input_tokens: int) -> None:
+		"""Add a response's token usage to self.usage, estimating input tokens if the provider reported none"""
+		self.usage.llm_calls += 1
+		usage = getattr(message, 'usage_metadata', None)
+		if not isinstance(usage, dict):
+			metadata = getattr(message, 'response_metadata', None)
+			token_usage = metadata.get('token_usage') if isinstance(metadata, dict) else None
+			usage = (
+				{'input_tokens': token_usage.get('prompt_tokens', 0), 'output_tokens': token_usage.get('completion_tokens', 0)}
+				if isinstance(token_usage, dict)
+				else None
+			)
+		if usage:
+			self.usage.input_tokens += usage.get('input_tokens') or 0
+			self.usage.output_tokens += usage.get('output_tokens') or 0
+		else:
+			self.usage.input_tokens += estimated_input_tokens
+		cached = self._cached_tokens(message, usage)
+		if cached:
+			self.usage.cached_input_tokens += cached
+			logger.debug(f'Prompt cache hit: {cached}/{usage.get("input_tokens") if usage else "?"} input tokens')
+
+	@staticmethod
+	def _cached_tokens(message: Any, usage: Optional[dict]) -> int:
+		"""Input tokens served from the provider's prompt cache, from whichever field the integration fills"""
+		details = usage.get('input_token_details') if usage else None
+		if isinstance(details, dict) and details.get('cache_read'):
+			return details['cache_read']
+		metadata = getattr(message, 'response_metadata', None)
+		if not isinstance(metadata, dict):
+			return 0
+		# Anthropic
+		provider_usage = metadata.get('usage')
+		if isinstance(provider_usage, dict) and provider_usage.get('cache_read_input_tokens'):
+			return provider_usage['cache_read_input_tokens']
+		# OpenAI
+		token_usage = metadata.get('token_usage')
+		prompt_details = token_usage.get('prompt_tokens_details') if isinstance(token_usage, dict) else None
+		if isinstance(prompt_details, dict):
+			return prompt_details.get('cached_tokens') or 0
+		return 0
+
+	def _refresh_action_models(self) -> None:
+		"""Rebuild the action models (and drop the cached LLM wrappers) if the registry's action set changed"""
+		if self.controller.registry.action_set_key() != self._action_set_key:
+			logger.debug('Action registry changed, rebuilding action models')
+			self._setup_action_models()
+
+	def _get_structured_llm(self):
+		"""Return the cached structured-output wrapper, rebuilding it if the registry's action set changed"""
+		self._refresh_action_models()
+		if self._structured_llm is None or self._structured_llm_method != self.tool_calling_method:
+			self._structured_llm_method = self.tool_calling_method
+			if self.tool_calling_method is None:
+				self._structured_llm = self.llm.with_structured_output(self.AgentOutput, include_raw=True)
+			else:
+				self._structured_llm = self.llm.with_structured_output(
+					self.AgentOutput, include_raw=True, method=self.tool_calling_method
+				)
+		return self._structured_llm
+
+	def _get_streaming_llm(self):
+		"""Return the cached runnable that streams the raw AgentOutput JSON (tool-call arguments or content)"""
+		self._refresh_action_models()
+		if self._streaming_llm is None or self._streaming_llm_method != self.tool_calling_method:
+			self._streaming_llm_method = self.tool_calling_method
+			# The model bound to the same tools / response format as get_next_action, without the output parser
+			if self.tool_calling_method is None:
+				structured = self.llm.with_structured_output(self.AgentOutput)
+			else:
+				structured = self.llm.with_structured_output(self.AgentOutput, method=self.tool_calling_method)
+			self._streaming_llm = structured.first if isinstance(structured, RunnableSequence) else self.llm
+		return self._streaming_llm
+
+	async def _get_next_action_streaming(
+		self, input_messages: list[BaseMessage]
+	) -> tuple[AgentOutput, asyncio.Task[list[ActionResult]]]:
+		"""
+		Stream the next action from the LLM and start executing each action as soon as it is parsed.
+
+		Returns the complete model output and the task running Controller.multi_act, which keeps
+		its new-element guard and early-exit rules. Time to first action is logged and recorded in
+		streaming_stats.
+		"""
+		queue: asyncio.Queue[ActionModel | None] = asyncio.Queue()
+		start = time.perf_counter()
+		first_action_after: list[float] = []
+
+		async def parsed_actions():
+			while (action := await queue.get()) is not None:
+				if not first_action_after:
+					first_action_after.append(time.perf_counter() - start)
+				yield action
+
+		act_task = asyncio.create_task(self.controller.multi_act(parsed_actions(), self.browser_context))
+		try:
+			parsed, dispatched = await self._stream_model_output(input_messages, queue)
+		except BaseException:
+			act_task.cancel()
+			await asyncio.gather(act_task, return_exceptions=True)
+			raise
+		response_time = time.perf_counter() - start
+
+		if dispatched == 0 and parsed.action:
+			# Nothing could be parsed early (e.g. an unexpected layout); run the complete output instead
+			await act_task
+			act_task = asyncio.create_task(self.controller.multi_act(parsed.action, self.browser_context))
+
+		if first_action_after:
+			self.streaming_stats.append(
+				{
+					'step': self.n_steps,
+					'actions': len(parsed.action),
+					'time_to_first_action': first_action_after[0],
+					'response_time': response_time,
+				}
+			)
+			if len(parsed.action) > 1:
+				logger.info(
+					f'⚡ First action dispatched after {first_action_after[0]:.2f}s, full response after {response_time:.2f}s'
+				)
+
+		parsed.action = parsed.action[: self.max_actions_per_step]
+		self._log_response(parsed)
+		self.n_steps += 1
+		return parsed, act_task
+
+	async def _stream_model_output(
+		self, input_messages: list[BaseMessage], queue: asyncio.Queue[ActionModel | None]
+	) -> tuple[AgentOutput, int]:
+		"""
+		Put each action on the queue as it completes in the stream; return the parsed output and the number dispatched.
+
+		If an action is invalid, the ones before it have already been dispatched and nothing after it is; the
+		output is then the dispatched actions, so the step records what actually ran.
+		"""
+		parser = ActionStreamParser()
+		full = None
+		dispatched: list[ActionModel] = []
+		dispatching = True
+		try:
+			async with self._llm_slot() as slot:
+				async for chunk in self._get_streaming_llm().astream(input_messages):
+					full = chunk if full is None else full + chunk
+					if getattr(chunk, 'tool_call_chunks', None):
+						delta = ''.join(c.get('args') or '' for c in chunk.tool_call_chunks)
+					else:
+						delta = chunk.content if isinstance(chunk.content, str) else ''
+					for item in parser.feed(delta):
+						if not dispatching or len(dispatched) >= self.max_actions_per_step:
+							break
+						try:
+							action = self.ActionModel(**item)
+						except ValidationError:
+							# Keep the order: nothing after an invalid action is dispatched early
+							dispatching = False
+							break
+						queue.put_nowait(action)
+						dispatched.append(action)
+				slot.record(full)
+		finally:
+			queue.put_nowait(None)
+
+		data = None
+		try:
+			data = full.tool_calls[0]['args'] if getattr(full, 'tool_calls', None) else parse_json_markdown(full.content)
+			parsed = self.AgentOutput(**data)
+		except Exception as e:
+			if not dispatched or not isinstance(data, dict):
+				raise ValueError('Could not parse response.') from e
+			try:
+				parsed = self.AgentOutput(current_state=data.get('current_state'), action=dispatched)
+			except ValidationError:
+				raise ValueError('Could not parse response.') from e
+			logger.warning(f'Action {len(dispatched) + 1} of the response is invalid, keeping the {len(dispatched)} before it')
+		if not dispatching:
+			parsed.action = dispatched
+		return parsed, len(dispatched)
+
 	def _log_response(self, response: AgentOutput) -> None:
 		"""Log the model's response"""
 		if 'Success' in response.current_state.evaluation_previous_goal:
@@ -432,13 +814,26 @@ class Agent:
 		)
 
 	@observe(name='agent.run')
-	async def run(self, max_steps: int = 100) -> AgentHistoryList:
-		"""Execute the task with maximum number of steps"""
+	async def run(self, max_steps: int = 100, budget: Optional[RunBudget] = None) -> AgentHistoryList:
+		"""
+		Execute the task with maximum number of steps.
+
+		With a budget, the run also stops cleanly once its time, token or cost limit is used up
+		(budget_stop_reason says which) and returns the history so far. Past budget.degrade_at of
+		any limit, the remaining steps run without vision and with a smaller DOM description.
+		"""
+		run_start = time.monotonic()
+		elapsed_before = self.usage.elapsed
+		self._restore_budget_settings()
 		try:
 			self._log_agent_run()
 
-			# Execute initial actions if provided
-			if self.initial_actions:
+			if self._pending_browser_restore is not None:
+				# Resumed from a checkpoint: the initial actions already ran before it was written
+				await restore_browser(self.browser_context, self._pending_browser_restore)
+				self._pending_browser_restore = None
+			elif self.initial_actions:
+				# Execute initial actions if provided
 				result = await self.controller.multi_act(self.initial_actions, self.browser_context, check_for_new_elements=False)
 				self._last_result = result
 
@@ -450,9 +845,24 @@ class Agent:
 				if not await self._handle_control_flags():
 					break
 
-				await self.step()
+				if budget:
+					self.usage.elapsed = elapsed_before + time.monotonic() - run_start
+					if not self._check_budget(budget):
+						break
+					remaining_time = budget.max_time - self.usage.elapsed if budget.max_time else None
+					try:
+						await asyncio.wait_for(self.step(), timeout=remaining_time)
+					except asyncio.TimeoutError:
+						self.budget_stop_reason = 'time'
+						logger.warning('💸 Time budget used up during a step, stopping')
+						break
+					finally:
+						self.usage.elapsed = elapsed_before + time.monotonic() - run_start
+				else:
+					await self.step()
 
 				if self.history.is_done():
+					await self._discard_state_prefetch()
 					if self.validate_output and step < max_steps - 1:
 						if not await self._validate_output():
 							continue
@@ -471,6 +881,9 @@ class Agent:
 
 			return self.history
 		finally:
+			await self._discard_state_prefetch()
+			if self.profiler.enabled and self.history.history:
+				logger.info(self.history.profile_summary())
 			self.telemetry.capture(
 				AgentEndTelemetryEvent(
 					agent_id=self.agent_id,
@@ -494,6 +907,34 @@ class Agent:
 
 				self.create_history_gif(output_path=output_path)
 
+	def _check_budget(self, budget: RunBudget) -> bool:
+		"""Return False if a budget is used up; switch to cheaper steps once one is nearly used up"""
+		exhausted = budget.exhausted(self.usage)
+		if exhausted:
+			self.budget_stop_reason = exhausted
+			logger.warning(f'💸 {exhausted.capitalize()} budget used up, stopping with a partial history')
+			return False
+		if self._settings_before_budget is None and budget.used_share(self.usage) >= budget.degrade_at:
+			self._settings_before_budget = (self.use_vision, self.include_attributes)
+			self.use_vision = False
+			# Only the attributes needed to tell inputs and buttons apart stay in the element list
+			self._set_include_attributes([a for a in self.include_attributes if a in _BUDGET_ATTRIBUTES])
+			logger.warning(
+				f'💸 {budget.used_share(self.usage):.0%} of the budget used, continuing without vision and with less DOM context'
+			)
+		return True
+
+	def _restore_budget_settings(self) -> None:
+		"""Undo the cheaper steps of a previous run's budget"""
+		if self._settings_before_budget is not None:
+			self.use_vision, include_attributes = self._settings_before_budget
+			self._set_include_attributes(include_attributes)
+			self._settings_before_budget = None
+
+	def _set_include_attributes(self, include_attributes: list[str]) -> None:
+		self.include_attributes = include_attributes
+		self.message_manager.include_attributes = include_attributes
+
 	def _too_many_failures(self) -> bool:
 		"""Check if we should stop due to too many failures"""
 		if self.consecutive_failures >= self.max_failures:
@@ -505,8 +946,12 @@ class Agent:
 		"""Handle pause and stop flags. Returns True if execution should continue."""
 		if self._stopped:
 			logger.info('Agent stopped')
+			await self._discard_state_prefetch()
 			return False
 
+		if self._paused:
+			# The page may change while paused (e.g. by a human), so don't reuse a prefetched state
+			await self._discard_state_prefetch()
 		while self._paused:
 			await asyncio.sleep(0.2)  # Small delay to prevent CPU spinning
 			if self._stopped:  # Allow stopping while paused
@@ -540,12 +985,11 @@ class Agent:
 			# if no browser session, we can't validate the output
 			return True
 
-		class ValidationResult(BaseModel):
-			is_valid: bool
-			reason: str
-
-		validator = self.llm.with_structured_output(ValidationResult, include_raw=True)
-		response: dict[str, Any] = await validator.ainvoke(msg)  # type: ignore
+		if self._validator_llm is None:
+			self._validator_llm = self.llm.with_structured_output(ValidationResult, include_raw=True)
+		async with self._llm_slot() as slot:
+			response: dict[str, Any] = await self._validator_llm.ainvoke(msg)  # type: ignore
+			slot.record(response.get('raw'))
 		parsed: ValidationResult = response['parsed']
 		is_valid = parsed.is_valid
 		if not is_valid:
@@ -618,12 +1062,22 @@ class Agent:
 		if not state or not history_item.model_output:
 			raise ValueError('Invalid state or model output')
 		updated_actions = []
+		interacted_fields = history_item.state.interacted_fields
 		for i, action in enumerate(history_item.model_output.action):
-			updated_action = await self._update_action_indices(
-				history_item.state.interacted_element[i],
-				action,
-				state,
-			)
+			field_elements = interacted_fields[i] if i < len(interacted_fields) else None
+			if field_elements:
+				# Form actions: every field is looked up and remapped on its own
+				updated_action = action
+				for position, field_element in enumerate(field_elements):
+					updated_action = await self._update_action_indices(field_element, updated_action, state, position)
+					if updated_action is None:
+						break
+			else:
+				updated_action = await self._update_action_indices(
+					history_item.state.interacted_element[i],
+					action,
+					state,
+				)
 			updated_actions.append(updated_action)
 
 			if updated_action is None:
@@ -639,9 +1093,11 @@ class Agent:
 		historical_element: Optional[DOMHistoryElement],
 		action: ActionModel,  # Type this properly based on your action model
 		current_state: BrowserState,
+		position: int = 0,
 	) -> Optional[ActionModel]:
 		"""
 		Update action indices based on current page state.
+		`position` selects the field of a form action the element belongs to.
 		Returns updated action or None if element cannot be found.
 		"""
 		if not historical_element or not current_state.element_tree:
@@ -652,9 +1108,9 @@ class Agent:
 		if not current_element or current_element.highlight_index is None:
 			return None
 
-		old_index = action.get_index()
-		if old_index != current_element.highlight_index:
-			action.set_index(current_element.highlight_index)
+		indexes = action.get_indexes()
+		old_index = indexes[position] if position < len(indexes) else None
+		if action.set_index(current_element.highlight_index, position):
 			logger.info(f'Element moved in DOM, updated index from {old_index} to {current_element.highlight_index}')
 
 		return action
@@ -1085,11 +1541,65 @@ class Agent:
 		logger.info('🔄 Agent pausing before next step')
 		self._paused = True
 
-	def resume(self) -> None:
-		"""Resume the agent"""
+	def resume(self, checkpoint: Optional[AgentCheckpoint | str | Path] = None) -> None:
+		"""
+		Resume the agent.
+
+		With a checkpoint (or the path of one), first restore the messages, history, step
+		counter and failure count it holds; the next run() reopens its tabs with its cookies
+		and continues from the following step instead of starting over.
+		"""
+		if checkpoint is not None:
+			if not isinstance(checkpoint, AgentCheckpoint):
+				checkpoint = load_checkpoint(checkpoint)
+			self._restore_checkpoint(checkpoint)
 		logger.info('▶️ Agent resuming')
 		self._paused = False
 
+	async def _save_checkpoint(self) -> None:
+		try:
+			browser = await capture_browser(self.browser_context)
+		except Exception as e:
+			logger.debug(f'Checkpoint without browser state: {e}')
+			browser = BrowserSnapshot()
+		history = self.history.model_dump()
+		for item in history['history']:
+			# Screenshots would make every checkpoint grow with the run; they are only needed for the GIF
+			item['state']['screenshot'] = None
+		checkpoint = AgentCheckpoint(
+			agent_id=self.agent_id,
+			task=self.task,
+			n_steps=self.n_steps,
+			consecutive_failures=self.consecutive_failures,
+			messages=messages_to_dict(self.message_manager.history_messages()),
+			message_tokens=[m.metadata.input_tokens for m in self.message_manager.history.messages],
+			history=history,
+			last_result=self._last_result,
+			usage=self.usage,
+			browser=browser,
+		)
+		try:
+			save_checkpoint(checkpoint, self.checkpoint_path)
+		except OSError as e:
+			logger.warning(f'Could not write checkpoint {self.checkpoint_path}: {e}')
+
+	def _restore_checkpoint(self, checkpoint: AgentCheckpoint) -> None:
+		if checkpoint.task != self.task:
+			logger.warning('Checkpoint was written for a different task')
+		self.agent_id = checkpoint.agent_id
+		self.n_steps = checkpoint.n_steps
+		self.consecutive_failures = checkpoint.consecutive_failures
+		self._last_result = checkpoint.last_result
+		self.usage = checkpoint.usage.model_copy()
+		self.history = AgentHistoryList.load_from_dict(checkpoint.history, self.AgentOutput)
+
+		self.message_manager.restore_history(messages_from_dict(checkpoint.messages), checkpoint.message_tokens)
+
+		self._pending_browser_restore = checkpoint.browser
+		logger.info(
+			f'📂 Restored checkpoint: continuing at step {self.n_steps} with {len(self.history.history)} steps of history'
+		)
+
 	def stop(self) -> None:
 		"""Stop the agent"""
 		logger.info('⏹️ Agent stopping')
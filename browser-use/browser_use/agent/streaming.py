@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+
+class ActionStreamParser:
+	"""
+	Incrementally scans a streamed AgentOutput JSON document and returns each item of its
+	top-level "action" array as soon as the item's closing brace arrives.
+
+	Works on raw text deltas, so it handles both tool-call argument chunks and plain JSON
+	content (text before the first "{", e.g. a ```json fence, is ignored).
+	"""
+
+	def __init__(self):
+		self.text = ''
+		self._pos = 0
+		self._depth = 0
+		self._in_string = False
+		self._escape = False
+		self._string_start = -1
+		self._last_key: str | None = None
+		self._array_depth: int | None = None  # depth inside the "action" array, once it is open
+		self._item_start = -1
+		self._done = False
+
+	def feed(self, delta: str) -> list[dict[str, Any]]:
+		"""Add a chunk of text and return the action items completed by it"""
+		self.text += delta
+		items = []
+		text = self.text
+		for i in range(self._pos, len(text)):
+			ch = text[i]
+			if self._in_string:
+				if self._escape:
+					self._escape = False
+				elif ch == '\\':
+					self._escape = True
+				elif ch == '"':
+					self._in_string = False
+					if self._depth == 1:
+						self._last_key = text[self._string_start + 1 : i]
+				continue
+
+			if self._depth == 0 and ch != '{':
+				continue
+			if ch == '"':
+				self._in_string = True
+				self._string_start = i
+			elif ch in '{[':
+				if ch == '[' and self._depth == 1 and self._last_key == 'action' and self._array_depth is None:
+					self._array_depth = self._depth + 1
+				self._depth += 1
+				if ch == '{' and self._array_depth is not None and self._depth == self._array_depth + 1:
+					self._item_start = i
+			elif ch in '}]':
+				self._depth -= 1
+				if self._array_depth is None or self._done:
+					continue
+				if ch == '}' and self._depth == self._array_depth and self._item_start >= 0:
+					items.append(json.loads(text[self._item_start : i + 1]))
+					self._item_start = -1
+				elif ch == ']' and self._depth == self._array_depth - 1:
+					self._done = True
+		self._pos = len(text)
+		return items
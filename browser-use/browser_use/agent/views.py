@@ -3,11 +3,12 @@ from __future__ import annotations
 import json
 import traceback
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional, Type
+from typing import Any, Dict, Literal, Optional, Type
 
 from openai import RateLimitError
-from pydantic import BaseModel, ConfigDict, Field, ValidationError, create_model
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, create_model, model_validator
 
 from browser_use.browser.views import BrowserStateHistory
 from browser_use.controller.registry.views import ActionModel
@@ -17,6 +18,8 @@ from browser_use.dom.history_tree_processor.service import (
 	HistoryTreeProcessor,
 )
 from browser_use.dom.views import SelectorMap
+from browser_use.profiler.service import summarize_spans, to_chrome_trace, to_otel
+from browser_use.profiler.views import ProfileSpan
 
 
 @dataclass
@@ -55,8 +58,9 @@ class AgentOutput(BaseModel):
 	action: list[ActionModel]
 
 	@staticmethod
+	@lru_cache(maxsize=None)
 	def type_with_custom_actions(custom_actions: Type[ActionModel]) -> Type['AgentOutput']:
-		"""Extend actions with custom actions"""
+		"""Extend actions with custom actions (one model per action model, so its schema is only built once)"""
 		return create_model(
 			'AgentOutput',
 			__base__=AgentOutput,
@@ -65,12 +69,69 @@ class AgentOutput(BaseModel):
 		)
 
 
+class RunBudget(BaseModel):
+	"""Limits for one Agent.run; None means unlimited. Token costs are per million tokens."""
+
+	max_time: Optional[float] = None  # seconds
+	max_input_tokens: Optional[int] = None
+	max_output_tokens: Optional[int] = None
+	max_cost: Optional[float] = None
+	input_token_cost: float = 0.0
+	output_token_cost: float = 0.0
+	degrade_at: float = 0.8  # share of any budget after which vision and DOM context are reduced
+
+	@model_validator(mode='after')
+	def _check_cost_rates(self) -> 'RunBudget':
+		if self.max_cost is not None and not (self.input_token_cost or self.output_token_cost):
+			raise ValueError('max_cost needs input_token_cost and/or output_token_cost to estimate spending')
+		return self
+
+	def limits(self, usage: 'RunUsage') -> dict[str, tuple[float, float]]:
+		"""(used, limit) for every budget that is set"""
+		limits = {
+			'time': (usage.elapsed, self.max_time),
+			'input tokens': (usage.input_tokens, self.max_input_tokens),
+			'output tokens': (usage.output_tokens, self.max_output_tokens),
+			'cost': (self.cost(usage), self.max_cost),
+		}
+		return {name: (used, limit) for name, (used, limit) in limits.items() if limit is not None}
+
+	def cost(self, usage: 'RunUsage') -> float:
+		return (usage.input_tokens * self.input_token_cost + usage.output_tokens * self.output_token_cost) / 1_000_000
+
+	def used_share(self, usage: 'RunUsage') -> float:
+		"""Largest used share over all budgets (1.0 = a budget is exhausted)"""
+		return max((used / limit if limit else 1.0 for used, limit in self.limits(usage).values()), default=0.0)
+
+	def exhausted(self, usage: 'RunUsage') -> Optional[str]:
+		"""Name of the first exhausted budget, if any"""
+		return next((name for name, (used, limit) in self.limits(usage).items() if used >= limit), None)
+
+
+class RunUsage(BaseModel):
+	"""Resources used by an agent's runs, from provider usage metadata where available"""
+
+	input_tokens: int = 0
+	cached_input_tokens: int = 0  # part of input_tokens read from the provider's prompt cache
+	output_tokens: int = 0
+	llm_calls: int = 0
+	elapsed: float = 0.0  # seconds
+
+
+class ValidationResult(BaseModel):
+	"""Verdict of the output validator"""
+
+	is_valid: bool
+	reason: str
+
+
 class AgentHistory(BaseModel):
 	"""History item for agent actions"""
 
 	model_output: AgentOutput | None
 	result: list[ActionResult]
 	state: BrowserStateHistory
+	spans: list[ProfileSpan] = Field(default_factory=list)
 
 	model_config = ConfigDict(arbitrary_types_allowed=True, protected_namespaces=())
 
@@ -88,6 +149,25 @@ class AgentHistory(BaseModel):
 				elements.append(None)
 		return elements
 
+	@staticmethod
+	def get_interacted_fields(
+		model_output: AgentOutput, selector_map: SelectorMap
+	) -> list[Optional[list[DOMHistoryElement | None]]]:
+		"""Per action, the elements of the fields of a form action; None for other actions"""
+		fields = []
+		for action in model_output.action:
+			indexes = action.get_field_indexes()
+			if indexes is None:
+				fields.append(None)
+				continue
+			fields.append(
+				[
+					HistoryTreeProcessor.convert_dom_element_to_history_element(selector_map[i]) if i in selector_map else None
+					for i in indexes
+				]
+			)
+		return fields
+
 	def model_dump(self, **kwargs) -> Dict[str, Any]:
 		"""Custom serialization handling circular references"""
 
@@ -102,11 +182,14 @@ class AgentHistory(BaseModel):
 				'action': action_dump,  # This preserves the actual action data
 			}
 
-		return {
+		dump = {
 			'model_output': model_output_dump,
 			'result': [r.model_dump(exclude_none=True) for r in self.result],
 			'state': self.state.to_dict(),
 		}
+		if self.spans:
+			dump['spans'] = [s.model_dump() for s in self.spans]
+		return dump
 
 
 class AgentHistoryList(BaseModel):
@@ -145,6 +228,11 @@ class AgentHistoryList(BaseModel):
 		"""Load history from JSON file"""
 		with open(filepath, 'r', encoding='utf-8') as f:
 			data = json.load(f)
+		return cls.load_from_dict(data, output_model)
+
+	@classmethod
+	def load_from_dict(cls, data: dict[str, Any], output_model: Type[AgentOutput]) -> 'AgentHistoryList':
+		"""Build history from the output of model_dump()"""
 		# loop through history and validate output_model actions to enrich with custom actions
 		for h in data['history']:
 			if h['model_output']:
@@ -157,6 +245,21 @@ class AgentHistoryList(BaseModel):
 		history = cls.model_validate(data)
 		return history
 
+	def spans(self) -> list[ProfileSpan]:
+		"""All profile spans of the run"""
+		return [s for h in self.history for s in h.spans]
+
+	def profile_summary(self) -> str:
+		"""Where the step time went, per span name"""
+		return summarize_spans(self.spans())
+
+	def export_trace(self, filepath: str | Path, format: Literal['chrome', 'otel'] = 'chrome') -> None:
+		"""Write the profile spans as a Chrome trace (chrome://tracing, Perfetto) or OTLP/JSON file"""
+		data = to_chrome_trace(self.spans()) if format == 'chrome' else to_otel(self.spans())
+		Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+		with open(filepath, 'w', encoding='utf-8') as f:
+			json.dump(data, f)
+
 	def last_action(self) -> None | dict:
 		"""Last action in history"""
 		if self.history and self.history[-1].model_output:
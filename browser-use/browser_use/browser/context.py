@@ -26,13 +26,115 @@ from playwright.async_api import (
 from browser_use.browser.views import BrowserError, BrowserState, TabInfo, URLNotAllowedError
 from browser_use.dom.service import DomService
 from browser_use.dom.views import DOMElementNode, SelectorMap
-from browser_use.utils import time_execution_sync
+from browser_use.profiler.service import profile_span
+from browser_use.utils import time_execution_async
 
 if TYPE_CHECKING:
     from browser_use.browser.browser import Browser
 
 logger = logging.getLogger(__name__)
 
+# Valid CSS class names; others are left out of generated selectors
+VALID_CLASS_NAME_PATTERN = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_-]*$')
+
+# Expanded set of safe attributes that are stable and useful for selection
+SAFE_ATTRIBUTES = frozenset(
+    {
+        # Standard HTML attributes
+        'id',
+        'name',
+        'type',
+        'value',
+        'placeholder',
+        # Accessibility attributes
+        'aria-label',
+        'aria-labelledby',
+        'aria-describedby',
+        'role',
+        # Common form attributes
+        'for',
+        'autocomplete',
+        'required',
+        'readonly',
+        # Media attributes
+        'alt',
+        'title',
+        'src',
+        # Data attributes (if they're stable in your application)
+        'data-testid',
+        'data-id',
+        'data-qa',
+        'data-cy',
+        # Custom stable attributes (add any application-specific ones)
+        'href',
+        'target',
+    }
+)
+
+# Lazily installs a MutationObserver counting changes that can make new elements interactive;
+# returns "<observer id>:<count>" so a reload or navigation (new window) also changes the result
+DOM_CHANGE_SIGNATURE_JS = """
+() => {
+    if (!window.__buDomChanges) {
+        const state = { id: Math.random().toString(36).slice(2), count: 0 };
+        const isOverlay = (node) => {
+            const element = node.nodeType === Node.ELEMENT_NODE ? node : node.parentElement;
+            return !!(element && element.closest && element.closest('#playwright-highlight-container'));
+        };
+        new MutationObserver((mutations) => {
+            for (const mutation of mutations) {
+                if (isOverlay(mutation.target)) continue;
+                if (mutation.type === 'attributes') {
+                    state.count++;
+                    continue;
+                }
+                for (const node of mutation.addedNodes) {
+                    if (node.nodeType === Node.ELEMENT_NODE && !isOverlay(node)) state.count++;
+                }
+            }
+        }).observe(document, {
+            childList: true,
+            subtree: true,
+            attributes: true,
+            attributeFilter: ['style', 'hidden', 'open', 'aria-hidden', 'aria-expanded'],
+        });
+        window.__buDomChanges = state;
+    }
+    return window.__buDomChanges.id + ':' + window.__buDomChanges.count;
+}
+"""
+
+# Sets the values of form fields the way a user edit would be seen by page scripts: through the
+# native value setter (which frameworks like React track), between focus and blur, firing input
+# and change; returns an error message or null per element
+FILL_ELEMENTS_JS = """
+(_, [elements, values]) => elements.map((el, i) => {
+    try {
+        const value = values[i];
+        if (el.disabled || el.readOnly) return 'element is disabled or read-only';
+        el.focus();
+        if (el instanceof HTMLSelectElement) {
+            const option = Array.from(el.options).find((o) => o.value === value || o.text.trim() === value);
+            if (!option) return `no option "${value}"`;
+            el.value = option.value;
+        } else if (el instanceof HTMLInputElement || el instanceof HTMLTextAreaElement) {
+            const prototype = el instanceof HTMLInputElement ? HTMLInputElement.prototype : HTMLTextAreaElement.prototype;
+            Object.getOwnPropertyDescriptor(prototype, 'value').set.call(el, value);
+        } else if (el.isContentEditable) {
+            el.textContent = value;
+        } else {
+            return `<${el.tagName.toLowerCase()}> is not a form field`;
+        }
+        el.dispatchEvent(new Event('input', { bubbles: true }));
+        el.dispatchEvent(new Event('change', { bubbles: true }));
+        el.blur();
+        return null;
+    } catch (e) {
+        return String(e);
+    }
+})
+"""
+
 
 class BrowserContextWindowSize(TypedDict):
     width: int
@@ -93,6 +195,11 @@ class BrowserContextConfig:
         allowed_domains: None
             List of allowed domains that can be accessed. If None, all domains are allowed.
             Example: ['example.com', 'api.example.com']
+
+        stamp_element_ids: False
+            Stamp a data-bu-idx attribute on each highlighted element during extraction, so actions can
+            find it with one attribute lookup instead of a generated CSS selector. This adds an attribute
+            to the page's elements.
     """
 
     cookies_file: str | None = None
@@ -116,6 +223,7 @@ class BrowserContextConfig:
     highlight_elements: bool = True
     viewport_expansion: int = 500
     allowed_domains: list[str] | None = None
+    stamp_element_ids: bool = False
 
 
 @dataclass
@@ -500,7 +608,8 @@ class BrowserContext:
 
         # Wait for page load
         try:
-            await self._wait_for_stable_network()
+            with profile_span('network_wait', 'browser'):
+                await self._wait_for_stable_network()
 
             # Check if the loaded URL is allowed
             page = await self.get_current_page()
@@ -519,7 +628,8 @@ class BrowserContext:
 
         # Sleep remaining time if needed
         if remaining > 0:
-            await asyncio.sleep(remaining)
+            with profile_span('minimum_wait', 'browser'):
+                await asyncio.sleep(remaining)
 
     def _is_url_allowed(self, url: str) -> bool:
         """Check if a URL is allowed based on the whitelist configuration."""
@@ -609,7 +719,7 @@ class BrowserContext:
         page = await self.get_current_page()
         return await page.evaluate(script)
 
-    @time_execution_sync('--get_state')  # This decorator might need to be updated to handle async
+    @time_execution_async('--get_state')
     async def get_state(self, use_vision: bool = False) -> BrowserState:
         """Get the current state of the browser"""
         await self._wait_for_page_and_frames_load()
@@ -645,15 +755,18 @@ class BrowserContext:
         try:
             await self.remove_highlights()
             dom_service = DomService(page)
-            content = await dom_service.get_clickable_elements(
-                focus_element=focus_element,
-                viewport_expansion=self.config.viewport_expansion,
-                highlight_elements=self.config.highlight_elements,
-            )
+            with profile_span('dom_extraction', 'browser'):
+                content = await dom_service.get_clickable_elements(
+                    focus_element=focus_element,
+                    viewport_expansion=self.config.viewport_expansion,
+                    highlight_elements=self.config.highlight_elements,
+                    stamp_element_ids=self.config.stamp_element_ids,
+                )
 
             screenshot_b64 = None
             if use_vision:
-                screenshot_b64 = await self.take_screenshot()
+                with profile_span('screenshot', 'browser'):
+                    screenshot_b64 = await self.take_screenshot()
             pixels_above, pixels_below = await self.get_scroll_info(page)
 
             self.current_state = BrowserState(
@@ -725,10 +838,34 @@ class BrowserContext:
             # Don't raise the error since this is not critical functionality
             pass
 
+    async def get_dom_change_signature(self) -> tuple[str, ...] | None:
+        """
+        Cheap marker of structural DOM changes on the current page, one entry per frame.
+
+        Installs a MutationObserver on first use that counts added elements and visibility
+        attribute changes (ignoring the highlight overlay). The signature changes when the page
+        navigates or one of those counters moves, so equal signatures mean no new elements can
+        have appeared in between. Returns None if it could not be read.
+        """
+        try:
+            page = await self.get_current_page()
+            signatures = []
+            for frame in page.frames:
+                try:
+                    signatures.append(await frame.evaluate(DOM_CHANGE_SIGNATURE_JS))
+                except Exception:
+                    # Detached or cross-origin frame that is not ready yet
+                    signatures.append(f'{frame.url}:unavailable')
+            return tuple(signatures)
+        except Exception as e:
+            logger.debug(f'Failed to read DOM change signature: {str(e)}')
+            return None
+
     # endregion
 
     # region - User Actions
-    def _convert_simple_xpath_to_css_selector(self, xpath: str) -> str:
+    @classmethod
+    def _convert_simple_xpath_to_css_selector(cls, xpath: str) -> str:
         """Converts simple XPath expressions to CSS selectors."""
         if not xpath:
             return ''
@@ -775,7 +912,8 @@ class BrowserContext:
         base_selector = ' > '.join(css_parts)
         return base_selector
 
-    def _enhanced_css_selector_for_element(self, element: DOMElementNode) -> str:
+    @classmethod
+    def _enhanced_css_selector_for_element(cls, element: DOMElementNode) -> str:
         """
         Creates a CSS selector for a DOM element, handling various edge cases and special characters.
 
@@ -787,13 +925,10 @@ class BrowserContext:
         """
         try:
             # Get base selector from XPath
-            css_selector = self._convert_simple_xpath_to_css_selector(element.xpath)
+            css_selector = cls._convert_simple_xpath_to_css_selector(element.xpath)
 
             # Handle class attributes
             if 'class' in element.attributes and element.attributes['class']:
-                # Define a regex pattern for valid class names in CSS
-                valid_class_name_pattern = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_-]*$')
-
                 # Iterate through the class attribute values
                 classes = element.attributes['class'].split()
                 for class_name in classes:
@@ -802,45 +937,13 @@ class BrowserContext:
                         continue
 
                     # Check if the class name is valid
-                    if valid_class_name_pattern.match(class_name):
+                    if VALID_CLASS_NAME_PATTERN.match(class_name):
                         # Append the valid class name to the CSS selector
                         css_selector += f'.{class_name}'
                     else:
                         # Skip invalid class names
                         continue
 
-            # Expanded set of safe attributes that are stable and useful for selection
-            SAFE_ATTRIBUTES = {
-                # Standard HTML attributes
-                'id',
-                'name',
-                'type',
-                'value',
-                'placeholder',
-                # Accessibility attributes
-                'aria-label',
-                'aria-labelledby',
-                'aria-describedby',
-                'role',
-                # Common form attributes
-                'for',
-                'autocomplete',
-                'required',
-                'readonly',
-                # Media attributes
-                'alt',
-                'title',
-                'src',
-                # Data attributes (if they're stable in your application)
-                'data-testid',
-                'data-id',
-                'data-qa',
-                'data-cy',
-                # Custom stable attributes (add any application-specific ones)
-                'href',
-                'target',
-            }
-
             # Handle other attributes
             for attribute, value in element.attributes.items():
                 if attribute == 'class':
@@ -879,34 +982,29 @@ class BrowserContext:
     async def get_locate_element(self, element: DOMElementNode) -> ElementHandle | None:
         current_frame = await self.get_current_page()
 
-        # Start with the target element and collect all parents
-        parents: list[DOMElementNode] = []
-        current = element
-        while current.parent is not None:
-            parent = current.parent
-            parents.append(parent)
-            current = parent
-
-        # Reverse the parents list to process from top to bottom
-        parents.reverse()
-
-        # Process all iframe parents in sequence
-        iframes = [item for item in parents if item.tag_name == 'iframe']
-        for parent in iframes:
-            css_selector = self._enhanced_css_selector_for_element(parent)
-            current_frame = current_frame.frame_locator(css_selector)
+        # Process all iframe parents in sequence; selectors are memoized on the nodes
+        for parent in element.iframe_parents:
+            current_frame = current_frame.frame_locator(parent.css_selector)
 
-        css_selector = self._enhanced_css_selector_for_element(element)
+        # A stamped element is found by its attribute, with the generated selector as fallback
+        # for pages that dropped or re-rendered it
+        selectors = [f'[data-bu-idx="{element.stamp_id}"]'] if element.stamp_id else []
+        selectors.append(element.css_selector)
 
         try:
-            if isinstance(current_frame, FrameLocator):
-                return await current_frame.locator(css_selector).element_handle()
-            else:
-                # Try to scroll into view if hidden
-                element_handle = await current_frame.query_selector(css_selector)
-                if element_handle:
-                    await element_handle.scroll_into_view_if_needed()
-                    return element_handle
+            for css_selector in selectors:
+                if isinstance(current_frame, FrameLocator):
+                    locator = current_frame.locator(css_selector)
+                    # element_handle() waits for a match, so only the last selector may miss
+                    if css_selector is not selectors[-1] and not await locator.count():
+                        continue
+                    return await locator.element_handle()
+                else:
+                    # Try to scroll into view if hidden
+                    element_handle = await current_frame.query_selector(css_selector)
+                    if element_handle:
+                        await element_handle.scroll_into_view_if_needed()
+                        return element_handle
         except Exception as e:
             logger.error(f'Failed to locate element: {str(e)}')
             return None
@@ -931,6 +1029,53 @@ class BrowserContext:
         except Exception as e:
             raise Exception(f'Failed to input text into element: {repr(element_node)}. Error: {str(e)}')
 
+    async def _fill_element_nodes(self, fields: list[tuple[DOMElementNode, str]], mode: str = 'fill') -> list[str | None]:
+        """
+        Fill several form fields in one go; returns an error message (or None) per field.
+
+        All elements are located up front, concurrently. In 'fill' mode each frame's fields are set in a single
+        evaluate with input/change events, in 'type' mode the keystrokes are sent field after
+        field. Unlike _input_text_element_node there is no highlight refresh per field, and the
+        page load is awaited once at the end.
+        """
+        errors: list[str | None] = [None] * len(fields)
+        located: list[tuple[int, ElementHandle]] = []
+        # The lookups are independent, so their round trips overlap
+        elements = await asyncio.gather(*(self.get_locate_element(element_node) for element_node, _ in fields))
+        for i, element in enumerate(elements):
+            if element is None:
+                errors[i] = f'Element: {repr(fields[i][0])} not found'
+            else:
+                located.append((i, element))
+
+        if mode == 'type':
+            for i, element in located:
+                try:
+                    await element.fill('')
+                    await element.type(fields[i][1])
+                except Exception as e:
+                    errors[i] = f'Failed to input text into element: {repr(fields[i][0])}. Error: {str(e)}'
+        else:
+            # Handles can only be passed to an evaluate in their own frame
+            by_frame: dict[tuple[str, ...], list[tuple[int, ElementHandle]]] = {}
+            for i, element in located:
+                frame_path = tuple(iframe.xpath for iframe in fields[i][0].iframe_parents)
+                by_frame.setdefault(frame_path, []).append((i, element))
+            for group in by_frame.values():
+                try:
+                    group_errors = await group[0][1].evaluate(
+                        FILL_ELEMENTS_JS, [[element for _, element in group], [fields[i][1] for i, _ in group]]
+                    )
+                except Exception as e:
+                    group_errors = [f'Failed to fill element: {str(e)}'] * len(group)
+                for (i, _), error in zip(group, group_errors):
+                    if error:
+                        errors[i] = f'Failed to input text into element: {repr(fields[i][0])}. Error: {error}'
+
+        page = await self.get_current_page()
+        await page.wait_for_load_state()
+        return errors
+
     async def _click_element_node(self, element_node: DOMElementNode):
         page = await self.get_current_page()
 
@@ -34,12 +34,17 @@ class BrowserStateHistory:
 	tabs: list[TabInfo]
 	interacted_element: list[DOMHistoryElement | None] | list[None]
 	screenshot: Optional[str] = None
+	# Per action, the element of each field of a form action (e.g. fill_form), None for other actions
+	interacted_fields: list[Optional[list[DOMHistoryElement | None]]] = field(default_factory=list)
 
 	def to_dict(self) -> dict[str, Any]:
 		data = {}
 		data['tabs'] = [tab.model_dump() for tab in self.tabs]
 		data['screenshot'] = self.screenshot
 		data['interacted_element'] = [el.to_dict() if el else None for el in self.interacted_element]
+		data['interacted_fields'] = [
+			[el.to_dict() if el else None for el in fields] if fields is not None else None for fields in self.interacted_fields
+		]
 		data['url'] = self.url
 		data['title'] = self.title
 		return data
@@ -16,6 +16,17 @@ from browser_use.telemetry.views import (
 	RegisteredFunction,
 )
 
+# Action models are shared by every registry with the same action set, so their JSON schema is built once per process
+_action_model_cache: dict[tuple, Type[ActionModel]] = {}
+_param_model_cache: dict[tuple, Type[BaseModel]] = {}
+
+
+def _takes_param_model(function: Callable) -> bool:
+	"""Whether the function's first parameter is annotated with a pydantic model"""
+	parameters = list(signature(function).parameters.values())
+	annotation = parameters[0].annotation if parameters else None
+	return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
 
 class Registry:
 	"""Service for registering and managing actions"""
@@ -26,19 +37,25 @@ class Registry:
 		self.exclude_actions = exclude_actions
 
 	def _create_param_model(self, function: Callable) -> Type[BaseModel]:
-		"""Creates a Pydantic model from function signature"""
+		"""Creates a Pydantic model from function signature, shared by registries that register the same function"""
 		sig = signature(function)
+		# Reusing the class keeps cached action models valid for param instances built by any controller
+		key = (function.__module__, function.__qualname__, str(sig))
+		if key in _param_model_cache:
+			return _param_model_cache[key]
 		params = {
 			name: (param.annotation, ... if param.default == param.empty else param.default)
 			for name, param in sig.parameters.items()
 			if name != 'browser'
 		}
 		# TODO: make the types here work
-		return create_model(
+		param_model = create_model(
 			f'{function.__name__}_parameters',
 			__base__=ActionModel,
 			**params,  # type: ignore
 		)
+		_param_model_cache[key] = param_model
+		return param_model
 
 	def action(
 		self,
@@ -76,46 +93,60 @@ class Registry:
 				function=wrapped_func,
 				param_model=actual_param_model,
 				requires_browser=requires_browser,
+				takes_param_model=_takes_param_model(func),
 			)
 			self.registry.actions[func.__name__] = action
 			return func
 
 		return decorator
 
-	async def execute_action(self, action_name: str, params: dict, browser: Optional[BrowserContext] = None) -> Any:
-		"""Execute a registered action"""
-		if action_name not in self.registry.actions:
+	async def execute_action(self, action_name: str, params: dict | BaseModel, browser: Optional[BrowserContext] = None) -> Any:
+		"""Execute a registered action; params already validated as the action's param model are used as they are"""
+		action = self.registry.actions.get(action_name)
+		if action is None:
 			raise ValueError(f'Action {action_name} not found')
 
-		action = self.registry.actions[action_name]
 		try:
-			# Create the validated Pydantic model
-			validated_params = action.param_model(**params)
+			if type(params) is action.param_model:
+				validated_params = params
+			else:
+				validated_params = action.param_model.model_validate(params if isinstance(params, dict) else params.model_dump())
 
-			# Check if the first parameter is a Pydantic model
-			sig = signature(action.function)
-			parameters = list(sig.parameters.values())
-			is_pydantic = parameters and issubclass(parameters[0].annotation, BaseModel)
+			takes_param_model = getattr(action, 'takes_param_model', None)
+			if not isinstance(takes_param_model, bool):
+				# Added to registry.actions without Registry.action: inspect once and remember
+				takes_param_model = action.takes_param_model = _takes_param_model(action.function)
 
-			# Prepare arguments based on parameter type
 			if action.requires_browser:
 				if not browser:
 					raise ValueError(
 						f'Action {action_name} requires browser but none provided. This has to be used in combination of `requires_browser=True` when registering the action.'
 					)
-				if is_pydantic:
+				if takes_param_model:
 					return await action.function(validated_params, browser=browser)
 				return await action.function(**validated_params.model_dump(), browser=browser)
 
-			if is_pydantic:
+			if takes_param_model:
 				return await action.function(validated_params)
 			return await action.function(**validated_params.model_dump())
 
 		except Exception as e:
 			raise RuntimeError(f'Error executing action {action_name}: {str(e)}') from e
 
+	def action_set_key(self) -> tuple:
+		"""Hashable identity of the registered actions; changes whenever an action is added, replaced or removed"""
+		return tuple(
+			# The param model class itself: an action model only accepts instances of the classes it was built with
+			(name, action.description, action.param_model)
+			for name, action in self.registry.actions.items()
+		)
+
 	def create_action_model(self) -> Type[ActionModel]:
-		"""Creates a Pydantic model from registered actions"""
+		"""Creates a Pydantic model from registered actions, reusing the cached model for a known action set"""
+		key = self.action_set_key()
+		if key in _action_model_cache:
+			return _action_model_cache[key]
+
 		fields = {
 			name: (
 				Optional[action.param_model],
@@ -133,7 +164,9 @@ class Registry:
 			)
 		)
 
-		return create_model('ActionModel', __base__=ActionModel, **fields)  # type:ignore
+		action_model = create_model('ActionModel', __base__=ActionModel, **fields)  # type:ignore
+		_action_model_cache[key] = action_model
+		return action_model
 
 	def get_prompt_description(self) -> str:
 		"""Get a description of all actions for the prompt"""
@@ -1,4 +1,4 @@
-from typing import Callable, Dict, Type
+from typing import Callable, Dict, Optional, Type
 
 from pydantic import BaseModel, ConfigDict
 
@@ -11,6 +11,9 @@ class RegisteredAction(BaseModel):
 	function: Callable
 	param_model: Type[BaseModel]
 	requires_browser: bool = False
+	# Whether the function takes the param model instance (True) or its fields as kwargs (False).
+	# Set by Registry.action; None for actions built elsewhere, resolved on their first call
+	takes_param_model: Optional[bool] = None
 
 	model_config = ConfigDict(arbitrary_types_allowed=True)
 
@@ -41,16 +44,29 @@ class ActionModel(BaseModel):
 	def get_index(self) -> int | None:
 		"""Get the index of the action"""
 		# {'clicked_element': {'index':5}}
-		params = self.model_dump(exclude_unset=True).values()
-		if not params:
-			return None
-		for param in params:
+		indexes = self.get_indexes()
+		return indexes[0] if indexes else None
+
+	def get_indexes(self) -> list[int]:
+		"""Get all element indexes the action acts on"""
+		field_indexes = self.get_field_indexes()
+		if field_indexes is not None:
+			return field_indexes
+		for param in self.model_dump(exclude_unset=True).values():
 			if param is not None and 'index' in param:
-				return param['index']
+				return [param['index']]
+		return []
+
+	def get_field_indexes(self) -> list[int] | None:
+		"""Get the indexes of the fields of a form action; None for other actions"""
+		# {'fill_form': {'fields': [{'index': 5, 'value': 'x'}, ...]}}
+		for param in self.model_dump(exclude_unset=True).values():
+			if param is not None and isinstance(param.get('fields'), list):
+				return [field['index'] for field in param['fields']]
 		return None
 
-	def set_index(self, index: int):
-		"""Overwrite the index of the action"""
+	def set_index(self, index: int, position: int = 0) -> bool:
+		"""Overwrite the index of the action (of its `position`-th field for form actions); returns whether it changed"""
 		# Get the action name and params
 		action_data = self.model_dump(exclude_unset=True)
 		action_name = next(iter(action_data.keys()))
@@ -58,7 +74,15 @@ class ActionModel(BaseModel):
 
 		# Update the index directly on the model
 		if hasattr(action_params, 'index'):
-			action_params.index = index
+			target = action_params
+		elif getattr(action_params, 'fields', None) and position < len(action_params.fields):
+			target = action_params.fields[position]
+		else:
+			return False
+		if target.index == index:
+			return False
+		target.index = index
+		return True
 
 
 class ActionRegistry(BaseModel):
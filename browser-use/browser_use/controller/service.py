@@ -3,6 +3,7 @@ import json
 import logging
 from datetime import datetime
 from pathlib import Path
+from typing import AsyncIterable, AsyncIterator
 
 from main_content_extractor import MainContentExtractor
 from playwright.async_api import Page
@@ -14,6 +15,7 @@ from browser_use.controller.views import (
     ClickElementAction,
     DoneAction,
     ExtractPageContentAction,
+    FillFormAction,
     GoToUrlAction,
     InputTextAction,
     OpenTabAction,
@@ -22,10 +24,21 @@ from browser_use.controller.views import (
     SendKeysAction,
     SwitchTabAction,
 )
-from browser_use.utils import time_execution_async, time_execution_sync
+from browser_use.profiler.service import profile_span
+from browser_use.utils import time_execution_async
 
 logger = logging.getLogger(__name__)
 
+
+async def _as_async_iter(actions: list[ActionModel] | AsyncIterable[ActionModel]) -> AsyncIterator[ActionModel]:
+    if isinstance(actions, AsyncIterable):
+        async for action in actions:
+            yield action
+    else:
+        for action in actions:
+            yield action
+
+
 class Controller:
     def __init__(
         self,
@@ -173,38 +186,90 @@ class Controller:
                     await self._log_action_to_file("input", html_id, False, error_msg)
                 return ActionResult(error=error_msg, html_id=html_id)
 
+        @self.registry.action(
+            'Fill several input fields at once, with (index, value) pairs - prefer over repeated input_text on forms',
+            param_model=FillFormAction,
+            requires_browser=True,
+        )
+        async def fill_form(params: FillFormAction, browser: BrowserContext):
+            session = await browser.get_session()
+            state = session.cached_state
+
+            missing = [field.index for field in params.fields if field.index not in state.selector_map]
+            if missing:
+                raise Exception(f'Element indexes {missing} do not exist - retry or use alternative actions')
+
+            element_nodes = [state.selector_map[field.index] for field in params.fields]
+            errors = await browser._fill_element_nodes(
+                [(node, field.value) for node, field in zip(element_nodes, params.fields)], mode=params.mode
+            )
+
+            lines = []
+            for field, node, error in zip(params.fields, element_nodes, errors):
+                html_id = node.attributes.get('id', None)
+                if error:
+                    lines.append(f'❌ Index {field.index}: {error}')
+                else:
+                    lines.append(f'⌨️  Input "{field.value}" into index {field.index}')
+                if html_id:
+                    await self._log_action_to_file('input', html_id, error is None, error)
+            msg = '\n'.join(lines)
+            logger.info(msg)
+            if errors and all(errors):
+                return ActionResult(error=msg)
+            return ActionResult(extracted_content=msg, include_in_memory=True)
+
         # [Rest of the action implementations...]
 
     @time_execution_async('--multi-act')
-    async def multi_act(self, actions: list[ActionModel], browser_context: BrowserContext, check_for_new_elements: bool = True) -> list[ActionResult]:
-        """Execute multiple actions"""
+    async def multi_act(
+        self,
+        actions: list[ActionModel] | AsyncIterable[ActionModel],
+        browser_context: BrowserContext,
+        check_for_new_elements: bool = True,
+    ) -> list[ActionResult]:
+        """Execute multiple actions
+
+        `actions` may also be an async iterable (e.g. actions parsed from a streaming LLM response);
+        each action is executed as soon as it is produced, with the same new-element guard.
+        """
         results = []
         session = await browser_context.get_session()
         cached_selector_map = session.cached_state.selector_map
         cached_path_hashes = set(e.hash.branch_path_hash for e in cached_selector_map.values())
         await browser_context.remove_highlights()
+        # Reading the mutation counter is far cheaper than a full get_state, so the DOM is only
+        # re-extracted when it reports a change since the last extraction
+        signature = await browser_context.get_dom_change_signature()
 
-        for i, action in enumerate(actions):
-            if action.get_index() is not None and i != 0:
-                new_state = await browser_context.get_state()
-                new_path_hashes = set(e.hash.branch_path_hash for e in new_state.selector_map.values())
-                if check_for_new_elements and not new_path_hashes.issubset(cached_path_hashes):
-                    break
+        async for action in _as_async_iter(actions):
+            if results:
+                await asyncio.sleep(browser_context.config.wait_between_actions)
+                if action.get_index() is not None:
+                    with profile_span('new_element_check', 'browser'):
+                        new_signature = await browser_context.get_dom_change_signature()
+                        if new_signature is None or new_signature != signature:
+                            new_state = await browser_context.get_state()
+                            new_path_hashes = set(e.hash.branch_path_hash for e in new_state.selector_map.values())
+                            if check_for_new_elements and not new_path_hashes.issubset(cached_path_hashes):
+                                break
+                            signature = await browser_context.get_dom_change_signature()
 
             results.append(await self.act(action, browser_context))
-            if results[-1].is_done or results[-1].error or i == len(actions) - 1:
+            if results[-1].is_done or results[-1].error:
                 break
-            await asyncio.sleep(browser_context.config.wait_between_actions)
 
         return results
 
-    @time_execution_sync('--act')
+    @time_execution_async('--act')
     async def act(self, action: ActionModel, browser_context: BrowserContext) -> ActionResult:
         """Execute an action"""
         try:
-            for action_name, params in action.model_dump(exclude_unset=True).items():
-                if params is not None:
-                    result = await self.registry.execute_action(action_name, params, browser=browser_context)
+            # The param models are already validated, so they are passed on without a dump/validate round trip
+            for action_name, params in action.__dict__.items():
+                if params is not None and action_name in action.model_fields_set:
+                    with profile_span(f'action:{action_name}', 'action'):
+                        result = await self.registry.execute_action(action_name, params, browser=browser_context)
                     html_id = getattr(result, 'html_id', None)
                     if html_id:
                         await self._log_action_to_file(action_name, html_id, result.error is None, result.error)
@@ -45,3 +45,13 @@ class ScrollAction(BaseModel):
 
 class SendKeysAction(BaseModel):
 	keys: str
+
+
+class FormField(BaseModel):
+	index: int
+	value: str
+
+
+class FillFormAction(BaseModel):
+	fields: list[FormField]
+	mode: Literal['fill', 'type'] = 'fill'  # fill sets values directly, type sends keystrokes
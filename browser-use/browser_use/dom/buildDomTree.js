@@ -1,9 +1,27 @@
 (
-    args = { doHighlightElements: true, focusHighlightIndex: -1, viewportExpansion: 0 }
+    args = { doHighlightElements: true, focusHighlightIndex: -1, viewportExpansion: 0, stampElementIds: false }
 ) => {
-    const { doHighlightElements, focusHighlightIndex, viewportExpansion } = args;
+    const { doHighlightElements, focusHighlightIndex, viewportExpansion, stampElementIds } = args;
     let highlightIndex = 0; // Reset highlight index
 
+    // Stamps are per element rather than per index, so they stay valid across extractions;
+    // a stamp seen twice in one pass was copied by cloneNode and is replaced
+    const STAMP_ATTRIBUTE = 'data-bu-idx';
+    if (stampElementIds && !window.__buStamps) {
+        window.__buStamps = { prefix: Math.random().toString(36).slice(2, 8), next: 0 };
+    }
+    const seenStamps = new Set();
+
+    function stampElement(element) {
+        let stamp = element.getAttribute(STAMP_ATTRIBUTE);
+        if (!stamp || seenStamps.has(stamp)) {
+            stamp = `${window.__buStamps.prefix}-${window.__buStamps.next++}`;
+            element.setAttribute(STAMP_ATTRIBUTE, stamp);
+        }
+        seenStamps.add(stamp);
+        return stamp;
+    }
+
     // Quick check to confirm the script receives focusHighlightIndex
     console.log('focusHighlightIndex:', focusHighlightIndex);
 
@@ -413,6 +431,7 @@
             // Use getAttributeNames() instead of directly iterating attributes
             const attributeNames = node.getAttributeNames?.() || [];
             for (const name of attributeNames) {
+                if (name === STAMP_ATTRIBUTE) continue;
                 nodeData.attributes[name] = node.getAttribute(name);
             }
         }
@@ -429,6 +448,9 @@
             // Highlight if element meets all criteria and highlighting is enabled
             if (isInteractive && isVisible && isTop) {
                 nodeData.highlightIndex = highlightIndex++;
+                if (stampElementIds) {
+                    nodeData.stampId = stampElement(node);
+                }
                 if (doHighlightElements) {
                     if(focusHighlightIndex >= 0){
                         if(focusHighlightIndex === nodeData.highlightIndex){
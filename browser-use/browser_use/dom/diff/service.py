@@ -0,0 +1,82 @@
+import logging
+from typing import Optional
+
+from browser_use.dom.diff.views import DOMDiff
+from browser_use.dom.views import DOMBaseNode
+
+logger = logging.getLogger(__name__)
+
+
+class DOMDiffer:
+	"""
+	Turns element lists into diffs against the last full list sent to the model.
+
+	Elements are matched by the keys of DOMElementNode.clickable_element_entries, so an element
+	whose index or text changed shows up as changed rather than removed and added. A full list
+	is produced on the first state, after navigation, every `refresh_every` states, when the
+	included attributes change and whenever the diff would not be much smaller than the list.
+	"""
+
+	def __init__(self, refresh_every: int = 10, max_change_ratio: float = 0.5):
+		self.refresh_every = refresh_every
+		self.max_change_ratio = max_change_ratio
+		self.reset()
+
+	def reset(self) -> None:
+		"""Make the next state a full list"""
+		self._reference: dict[str, tuple[str, str, DOMBaseNode]] = {}
+		self._url: Optional[str] = None
+		self._attributes: Optional[tuple[str, ...]] = None
+		self._states_since_full = 0
+
+	@staticmethod
+	def _entries(element_entries: list[tuple[str, str, DOMBaseNode]]) -> dict[str, tuple[str, str, DOMBaseNode]]:
+		entries: dict[str, tuple[str, str, DOMBaseNode]] = {}
+		for entry in element_entries:
+			key = entry[0]
+			unique_key, n = key, 1
+			while unique_key in entries:
+				n += 1
+				unique_key = f'{key}#{n}'
+			entries[unique_key] = entry
+		return entries
+
+	def update(
+		self, url: str, element_entries: list[tuple[str, str, DOMBaseNode]], include_attributes: list[str] = []
+	) -> DOMDiff:
+		"""Diff of clickable_element_entries (rendered with include_attributes) against the last full list"""
+		entries = self._entries(element_entries)
+		attributes = tuple(include_attributes)
+		refresh = (
+			not self._reference
+			or url != self._url
+			or attributes != self._attributes
+			or self._states_since_full >= self.refresh_every
+		)
+
+		if not refresh:
+			added = [entry for key, entry in entries.items() if key not in self._reference]
+			removed = [entry for key, entry in self._reference.items() if key not in entries]
+			changed = [entry for key, entry in entries.items() if key in self._reference and self._reference[key][1] != entry[1]]
+			if len(added) + len(removed) + len(changed) <= self.max_change_ratio * max(len(entries), 1):
+				self._states_since_full += 1
+				lines = (
+					[(key, f'+ {line}', node) for key, line, node in added]
+					+ [(key, f'- {line}', node) for key, line, node in removed]
+					+ [(key, f'~ {line}', node) for key, line, node in changed]
+				)
+				return DOMDiff(
+					full=False,
+					text='\n'.join(line for _, line, _ in lines),
+					entries=lines,
+					added=len(added),
+					removed=len(removed),
+					changed=len(changed),
+				)
+			logger.debug(f'{len(added) + len(removed) + len(changed)}/{len(entries)} elements changed, sending the full list')
+
+		self._reference = entries
+		self._url = url
+		self._attributes = attributes
+		self._states_since_full = 0
+		return DOMDiff(full=True, text='\n'.join(line for _, line, _ in entries.values()), entries=list(entries.values()))
@@ -0,0 +1,16 @@
+from dataclasses import dataclass, field
+
+from browser_use.dom.views import DOMBaseNode
+
+
+@dataclass
+class DOMDiff:
+	"""Element list of one page state: the full list, or the changes against the last full list"""
+
+	full: bool
+	text: str
+	# The lines of text as (key, line, node), e.g. to rank them to a token budget
+	entries: list[tuple[str, str, DOMBaseNode]] = field(default_factory=list)
+	added: int = 0
+	removed: int = 0
+	changed: int = 0
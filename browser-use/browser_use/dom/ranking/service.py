@@ -0,0 +1,100 @@
+import math
+import re
+from collections import Counter, deque
+from typing import Callable, Iterable, Optional
+
+from browser_use.dom.views import DOMBaseNode, DOMElementNode
+
+_WORD = re.compile(r'[a-z0-9]+')
+_STOPWORDS = frozenset(
+	'the and for with from that this then into your you are was were has have not but all any can use '
+	'click open find page go to on in of a an is it at by as or be'.split()
+)
+
+# How likely an element is to be acted on, by tag or ARIA role
+_ROLE_WEIGHTS = {
+	'input': 1.0,
+	'textarea': 1.0,
+	'select': 1.0,
+	'button': 0.8,
+	'a': 0.5,
+	'textbox': 1.0,
+	'combobox': 1.0,
+	'checkbox': 0.8,
+	'radio': 0.8,
+	'tab': 0.7,
+	'menuitem': 0.7,
+	'option': 0.6,
+	'link': 0.5,
+}
+
+
+def _words(text: str) -> set[str]:
+	return {w for w in _WORD.findall(text.lower()) if len(w) > 2 and w not in _STOPWORDS}
+
+
+class ElementRanker:
+	"""
+	Trims huge element lists to the lines most relevant to the task, within a token budget.
+
+	Lines are scored by word overlap with the task and the model's next goal (words shared by
+	most lines of the page, like a grid's column names, count for little), by how actionable
+	the element's tag or role is, by position on the page (earlier first) and by whether an
+	action targeted the element in the last `recent_steps` steps. The lines that fit the budget
+	are kept in page order and the rest are replaced with one marker line.
+	"""
+
+	def __init__(self, max_tokens: int, recent_steps: int = 5):
+		self.max_tokens = max_tokens
+		self._recent: deque[set[str]] = deque(maxlen=recent_steps)
+
+	def record_interaction(self, xpaths: Iterable[str]) -> None:
+		"""Remember the elements that one step's actions targeted"""
+		self._recent.append(set(xpaths))
+
+	def _score(self, words: set[str], node: DOMBaseNode, position: float, weights: dict[str, float], recent: set[str]) -> float:
+		overlap = sum(weights[w] for w in words if w in weights)
+		if isinstance(node, DOMElementNode):
+			role = max(_ROLE_WEIGHTS.get(node.tag_name, 0.3), _ROLE_WEIGHTS.get(node.attributes.get('role', ''), 0.0))
+			recency = 2.0 if node.xpath in recent else 0.0
+		else:
+			role, recency = 0.1, 0.0
+		return overlap + role + 0.5 * (1 - position) + recency
+
+	def rank(
+		self,
+		entries: list[tuple[str, str, DOMBaseNode]],
+		query: str,
+		count_tokens: Callable[[str], int],
+	) -> tuple[list[tuple[str, str, DOMBaseNode]], int]:
+		"""Entries that fit max_tokens, in page order, and the number left out"""
+		tokens = [count_tokens(line) for _, line, _ in entries]
+		if sum(tokens) <= self.max_tokens:
+			return entries, 0
+
+		query_words = _words(query)
+		words = [_words(line) & query_words for _, line, _ in entries]
+		frequency = Counter(w for line_words in words for w in line_words)
+		weights = {w: max(0.0, math.log(len(entries) / (1 + frequency[w]))) for w in frequency}
+		recent = set().union(*self._recent) if self._recent else set()
+		n = max(len(entries) - 1, 1)
+		order = sorted(
+			range(len(entries)),
+			key=lambda i: self._score(words[i], entries[i][2], i / n, weights, recent),
+			reverse=True,
+		)
+
+		kept: list[int] = []
+		budget = self.max_tokens
+		for i in order:
+			if tokens[i] <= budget:
+				kept.append(i)
+				budget -= tokens[i]
+		kept.sort()
+		return [entries[i] for i in kept], len(entries) - len(kept)
+
+	@staticmethod
+	def marker(omitted: int) -> Optional[str]:
+		if not omitted:
+			return None
+		return f'... {omitted} more elements not shown (less relevant to the task) - scroll or extract content to see more ...'
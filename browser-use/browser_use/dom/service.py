@@ -26,8 +26,9 @@ class DomService:
 		highlight_elements: bool = True,
 		focus_element: int = -1,
 		viewport_expansion: int = 0,
+		stamp_element_ids: bool = False,
 	) -> DOMState:
-		element_tree = await self._build_dom_tree(highlight_elements, focus_element, viewport_expansion)
+		element_tree = await self._build_dom_tree(highlight_elements, focus_element, viewport_expansion, stamp_element_ids)
 		selector_map = self._create_selector_map(element_tree)
 
 		return DOMState(element_tree=element_tree, selector_map=selector_map)
@@ -37,6 +38,7 @@ class DomService:
 		highlight_elements: bool,
 		focus_element: int,
 		viewport_expansion: int,
+		stamp_element_ids: bool = False,
 	) -> DOMElementNode:
 		js_code = resources.read_text('browser_use.dom', 'buildDomTree.js')
 
@@ -44,6 +46,7 @@ class DomService:
 			'doHighlightElements': highlight_elements,
 			'focusHighlightIndex': focus_element,
 			'viewportExpansion': viewport_expansion,
+			'stampElementIds': stamp_element_ids,
 		}
 
 		eval_page = await self.page.evaluate(js_code, args)  # This is quite big, so be careful
@@ -97,6 +100,7 @@ class DomService:
 			is_top_element=node_data.get('isTopElement', False),
 			highlight_index=node_data.get('highlightIndex'),
 			shadow_root=node_data.get('shadowRoot', False),
+			stamp_id=node_data.get('stampId'),
 			parent=parent,
 		)
 
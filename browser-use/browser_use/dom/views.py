@@ -45,6 +45,8 @@ class DOMElementNode(DOMBaseNode):
 	is_top_element: bool = False
 	shadow_root: bool = False
 	highlight_index: Optional[int] = None
+	# Value of the data-bu-idx attribute stamped on the element during extraction, if enabled
+	stamp_id: Optional[str] = None
 
 	def __repr__(self) -> str:
 		tag_str = f'<{self.tag_name}'
@@ -78,6 +80,25 @@ class DOMElementNode(DOMBaseNode):
 
 		return HistoryTreeProcessor._hash_dom_element(self)
 
+	@cached_property
+	def css_selector(self) -> str:
+		"""Selector of the element within its frame, computed once per node (so once per DOM state)"""
+		from browser_use.browser.context import BrowserContext
+
+		return BrowserContext._enhanced_css_selector_for_element(self)
+
+	@cached_property
+	def iframe_parents(self) -> list['DOMElementNode']:
+		"""The iframes containing the element, outermost first"""
+		iframes = []
+		current = self.parent
+		while current is not None:
+			if current.tag_name == 'iframe':
+				iframes.append(current)
+			current = current.parent
+		iframes.reverse()
+		return iframes
+
 	def get_all_text_till_next_clickable_element(self, max_depth: int = -1) -> str:
 		text_parts = []
 
@@ -104,7 +125,14 @@ class DOMElementNode(DOMBaseNode):
 
 	def clickable_elements_to_string(self, include_attributes: list[str] = []) -> str:
 		"""Convert the processed DOM content to HTML."""
-		formatted_text = []
+		return '\n'.join(line for _, line, _ in self.clickable_element_entries(include_attributes))
+
+	def clickable_element_entries(self, include_attributes: list[str] = []) -> list[tuple[str, str, DOMBaseNode]]:
+		"""
+		Lines of clickable_elements_to_string with their node, each keyed by the element's xpath (text
+		lines by their parent's xpath and text) so the same element can be matched across page states
+		"""
+		entries = []
 
 		def process_node(node: DOMBaseNode, depth: int) -> None:
 			if isinstance(node, DOMElementNode):
@@ -117,8 +145,12 @@ class DOMElementNode(DOMBaseNode):
 							for key, value in node.attributes.items()
 							if key in include_attributes
 						)
-					formatted_text.append(
-						f'{node.highlight_index}[:]<{node.tag_name}{attributes_str}>{node.get_all_text_till_next_clickable_element()}</{node.tag_name}>'
+					entries.append(
+						(
+							node.xpath,
+							f'{node.highlight_index}[:]<{node.tag_name}{attributes_str}>{node.get_all_text_till_next_clickable_element()}</{node.tag_name}>',
+							node,
+						)
 					)
 
 				# Process children regardless
@@ -128,10 +160,11 @@ class DOMElementNode(DOMBaseNode):
 			elif isinstance(node, DOMTextNode):
 				# Add text only if it doesn't have a highlighted parent
 				if not node.has_parent_with_highlight_index():
-					formatted_text.append(f'_[:]{node.text}')
+					parent_xpath = node.parent.xpath if node.parent else ''
+					entries.append((f'text:{parent_xpath}:{node.text}', f'_[:]{node.text}', node))
 
 		process_node(self, 0)
-		return '\n'.join(formatted_text)
+		return entries
 
 	def get_file_upload_element(self, check_siblings: bool = True) -> Optional['DOMElementNode']:
 		# Check if current element is a file input
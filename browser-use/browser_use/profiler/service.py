@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterable, Iterator, Optional
+
+from browser_use.profiler.views import ProfileSpan
+
+_active_profiler: ContextVar[Optional['Profiler']] = ContextVar('browser_use_profiler', default=None)
+_current_span_id: ContextVar[Optional[str]] = ContextVar('browser_use_span', default=None)
+
+
+def _task_name() -> str:
+	try:
+		task = asyncio.current_task()
+	except RuntimeError:
+		return 'main'
+	return task.get_name() if task else 'main'
+
+
+class Profiler:
+	"""
+	Collects timing spans for an agent's steps.
+
+	Spans nest: a span opened inside another (in the same task or a task started from it) records
+	it as its parent. Code outside the agent (browser context, controller, message manager) records
+	through profile_span(), which writes to the profiler activated for the current step and does
+	nothing otherwise.
+	"""
+
+	def __init__(self, enabled: bool = True):
+		self.enabled = enabled
+		self._spans: list[ProfileSpan] = []
+
+	@contextmanager
+	def activate(self) -> Iterator['Profiler']:
+		token = _active_profiler.set(self if self.enabled else None)
+		try:
+			yield self
+		finally:
+			_active_profiler.reset(token)
+
+	@contextmanager
+	def span(self, name: str, category: str = 'agent', **attributes: Any) -> Iterator[None]:
+		if not self.enabled:
+			yield
+			return
+		span_id = os.urandom(8).hex()
+		parent_id = _current_span_id.get()
+		token = _current_span_id.set(span_id)
+		start = time.time()
+		perf_start = time.perf_counter()
+		try:
+			yield
+		except BaseException as e:
+			attributes['error'] = type(e).__name__
+			raise
+		finally:
+			_current_span_id.reset(token)
+			self._spans.append(
+				ProfileSpan(
+					name=name,
+					category=category,
+					span_id=span_id,
+					parent_id=parent_id,
+					start=start,
+					duration=time.perf_counter() - perf_start,
+					task=_task_name(),
+					attributes=attributes,
+				)
+			)
+
+	def collect(self) -> list[ProfileSpan]:
+		"""Return the spans recorded since the last call, ordered by start time"""
+		spans, self._spans = self._spans, []
+		return sorted(spans, key=lambda s: s.start)
+
+
+@contextmanager
+def profile_span(name: str, category: str = 'agent', **attributes: Any) -> Iterator[None]:
+	"""Record a span on the profiler of the current agent step, if there is one"""
+	profiler = _active_profiler.get()
+	if profiler is None:
+		yield
+		return
+	with profiler.span(name, category, **attributes):
+		yield
+
+
+def to_chrome_trace(spans: Iterable[ProfileSpan]) -> dict[str, Any]:
+	"""Chrome trace event format, loadable in chrome://tracing and Perfetto"""
+	tids: dict[str, int] = {}
+	events = []
+	for span in spans:
+		tid = tids.setdefault(span.task, len(tids) + 1)
+		events.append(
+			{
+				'name': span.name,
+				'cat': span.category,
+				'ph': 'X',
+				'ts': span.start * 1e6,
+				'dur': span.duration * 1e6,
+				'pid': 1,
+				'tid': tid,
+				'args': span.attributes,
+			}
+		)
+	events.extend({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid, 'args': {'name': task}} for task, tid in tids.items())
+	return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def _otel_value(value: Any) -> dict[str, Any]:
+	if isinstance(value, bool):
+		return {'boolValue': value}
+	if isinstance(value, int):
+		return {'intValue': str(value)}
+	if isinstance(value, float):
+		return {'doubleValue': value}
+	return {'stringValue': str(value)}
+
+
+def to_otel(spans: Iterable[ProfileSpan], trace_id: Optional[str] = None, service_name: str = 'browser-use') -> dict[str, Any]:
+	"""OpenTelemetry OTLP/JSON export request with all spans in one trace"""
+	trace_id = trace_id or uuid.uuid4().hex
+	otel_spans = []
+	for span in spans:
+		otel_span = {
+			'traceId': trace_id,
+			'spanId': span.span_id,
+			'name': span.name,
+			'kind': 1,
+			'startTimeUnixNano': str(int(span.start * 1e9)),
+			'endTimeUnixNano': str(int(span.end * 1e9)),
+			'attributes': [
+				{'key': key, 'value': _otel_value(value)} for key, value in {'category': span.category, **span.attributes}.items()
+			],
+		}
+		if span.parent_id:
+			otel_span['parentSpanId'] = span.parent_id
+		otel_spans.append(otel_span)
+	return {
+		'resourceSpans': [
+			{
+				'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': service_name}}]},
+				'scopeSpans': [{'scope': {'name': 'browser_use'}, 'spans': otel_spans}],
+			}
+		]
+	}
+
+
+def summarize_spans(spans: Iterable[ProfileSpan]) -> str:
+	"""Table of total and mean time per span name, as a share of the total step time"""
+	totals: dict[str, float] = defaultdict(float)
+	counts: dict[str, int] = defaultdict(int)
+	for span in spans:
+		totals[span.name] += span.duration
+		counts[span.name] += 1
+	if not counts:
+		return 'No profile spans recorded'
+
+	step_time = totals.get('step') or sum(totals.values())
+	width = max(len(name) for name in totals)
+	lines = [f'⏱️ Time breakdown over {counts.get("step", 0)} steps ({step_time:.2f}s):']
+	for name, total in sorted(totals.items(), key=lambda item: item[1], reverse=True):
+		if name == 'step':
+			continue
+		share = total / step_time * 100 if step_time else 0.0
+		lines.append(
+			f'  {name:<{width}}  {total:8.2f}s  {share:5.1f}%  {counts[name]:4d}x  mean {total / counts[name] * 1000:8.1f}ms'
+		)
+	return '\n'.join(lines)
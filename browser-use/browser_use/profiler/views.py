@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ProfileSpan(BaseModel):
+	"""One timed section of an agent step"""
+
+	name: str
+	category: str = 'agent'
+	span_id: str
+	parent_id: Optional[str] = None
+	start: float  # unix time in seconds
+	duration: float  # seconds
+	task: str = ''  # asyncio task the span ran in, so overlapping work lands on its own track
+	attributes: dict[str, Any] = Field(default_factory=dict)
+
+	@property
+	def end(self) -> float:
+		return self.start + self.duration
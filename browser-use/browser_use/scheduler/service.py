@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import heapq
+import itertools
+import logging
+import random
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+from browser_use.scheduler.views import BucketStats, RateLimitInfo
+from browser_use.utils import singleton
+
+logger = logging.getLogger(__name__)
+
+_API_KEY_ATTRIBUTES = ('openai_api_key', 'anthropic_api_key', 'google_api_key', 'api_key')
+
+# A request limit guessed from a 429 is forgotten after this many seconds without another one
+LEARNED_LIMIT_TTL = 120.0
+
+
+def _is_rate_limit_error(error: BaseException) -> bool:
+	return error.__class__.__name__ == 'RateLimitError' or getattr(error, 'status_code', None) == 429
+
+
+class _Bucket:
+	"""Request and token buckets for one (model, API key); limits are per minute, None means unknown"""
+
+	def __init__(self, key: str, request_limit: Optional[float] = None, token_limit: Optional[float] = None):
+		self.key = key
+		self.request_limit = request_limit
+		self.token_limit = token_limit
+		self.requests = request_limit or 0.0
+		self.tokens = token_limit or 0.0
+		self.updated = time.monotonic()
+		self.blocked_until = 0.0
+		self.queue: list[tuple[tuple[int, int, int], int]] = []
+		self.served: dict[str, int] = defaultdict(int)
+		self.granted = 0
+		self.rate_limited = 0
+		self.recent_grants: deque[float] = deque()
+		# Set while request_limit is a guess from a 429 rather than configured or from headers
+		self.limit_learned_at: Optional[float] = None
+
+	def _refill(self, now: float) -> None:
+		if self.limit_learned_at is not None and now - self.limit_learned_at > LEARNED_LIMIT_TTL:
+			# No 429 for a while: stop pacing at the guess
+			self.request_limit = None
+			self.limit_learned_at = None
+		elapsed = now - self.updated
+		self.updated = now
+		if self.request_limit:
+			self.requests = min(self.request_limit, self.requests + elapsed * self.request_limit / 60)
+		if self.token_limit:
+			self.tokens = min(self.token_limit, self.tokens + elapsed * self.token_limit / 60)
+
+	def wait_time(self, tokens: int) -> float:
+		"""Seconds until a request of `tokens` tokens fits in both buckets"""
+		now = time.monotonic()
+		self._refill(now)
+		wait = max(0.0, self.blocked_until - now)
+		if self.request_limit and self.requests < 1:
+			wait = max(wait, (1 - self.requests) * 60 / self.request_limit)
+		if self.token_limit and tokens:
+			# A request larger than the whole bucket waits for a full bucket instead of forever
+			needed = min(tokens, self.token_limit)
+			if self.tokens < needed:
+				wait = max(wait, (needed - self.tokens) * 60 / self.token_limit)
+		return wait
+
+	def take(self, tokens: int) -> None:
+		now = time.monotonic()
+		self.requests -= 1
+		self.tokens -= tokens
+		self.granted += 1
+		if self.limit_learned_at is not None:
+			# Additive increase: every call that goes through raises a guessed limit by one per minute
+			self.request_limit += 1
+		self.recent_grants.append(now)
+		while self.recent_grants and self.recent_grants[0] < now - 60:
+			self.recent_grants.popleft()
+
+	def update_from_headers(self, info: RateLimitInfo) -> None:
+		now = time.monotonic()
+		self._refill(now)
+		if info.request_limit:
+			self.request_limit = float(info.request_limit)
+			self.limit_learned_at = None
+		if info.token_limit:
+			self.token_limit = float(info.token_limit)
+		if info.requests_remaining is not None:
+			self.requests = min(self.requests, float(info.requests_remaining))
+			if info.requests_remaining <= 0 and info.requests_reset:
+				self.blocked_until = max(self.blocked_until, now + info.requests_reset)
+		if info.tokens_remaining is not None:
+			self.tokens = min(self.tokens, float(info.tokens_remaining))
+			if info.tokens_remaining <= 0 and info.tokens_reset:
+				self.blocked_until = max(self.blocked_until, now + info.tokens_reset)
+
+	def on_rate_limited(self, retry_after: Optional[float]) -> None:
+		now = time.monotonic()
+		self.rate_limited += 1
+		if not self.request_limit or self.limit_learned_at is not None:
+			# Limit unknown: assume slightly less than what got through during the last minute,
+			# until calls succeed again (see take) or no 429 came for LEARNED_LIMIT_TTL
+			self.request_limit = max(1.0, len(self.recent_grants) * 0.9)
+			self.limit_learned_at = now
+			logger.info(f'Rate limited on {self.key}; pacing at {self.request_limit:.0f} requests/min')
+		# One call may go as soon as the pause ends; the ones after it are paced by the request limit
+		self.requests = 1.0
+		self.tokens = min(self.tokens, 0.0)
+		# Small jitter so the queue resumes paced by the buckets rather than in a burst
+		self.blocked_until = max(self.blocked_until, now + (retry_after or 1.0) + random.uniform(0, 0.25))
+		self.updated = now
+
+
+class SchedulerTicket:
+	"""Handed out by LLMScheduler.slot(); reports actual usage and headers of the response"""
+
+	def __init__(self, scheduler: 'LLMScheduler', key: str, estimated_tokens: int):
+		self._scheduler = scheduler
+		self.key = key
+		self.estimated_tokens = estimated_tokens
+
+	def record(self, message: Any) -> None:
+		"""Correct the token estimate with the response's usage and learn limits from its headers"""
+		if message is None:
+			return
+		bucket = self._scheduler._buckets[self.key]
+		usage = getattr(message, 'usage_metadata', None) or {}
+		total = usage.get('total_tokens') if isinstance(usage, dict) else None
+		if total:
+			bucket.tokens -= total - self.estimated_tokens
+		metadata = getattr(message, 'response_metadata', None) or {}
+		# Only present if the chat model was created with include_response_headers=True or the like
+		headers = metadata.get('headers') if isinstance(metadata, dict) else None
+		if headers:
+			bucket.update_from_headers(RateLimitInfo.from_headers(headers))
+
+
+@singleton
+class LLMScheduler:
+	"""
+	Process-wide gate for agent LLM calls (Agent(use_llm_scheduler=True)).
+
+	Calls are grouped per (model, API key) bucket with request and token budgets per minute.
+	Limits come from configure() or are learned from provider rate-limit headers and 429s. When
+	a bucket is exhausted, waiting calls are released in order of priority (higher first), then
+	of how many calls their agent already got (fewest first), then arrival, so one busy agent
+	can't starve the others and a rate limit doesn't turn into synchronized retries.
+
+	LangChain only puts response headers in response_metadata['headers'] when the chat model is
+	asked to (e.g. ChatOpenAI(include_response_headers=True)). Without them limits are learned
+	from 429s alone, so configure() the known limits of such models.
+	"""
+
+	def __init__(self, poll_interval: float = 0.05):
+		self.poll_interval = poll_interval
+		self._buckets: dict[str, _Bucket] = {}
+		self._seq = itertools.count()
+
+	@staticmethod
+	def key_for(llm: Any) -> str:
+		model = getattr(llm, 'model_name', None) or getattr(llm, 'model', None) or llm.__class__.__name__
+		api_key = next((getattr(llm, attr) for attr in _API_KEY_ATTRIBUTES if getattr(llm, attr, None)), None)
+		if api_key is not None and hasattr(api_key, 'get_secret_value'):
+			api_key = api_key.get_secret_value()
+		key_hash = hashlib.sha256(str(api_key).encode()).hexdigest()[:12] if api_key else 'default'
+		return f'{model}:{key_hash}'
+
+	def _bucket(self, key: str) -> _Bucket:
+		if key not in self._buckets:
+			self._buckets[key] = _Bucket(key)
+		return self._buckets[key]
+
+	def configure(self, llm: Any, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None) -> None:
+		"""Set known limits for an LLM's bucket instead of waiting to learn them from headers"""
+		bucket = self._bucket(self.key_for(llm))
+		bucket.request_limit = requests_per_minute
+		bucket.token_limit = tokens_per_minute
+		bucket.limit_learned_at = None
+		bucket.requests = requests_per_minute or 0.0
+		bucket.tokens = tokens_per_minute or 0.0
+
+	async def acquire(self, key: str, agent_id: str = '', priority: int = 0, tokens: int = 0) -> None:
+		bucket = self._bucket(key)
+		entry = ((-priority, bucket.served[agent_id], next(self._seq)), tokens)
+		heapq.heappush(bucket.queue, entry)
+		try:
+			while True:
+				wait = bucket.wait_time(tokens) if bucket.queue[0] is entry else self.poll_interval
+				if wait <= 0:
+					heapq.heappop(bucket.queue)
+					bucket.take(tokens)
+					bucket.served[agent_id] += 1
+					return
+				await asyncio.sleep(min(wait, self.poll_interval))
+		except BaseException:
+			if entry in bucket.queue:
+				bucket.queue.remove(entry)
+				heapq.heapify(bucket.queue)
+			raise
+
+	def on_rate_limit(self, key: str, error: Optional[BaseException] = None) -> None:
+		"""Pause a bucket after a 429, honouring retry-after when the provider sent one"""
+		response = getattr(error, 'response', None)
+		info = RateLimitInfo.from_headers(getattr(response, 'headers', None))
+		self._bucket(key).on_rate_limited(info.retry_after or info.requests_reset or info.tokens_reset)
+
+	@asynccontextmanager
+	async def slot(
+		self, llm: Any, agent_id: str = '', priority: int = 0, estimated_tokens: int = 0
+	) -> AsyncIterator[SchedulerTicket]:
+		"""Wait for capacity, then run one LLM call inside the block"""
+		key = self.key_for(llm)
+		await self.acquire(key, agent_id, priority, estimated_tokens)
+		try:
+			yield SchedulerTicket(self, key, estimated_tokens)
+		except Exception as e:
+			if _is_rate_limit_error(e):
+				self.on_rate_limit(key, e)
+			raise
+
+	def stats(self) -> list[BucketStats]:
+		now = time.monotonic()
+		return [
+			BucketStats(
+				key=b.key,
+				request_limit=b.request_limit,
+				token_limit=b.token_limit,
+				queued=len(b.queue),
+				granted=b.granted,
+				rate_limited=b.rate_limited,
+				blocked_for=max(0.0, b.blocked_until - now),
+			)
+			for b in self._buckets.values()
+		]
+
+	def reset(self) -> None:
+		"""Forget all buckets and learned limits"""
+		self._buckets.clear()
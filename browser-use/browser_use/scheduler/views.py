@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Mapping, Optional
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_DURATION_UNITS = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+	"""Seconds until a limit resets, from OpenAI durations ('6m0s', '120ms') or Anthropic RFC 3339 timestamps"""
+	if not value:
+		return None
+	value = value.strip()
+	try:
+		return float(value)
+	except ValueError:
+		pass
+	parts = _DURATION_PART.findall(value)
+	if parts and ''.join(n + u for n, u in parts) == value:
+		return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+	try:
+		return max(0.0, datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp() - time.time())
+	except ValueError:
+		return None
+
+
+def _int(value: Any) -> Optional[int]:
+	try:
+		return int(float(value))
+	except (TypeError, ValueError):
+		return None
+
+
+@dataclass
+class RateLimitInfo:
+	"""Limits reported by the provider in response headers"""
+
+	request_limit: Optional[int] = None
+	requests_remaining: Optional[int] = None
+	requests_reset: Optional[float] = None
+	token_limit: Optional[int] = None
+	tokens_remaining: Optional[int] = None
+	tokens_reset: Optional[float] = None
+	retry_after: Optional[float] = None
+
+	@classmethod
+	def from_headers(cls, headers: Mapping[str, Any] | None) -> 'RateLimitInfo':
+		"""Parse OpenAI (x-ratelimit-*) and Anthropic (anthropic-ratelimit-*) rate limit headers"""
+		if not headers:
+			return cls()
+		h = {str(k).lower(): v for k, v in dict(headers).items()}
+
+		def first(*names: str) -> Any:
+			return next((h[n] for n in names if n in h), None)
+
+		return cls(
+			request_limit=_int(first('x-ratelimit-limit-requests', 'anthropic-ratelimit-requests-limit')),
+			requests_remaining=_int(first('x-ratelimit-remaining-requests', 'anthropic-ratelimit-requests-remaining')),
+			requests_reset=parse_reset(first('x-ratelimit-reset-requests', 'anthropic-ratelimit-requests-reset')),
+			token_limit=_int(first('x-ratelimit-limit-tokens', 'anthropic-ratelimit-tokens-limit')),
+			tokens_remaining=_int(first('x-ratelimit-remaining-tokens', 'anthropic-ratelimit-tokens-remaining')),
+			tokens_reset=parse_reset(first('x-ratelimit-reset-tokens', 'anthropic-ratelimit-tokens-reset')),
+			retry_after=parse_reset(first('retry-after')),
+		)
+
+
+@dataclass
+class BucketStats:
+	key: str
+	request_limit: Optional[float]
+	token_limit: Optional[float]
+	queued: int
+	granted: int
+	rate_limited: int
+	blocked_for: float
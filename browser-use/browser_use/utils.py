@@ -1,5 +1,9 @@
+import inspect
 import logging
+import math
+import threading
 import time
+from collections import deque
 from functools import wraps
 from typing import Any, Callable, Coroutine, ParamSpec, TypeVar
 
@@ -11,15 +15,116 @@ R = TypeVar('R')
 P = ParamSpec('P')
 
 
+class Histogram:
+	"""Count, sum and quantiles of one operation's durations; quantiles come from the most recent samples"""
+
+	def __init__(self, max_samples: int = 2048):
+		self.count = 0
+		self.sum = 0.0
+		self._samples: deque[float] = deque(maxlen=max_samples)
+
+	def observe(self, value: float) -> None:
+		self.count += 1
+		self.sum += value
+		self._samples.append(value)
+
+	def quantile(self, q: float) -> float:
+		if not self._samples:
+			return math.nan
+		ordered = sorted(self._samples)
+		return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+	def snapshot(self) -> dict[str, float]:
+		return {
+			'count': self.count,
+			'sum': self.sum,
+			'p50': self.quantile(0.5),
+			'p95': self.quantile(0.95),
+			'p99': self.quantile(0.99),
+		}
+
+
+class MetricsRegistry:
+	"""In-process duration histograms per operation name, filled by the time_execution decorators"""
+
+	QUANTILES = (0.5, 0.95, 0.99)
+
+	def __init__(self):
+		self._histograms: dict[str, Histogram] = {}
+		self._lock = threading.Lock()
+
+	def observe(self, name: str, seconds: float) -> None:
+		with self._lock:
+			if name not in self._histograms:
+				self._histograms[name] = Histogram()
+			self._histograms[name].observe(seconds)
+
+	def histogram(self, name: str) -> Histogram | None:
+		return self._histograms.get(name)
+
+	def snapshot(self) -> dict[str, dict[str, float]]:
+		with self._lock:
+			return {name: h.snapshot() for name, h in sorted(self._histograms.items())}
+
+	def reset(self) -> None:
+		with self._lock:
+			self._histograms.clear()
+
+	def to_prometheus(self, metric: str = 'browser_use_operation_duration_seconds') -> str:
+		"""Prometheus text exposition (a summary with an `operation` label), e.g. for a /metrics endpoint"""
+		lines = [
+			f'# HELP {metric} Duration of browser-use operations in seconds.',
+			f'# TYPE {metric} summary',
+		]
+		with self._lock:
+			for name, h in sorted(self._histograms.items()):
+				label = name.replace('\\', '\\\\').replace('"', '\\"')
+				for q in self.QUANTILES:
+					lines.append(f'{metric}{{operation="{label}",quantile="{q}"}} {h.quantile(q)}')
+				lines.append(f'{metric}_sum{{operation="{label}"}} {h.sum}')
+				lines.append(f'{metric}_count{{operation="{label}"}} {h.count}')
+		return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+
+def _metric_name(additional_text: str, func: Callable) -> str:
+	return additional_text.strip('- ') or func.__qualname__
+
+
+def _timed_coroutine(func: Callable, additional_text: str) -> Callable:
+	name = _metric_name(additional_text, func)
+
+	@wraps(func)
+	async def wrapper(*args, **kwargs):
+		start_time = time.perf_counter()
+		try:
+			return await func(*args, **kwargs)
+		finally:
+			execution_time = time.perf_counter() - start_time
+			metrics.observe(name, execution_time)
+			logger.debug(f'{additional_text} Execution time: {execution_time:.2f} seconds')
+
+	return wrapper
+
+
 def time_execution_sync(additional_text: str = '') -> Callable[[Callable[P, R]], Callable[P, R]]:
 	def decorator(func: Callable[P, R]) -> Callable[P, R]:
+		# Timing a coroutine function's call would only measure creating the coroutine
+		if inspect.iscoroutinefunction(func):
+			return _timed_coroutine(func, additional_text)
+		name = _metric_name(additional_text, func)
+
 		@wraps(func)
 		def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
-			start_time = time.time()
-			result = func(*args, **kwargs)
-			execution_time = time.time() - start_time
-			logger.debug(f'{additional_text} Execution time: {execution_time:.2f} seconds')
-			return result
+			start_time = time.perf_counter()
+			try:
+				return func(*args, **kwargs)
+			finally:
+				execution_time = time.perf_counter() - start_time
+				metrics.observe(name, execution_time)
+				logger.debug(f'{additional_text} Execution time: {execution_time:.2f} seconds')
 
 		return wrapper
 
@@ -30,15 +135,9 @@ def time_execution_async(
 	additional_text: str = '',
 ) -> Callable[[Callable[P, Coroutine[Any, Any, R]]], Callable[P, Coroutine[Any, Any, R]]]:
 	def decorator(func: Callable[P, Coroutine[Any, Any, R]]) -> Callable[P, Coroutine[Any, Any, R]]:
-		@wraps(func)
-		async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
-			start_time = time.time()
-			result = await func(*args, **kwargs)
-			execution_time = time.time() - start_time
-			logger.debug(f'{additional_text} Execution time: {execution_time:.2f} seconds')
-			return result
-
-		return wrapper
+		if not inspect.iscoroutinefunction(func):
+			return time_execution_sync(additional_text)(func)
+		return _timed_coroutine(func, additional_text)
 
 	return decorator
 
@@ -0,0 +1,37 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+
+from langchain_openai import ChatOpenAI
+
+from browser_use import run_many
+from browser_use.browser.browser import BrowserConfig
+
+llm = ChatOpenAI(model='gpt-4o')
+
+
+async def main():
+	result = await run_many(
+		[
+			'Search Google for weather in Tokyo',
+			'Check Reddit front page title',
+			'Look up Bitcoin price on Coinbase',
+			'Find NASA image of the day',
+		],
+		llm=llm,
+		browser_config=BrowserConfig(headless=True),
+		max_concurrency=2,
+		max_steps=25,
+		max_time=300,
+		max_retries=1,
+	)
+
+	for run in result.runs:
+		print(f'{"✅" if run.success else "❌"} {run.task} ({run.attempts} attempts, {run.steps} steps)')
+		print(f'   {run.history.final_result()}')
+	print(result.stats)
+
+
+asyncio.run(main())
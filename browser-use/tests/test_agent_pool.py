@@ -0,0 +1,99 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from browser_use.agent.pool.service import AgentPool, run_many
+from browser_use.agent.pool.views import PoolTask
+from browser_use.agent.views import ActionResult, AgentHistory, AgentHistoryList
+from browser_use.browser.views import BrowserStateHistory
+
+# run with:
+# python -m pytest tests/test_agent_pool.py
+
+
+def history_item(done: bool) -> AgentHistory:
+	return AgentHistory(
+		model_output=None,
+		result=[ActionResult(is_done=done)],
+		state=BrowserStateHistory(url='', title='', tabs=[], interacted_element=[None]),
+	)
+
+
+class FakeAgent:
+	"""Stands in for Agent; behaviour is scripted by task name"""
+
+	running = 0
+	max_running = 0
+	attempts: dict[str, int] = {}
+
+	def __init__(self, task, llm, browser, browser_context, **kwargs):
+		self.task = task
+		self.kwargs = kwargs
+		self.history = AgentHistoryList(history=[])
+		self.stopped = False
+
+	async def run(self, max_steps=100):
+		FakeAgent.running += 1
+		FakeAgent.max_running = max(FakeAgent.max_running, FakeAgent.running)
+		FakeAgent.attempts[self.task] = FakeAgent.attempts.get(self.task, 0) + 1
+		try:
+			await asyncio.sleep(0.02)
+			if self.task == 'slow':
+				await asyncio.sleep(10)
+			self.history.history.append(history_item(done=False))
+			done = self.task == 'ok' or (self.task == 'flaky' and FakeAgent.attempts[self.task] > 1)
+			self.history.history.append(history_item(done=done))
+			return self.history
+		finally:
+			FakeAgent.running -= 1
+
+	def stop(self):
+		self.stopped = True
+
+
+@pytest.fixture
+def fake_agents():
+	FakeAgent.running = FakeAgent.max_running = 0
+	FakeAgent.attempts = {}
+	browser = MagicMock()
+	browser.get_playwright_browser = AsyncMock()
+	browser.close = AsyncMock()
+	context = MagicMock()
+	context.close = AsyncMock()
+	with (
+		patch('browser_use.agent.pool.service.Agent', FakeAgent),
+		patch('browser_use.agent.pool.service.BrowserContext', return_value=context),
+	):
+		yield browser, context
+
+
+async def test_pool_bounds_concurrency_and_keeps_order(fake_agents):
+	browser, context = fake_agents
+	pool = AgentPool(llm=MagicMock(), browsers=[browser], max_concurrency=2)
+
+	result = await pool.run(['ok'] * 5)
+
+	assert FakeAgent.max_running == 2
+	assert len(result.histories) == 5 and all(h.is_done() for h in result.histories)
+	assert result.stats.succeeded == 5 and result.stats.total_steps == 10
+	assert context.close.await_count == 5
+	# Browsers passed in are shared, not owned by the pool
+	browser.close.assert_not_awaited()
+
+
+async def test_retries_failures_and_enforces_time_budget(fake_agents):
+	browser, _ = fake_agents
+
+	result = await run_many(
+		['flaky', 'never', PoolTask(task='slow', max_time=0.1)],
+		llm=MagicMock(),
+		browsers=[browser],
+		max_retries=1,
+	)
+
+	flaky, never, slow = result.runs
+	assert flaky.success and flaky.attempts == 2
+	assert not never.success and never.attempts == 2
+	assert slow.timed_out and not slow.success
+	assert result.stats.retries == 3 and result.stats.timed_out == 1
@@ -0,0 +1,88 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from pydantic import ValidationError
+
+from browser_use.agent.service import Agent
+from browser_use.agent.views import RunBudget, RunUsage
+from browser_use.browser.views import BrowserState
+from browser_use.controller.service import Controller
+
+# run with:
+# python -m pytest tests/test_budget.py
+
+
+@pytest.fixture
+def agent():
+	llm = MagicMock(spec=BaseChatModel)
+	agent = Agent(task='Test task', llm=llm, controller=Controller(), use_llm_scheduler=False, generate_gif=False)
+	output = agent.AgentOutput.model_validate(
+		{
+			'current_state': {'evaluation_previous_goal': '', 'memory': '', 'next_goal': ''},
+			'action': [{'go_back': {}}],
+		}
+	)
+	raw = AIMessage(content='', usage_metadata={'input_tokens': 1000, 'output_tokens': 100, 'total_tokens': 1100})
+	structured_llm = MagicMock()
+	structured_llm.ainvoke = AsyncMock(return_value={'parsed': output, 'raw': raw})
+	llm.with_structured_output.return_value = structured_llm
+
+	state = BrowserState(url='https://example.com', title='', element_tree=MagicMock(), tabs=[], selector_map={}, screenshot='')
+	agent.browser = None
+	agent.browser_context = AsyncMock()
+	agent.browser_context.get_state = AsyncMock(return_value=state)
+	agent.browser_context.get_session = AsyncMock(return_value=SimpleNamespace(cached_state=state))
+	agent.browser_context.config = SimpleNamespace(wait_between_actions=0)
+	agent.telemetry = MagicMock()
+	return agent
+
+
+async def test_token_budget_degrades_then_stops(agent):
+	history = await agent.run(max_steps=10, budget=RunBudget(max_input_tokens=2500))
+
+	assert len(history.history) == 3
+	assert agent.budget_stop_reason == 'input tokens'
+	assert (agent.usage.input_tokens, agent.usage.output_tokens, agent.usage.llm_calls) == (3000, 300, 3)
+	# Past 80% of the budget the last step ran without vision and with fewer attributes
+	assert agent.use_vision is False
+	assert 'value' not in agent.message_manager.include_attributes
+	agent.browser_context.get_state.assert_awaited_with(use_vision=False)
+
+
+async def test_next_run_starts_with_the_original_settings(agent):
+	include_attributes = list(agent.include_attributes)
+	await agent.run(max_steps=10, budget=RunBudget(max_input_tokens=2500))
+
+	await agent.run(max_steps=1)
+
+	assert agent.use_vision is True
+	assert agent.include_attributes == agent.message_manager.include_attributes == include_attributes
+	agent.browser_context.get_state.assert_awaited_with(use_vision=True)
+
+
+async def test_time_budget_interrupts_a_slow_step(agent):
+	async def slow_step(step_info=None):
+		await asyncio.sleep(0.15)
+
+	agent.step = slow_step
+	history = await agent.run(max_steps=10, budget=RunBudget(max_time=0.2))
+
+	assert agent.budget_stop_reason == 'time'
+	assert 0.2 <= agent.usage.elapsed < 0.5
+	assert history is agent.history
+
+
+def test_cost_budget_needs_rates():
+	with pytest.raises(ValidationError):
+		RunBudget(max_cost=1.0)
+
+	budget = RunBudget(max_cost=1.0, input_token_cost=2.5, output_token_cost=10.0)
+	usage = RunUsage(input_tokens=200_000, output_tokens=40_000)
+	assert budget.cost(usage) == pytest.approx(0.9)
+	assert budget.used_share(usage) == pytest.approx(0.9)
+	assert budget.exhausted(usage) is None
+	assert budget.exhausted(RunUsage(input_tokens=400_000)) == 'cost'
@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+
+from browser_use.agent.checkpoint.service import load_checkpoint
+from browser_use.agent.service import Agent
+from browser_use.browser.views import BrowserState
+from browser_use.controller.service import Controller
+
+# run with:
+# python -m pytest tests/test_checkpoint.py
+
+COOKIES = [{'name': 'session', 'value': 'abc', 'domain': 'example.com', 'path': '/'}]
+
+
+def make_agent(**kwargs):
+	llm = MagicMock(spec=BaseChatModel)
+	agent = Agent(task='Test task', llm=llm, controller=Controller(), use_llm_scheduler=False, generate_gif=False, **kwargs)
+	output = agent.AgentOutput.model_validate(
+		{
+			'current_state': {'evaluation_previous_goal': '', 'memory': 'remember me', 'next_goal': ''},
+			'action': [{'go_back': {}}],
+		}
+	)
+	structured_llm = MagicMock()
+	structured_llm.ainvoke = AsyncMock(return_value={'parsed': output, 'raw': AIMessage(content='')})
+	llm.with_structured_output.return_value = structured_llm
+
+	state = BrowserState(
+		url='https://example.com/b', title='', element_tree=MagicMock(), tabs=[], selector_map={}, screenshot='abc'
+	)
+	pages = [SimpleNamespace(url='https://example.com/a'), SimpleNamespace(url='https://example.com/b')]
+	context = SimpleNamespace(pages=pages, cookies=AsyncMock(return_value=COOKIES), add_cookies=AsyncMock())
+	agent.browser = None
+	agent.browser_context = AsyncMock()
+	agent.browser_context.get_state = AsyncMock(return_value=state)
+	agent.browser_context.get_session = AsyncMock(
+		return_value=SimpleNamespace(cached_state=state, context=context, current_page=pages[1])
+	)
+	agent.browser_context.config = SimpleNamespace(wait_between_actions=0)
+	agent.telemetry = MagicMock()
+	return agent, context
+
+
+async def test_checkpoint_is_written_after_each_step(tmp_path):
+	path = tmp_path / 'agent.json'
+	agent, _ = make_agent(checkpoint_path=path)
+
+	await agent.run(max_steps=2)
+
+	checkpoint = load_checkpoint(path)
+	assert checkpoint.n_steps == 3
+	assert len(checkpoint.history['history']) == 2
+	assert checkpoint.history['history'][0]['state']['screenshot'] is None
+	assert checkpoint.browser.tabs == ['https://example.com/a', 'https://example.com/b']
+	assert checkpoint.browser.current_tab == 1
+	assert checkpoint.browser.cookies == COOKIES
+	assert len(checkpoint.messages) == len(agent.message_manager.history.messages)
+
+
+async def test_resume_continues_from_the_checkpoint(tmp_path):
+	path = tmp_path / 'agent.json'
+	first, _ = make_agent(checkpoint_path=path)
+	await first.run(max_steps=2)
+
+	second, context = make_agent(checkpoint_path=path, initial_actions=[{'go_back': {}}])
+	second.resume(path)
+
+	assert second.n_steps == 3
+	assert second.agent_id == first.agent_id
+	assert len(second.history.history) == 2
+	assert [m.message.content for m in second.message_manager.history.messages] == [
+		m.message.content for m in first.message_manager.history.messages
+	]
+	assert second.message_manager.history.total_tokens == first.message_manager.history.total_tokens
+
+	await second.run(max_steps=1)
+
+	context.add_cookies.assert_awaited_once_with(COOKIES)
+	second.browser_context.navigate_to.assert_awaited_once_with('https://example.com/a')
+	second.browser_context.create_new_tab.assert_awaited_once_with('https://example.com/b')
+	second.browser_context.switch_to_tab.assert_awaited_once_with(1)
+	# Initial actions already ran before the checkpoint; only the new step's action runs
+	assert second.browser_context.go_back.await_count == 1
+	assert len(second.history.history) == 3
+	assert load_checkpoint(path).n_steps == 4
+
+
+def test_resume_without_checkpoint_only_unpauses():
+	agent, _ = make_agent()
+	agent.pause()
+	agent.resume()
+
+	assert agent._paused is False
+	assert agent.n_steps == 1
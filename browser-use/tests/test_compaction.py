@@ -0,0 +1,126 @@
+from unittest.mock import MagicMock
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import HumanMessage, ToolMessage
+
+from browser_use.agent.message_manager.service import MessageManager
+from browser_use.agent.message_manager.token_counter import TokenCounter
+from browser_use.agent.prompts import SystemPrompt
+from browser_use.agent.views import ActionResult, AgentOutput
+from browser_use.browser.views import BrowserState
+from browser_use.controller.registry.views import ActionModel
+
+# run with:
+# python -m pytest tests/test_compaction.py
+
+
+def make_manager(**kwargs):
+	return MessageManager(
+		llm=MagicMock(spec=BaseChatModel),
+		task='Test task',
+		action_descriptions='',
+		system_prompt_class=SystemPrompt,
+		token_counter=TokenCounter(use_tiktoken=False),
+		**kwargs,
+	)
+
+
+def make_output(step):
+	return AgentOutput.model_validate(
+		{
+			'current_state': {'evaluation_previous_goal': 'Success', 'memory': '', 'next_goal': f'goal {step}'},
+			'action': [ActionModel()],
+		}
+	)
+
+
+def make_state(screenshot=None):
+	return BrowserState(
+		url='https://example.com', title='', element_tree=MagicMock(), tabs=[], selector_map={}, screenshot=screenshot
+	)
+
+
+def run_step(manager, step, extracted='x' * 300):
+	result = [ActionResult(extracted_content=extracted, include_in_memory=True)] if step > 1 else None
+	manager.add_state_message(make_state(), result)
+	manager.cut_messages()
+	manager._remove_last_state_message()
+	manager.add_model_output(make_output(step))
+
+
+def test_old_steps_are_folded_into_a_summary():
+	manager = make_manager(max_history_steps=6)
+	summaries = []
+	for step in range(1, 13):
+		run_step(manager, step)
+		manager.cut_messages()
+		assert len(manager._step_pairs()) <= 6
+		index = manager._summary_index()
+		summaries.append(manager.history.messages[index].message.content if index is not None else None)
+
+	# Steps are folded in batches, so the prompt prefix stays the same in between
+	assert len(set(summaries)) == 3
+	summary = summaries[-1]
+	assert summary.startswith('Summary of earlier steps:')
+	assert '- Step 1: Success | goal: goal 1 | actions: none | Action result: xxx' in summary
+	assert '- Step 8: ' in summary
+	assert '- Step 9: ' not in summary
+	assert isinstance(manager.history.messages[4].message, HumanMessage)
+	assert manager.history.total_tokens == sum(m.metadata.input_tokens for m in manager.history.messages)
+
+
+def test_history_is_kept_verbatim_by_default():
+	manager = make_manager()
+	for step in range(1, 26):
+		run_step(manager, step)
+
+	assert manager._summary_index() is None
+	assert len(manager._step_pairs()) == 25
+
+
+def test_compaction_order_under_budget():
+	manager = make_manager(max_history_steps=None, keep_recent_steps=2)
+	for step in range(1, 7):
+		run_step(manager, step)
+	# An old message with an image is dropped first, before any step is summarized
+	manager.history.messages[5].message.content = [{'type': 'text', 'text': 'old'}, {'image_url': 'data:'}]
+	manager.history.messages[5].metadata.input_tokens += manager.IMG_TOKENS
+	manager.history.total_tokens += manager.IMG_TOKENS
+
+	manager.max_input_tokens = manager.history.total_tokens - 1
+	manager.cut_messages()
+	assert manager.history.messages[5].message.content == 'old'
+	assert manager._summary_index() is None
+
+	manager.add_state_message(make_state(screenshot='abc'))
+	manager.max_input_tokens = manager.history.total_tokens - 300
+	manager.cut_messages()
+
+	messages = [m.message for m in manager.history.messages]
+	assert manager.history.total_tokens <= manager.max_input_tokens
+	assert manager._summary_index() == 4
+	# The two most recent steps and the state message are untouched
+	assert sum(isinstance(m, ToolMessage) for m in messages) == 1 + 2
+	assert isinstance(messages[-1].content, list)
+
+
+def test_long_runs_stay_bounded():
+	manager = make_manager(max_history_steps=20, max_summary_lines=10)
+	sizes = []
+	for step in range(1, 121):
+		run_step(manager, step)
+		sizes.append(manager.history.total_tokens)
+
+	assert max(sizes[60:]) <= max(sizes[20:40]) * 1.1
+	summary = manager.history.messages[manager._summary_index()].message.content
+	assert len(summary.splitlines()) == 11
+	assert '- ... 90 earlier steps omitted' in summary
+
+
+def test_raises_when_the_state_cannot_fit():
+	manager = make_manager()
+	manager.add_state_message(make_state())
+	manager.max_input_tokens = 10
+	with pytest.raises(ValueError, match='Max token limit reached'):
+		manager.cut_messages()
@@ -0,0 +1,91 @@
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from browser_use.agent.decision_cache.service import DecisionCache, normalize_url
+from browser_use.agent.service import Agent
+from browser_use.agent.views import ActionResult
+from browser_use.browser.views import BrowserState
+from browser_use.controller.service import Controller
+from browser_use.dom.views import DOMElementNode
+
+# run with:
+# python -m pytest tests/test_decision_cache.py
+
+
+def make_state(url: str = 'https://example.com/orders/123?session=abc&tab=2') -> BrowserState:
+	button = DOMElementNode(
+		tag_name='button', is_visible=True, parent=None, xpath='/button', attributes={}, children=[], highlight_index=0
+	)
+	root = DOMElementNode(tag_name='body', is_visible=True, parent=None, xpath='', attributes={}, children=[button])
+	return BrowserState(url=url, title='', element_tree=root, tabs=[], selector_map={0: button}, screenshot='')
+
+
+def test_normalize_url_drops_ids_and_query_values():
+	assert normalize_url('https://Example.com/orders/123?session=abc&tab=2') == 'https://example.com/orders/:id?session&tab'
+	assert normalize_url('https://example.com/orders/456?tab=9&session=zzz') == 'https://example.com/orders/:id?session&tab'
+
+
+@pytest.fixture
+def agent_factory(tmp_path):
+	cache = DecisionCache(cache_dir=tmp_path, ttl=60)
+
+	def make():
+		llm = MagicMock(spec=BaseChatModel)
+		with patch('browser_use.agent.service.MessageManager'):
+			agent = Agent(task='Open the order', llm=llm, controller=Controller(), decision_cache=cache)
+		agent.browser_context = AsyncMock()
+		agent.browser_context.get_state = AsyncMock(return_value=make_state())
+		agent.controller.multi_act = AsyncMock(return_value=[ActionResult()])
+		agent.telemetry = MagicMock()
+		agent.get_next_action = AsyncMock(
+			return_value=agent.AgentOutput.model_validate(
+				{
+					'current_state': {'evaluation_previous_goal': '', 'memory': '', 'next_goal': 'Open it'},
+					'action': [{'click_element': {'index': 0}}],
+				}
+			)
+		)
+		return agent
+
+	return cache, make
+
+
+async def test_second_run_replays_decision_without_llm(agent_factory):
+	cache, make = agent_factory
+
+	first = make()
+	await first.step()
+	assert first.get_next_action.await_count == 1
+
+	(entry,) = cache.cache_dir.glob('*.json')
+	written = entry.stat().st_mtime_ns
+
+	second = make()
+	await second.step()
+	assert second.get_next_action.await_count == 0
+	assert cache.hits == 1
+	assert entry.stat().st_mtime_ns == written
+	replayed = second.controller.multi_act.await_args.args[0]
+	assert replayed[0].model_dump(exclude_unset=True) == {'click_element': {'index': 0}}
+	assert second.history.history[-1].model_output.current_state.next_goal == 'Open it'
+
+
+async def test_failed_action_invalidates_and_ttl_expires(agent_factory):
+	cache, make = agent_factory
+	await make().step()
+
+	failing = make()
+	failing.controller.multi_act = AsyncMock(return_value=[ActionResult(error='element not found')])
+	await failing.step()
+	assert failing.get_next_action.await_count == 0
+	assert not list(cache.cache_dir.glob('*.json'))
+
+	await make().step()
+	cache.ttl = 0.01
+	time.sleep(0.02)
+	expired = make()
+	await expired.step()
+	assert expired.get_next_action.await_count == 1
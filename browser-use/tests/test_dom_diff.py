@@ -0,0 +1,191 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from browser_use.agent.message_manager.service import MessageManager
+from browser_use.agent.message_manager.token_counter import TokenCounter
+from browser_use.agent.prompts import SystemPrompt
+from browser_use.browser.views import BrowserState
+from browser_use.dom.diff.service import DOMDiffer
+from browser_use.dom.views import DOMElementNode, DOMTextNode
+
+# run with:
+# python -m pytest tests/test_dom_diff.py -s
+
+
+def make_form(values, extra=()):
+	"""An ERP-like form: one labelled input per field, in document order"""
+	root = DOMElementNode(is_visible=True, parent=None, tag_name='form', xpath='/form', attributes={}, children=[])
+	index = 0
+	for name, value in list(values.items()) + [(name, '') for name in extra]:
+		label = DOMElementNode(
+			is_visible=True, parent=root, tag_name='label', xpath=f'/form/label[@for="{name}"]', attributes={}, children=[]
+		)
+		label.children.append(DOMTextNode(is_visible=True, parent=label, text=f'{name.replace("_", " ").title()}'))
+		field = DOMElementNode(
+			is_visible=True,
+			parent=root,
+			tag_name='input',
+			xpath=f'/form/input[@name="{name}"]',
+			attributes={'name': name, 'type': 'text', 'value': value},
+			children=[],
+			highlight_index=index,
+		)
+		index += 1
+		root.children.extend([label, field])
+	return root
+
+
+def make_state(tree, url='https://erp.example.com/orders/new'):
+	return BrowserState(url=url, title='', element_tree=tree, tabs=[], selector_map={})
+
+
+def entries(tree, include_attributes=[]):
+	return tree.clickable_element_entries(include_attributes)
+
+
+FIELDS = {f'field_{i}': '' for i in range(200)}
+
+
+def test_changes_are_keyed_by_element():
+	differ = DOMDiffer()
+	attributes = ['name', 'value']
+	assert differ.update('https://a', entries(make_form(FIELDS), attributes), attributes).full
+
+	values = dict(FIELDS, field_3='ACME Corp')
+	diff = differ.update('https://a', entries(make_form(values, extra=['discount']), attributes), attributes)
+	assert not diff.full
+	assert (diff.added, diff.removed, diff.changed) == (2, 0, 1)
+	assert diff.text.splitlines() == [
+		'+ _[:]Discount',
+		'+ 200[:]<input name="discount" value=""></input>',
+		'~ 3[:]<input name="field_3" value="ACME Corp"></input>',
+	]
+
+	# Changes are against the last full list, not the previous state
+	diff = differ.update('https://a', entries(make_form(values), attributes), attributes)
+	assert (diff.added, diff.removed, diff.changed) == (0, 0, 1)
+
+	assert differ.update('https://b', entries(make_form(values), attributes), attributes).full
+	assert differ.update('https://b', entries(make_form(FIELDS), attributes + ['type']), attributes + ['type']).full
+
+
+def test_full_refresh_after_n_states_or_large_changes():
+	differ = DOMDiffer(refresh_every=2)
+	tree = entries(make_form(FIELDS))
+	assert [differ.update('https://a', tree).full for _ in range(5)] == [True, False, False, True, False]
+
+	differ = DOMDiffer()
+	differ.update('https://a', entries(make_form({'a': '', 'b': ''})))
+	assert differ.update('https://a', entries(make_form({'c': '', 'd': ''}))).full
+
+
+def test_message_manager_keeps_one_reference_list():
+	manager = MessageManager(
+		llm=MagicMock(spec=BaseChatModel),
+		task='Test task',
+		action_descriptions='',
+		system_prompt_class=SystemPrompt,
+		include_attributes=['name', 'value'],
+		token_counter=TokenCounter(use_tiktoken=False),
+		dom_differ=DOMDiffer(),
+	)
+
+	manager.add_state_message(make_state(make_form(FIELDS)))
+	reference = manager.history.messages[-2].message
+	assert reference.content.startswith('Full element list of https://erp.example.com/orders/new:\n_[:]Field 0\n0[:]<input')
+	assert 'See the full element list above.' in manager.history.messages[-1].message.content
+	manager._remove_last_state_message()
+
+	manager.add_state_message(make_state(make_form(dict(FIELDS, field_0='x'))))
+	assert manager.history.messages[-2].message is reference
+	assert '~ 0[:]<input name="field_0" value="x"></input>' in manager.history.messages[-1].message.content
+	manager._remove_last_state_message()
+
+	manager.add_state_message(make_state(make_form(FIELDS), url='https://erp.example.com/orders/1'))
+	references = [m.message for m in manager.history.messages if m.message.id == 'dom_reference']
+	assert len(references) == 1 and references[0] is not reference
+
+
+def test_compaction_trims_a_reference_list_over_budget():
+	counter = TokenCounter(use_tiktoken=False)
+	manager = MessageManager(
+		llm=MagicMock(spec=BaseChatModel),
+		task='Test task',
+		action_descriptions='',
+		system_prompt_class=SystemPrompt,
+		include_attributes=['name', 'value'],
+		token_counter=counter,
+		dom_differ=DOMDiffer(),
+	)
+	manager.max_input_tokens = manager.history.total_tokens + 2000
+
+	manager.add_state_message(make_state(make_form(FIELDS)))
+	assert manager.history.total_tokens > manager.max_input_tokens
+	manager.cut_messages()
+
+	assert manager.history.total_tokens <= manager.max_input_tokens
+	reference = manager.history.messages[-2].message
+	assert reference.content.endswith('... (rest of the element list omitted to fit the context)')
+	assert reference.content.splitlines()[-2].endswith('</input>')
+	assert 'See the full element list above.' in manager.history.messages[-1].message.content
+	manager._remove_last_state_message()
+
+	# The next state sends the list again rather than changes against the truncated one
+	manager.add_state_message(make_state(make_form(dict(FIELDS, field_0='x'))))
+	assert 'See the full element list above.' in manager.history.messages[-1].message.content
+	manager.cut_messages()
+	assert manager.history.total_tokens <= manager.max_input_tokens
+
+
+def test_benchmark_tokens_per_step():
+	"""
+	Replays a 20 step session on a large, mostly static form with and without diffs.
+
+	The prompt always holds one full element list (the state message is dropped after each
+	step), so the saving is in the tokens that are new to each step's prompt: in diff mode the
+	full list sits in the cached prefix until the next refresh and only the changes are new.
+	"""
+	counter = TokenCounter(use_tiktoken=False)
+	states = []
+	values = dict(FIELDS)
+	for step in range(20):
+		values = dict(values, **{f'field_{step * 3}': f'value {step}', f'field_{step * 3 + 1}': f'other {step}'})
+		states.append(make_state(make_form(values)))
+
+	def replay(dom_differ):
+		manager = MessageManager(
+			llm=MagicMock(spec=BaseChatModel),
+			task='Fill in the order',
+			action_descriptions='',
+			system_prompt_class=SystemPrompt,
+			include_attributes=['name', 'type', 'value'],
+			token_counter=counter,
+			max_history_steps=None,
+			dom_differ=dom_differ,
+		)
+		total, new = [], []
+		previous = []
+		for step, state in enumerate(states):
+			manager.add_state_message(state)
+			messages = manager.history.messages
+			prefix = 0
+			while prefix < min(len(previous), len(messages)) and previous[prefix] is messages[prefix].message:
+				prefix += 1
+			total.append(manager.history.total_tokens)
+			new.append(sum(m.metadata.input_tokens for m in messages[prefix:]))
+			manager._remove_last_state_message()
+			output = SimpleNamespace(model_dump=lambda **kwargs: {'action': [{'input_text': {'index': step}}]})
+			manager.add_model_output(output)
+			previous = [m.message for m in manager.history.messages]
+		return total, new
+
+	full_total, full_new = replay(None)
+	diff_total, diff_new = replay(DOMDiffer(refresh_every=10))
+	print(
+		f'\nInput tokens over {len(states)} steps: full lists {sum(full_total)} ({sum(full_new)} new), '
+		f'diffs {sum(diff_total)} ({sum(diff_new)} new)'
+	)
+	assert sum(diff_new) < 0.25 * sum(full_new)
+	assert sum(diff_total) < 1.05 * sum(full_total)
@@ -0,0 +1,134 @@
+from unittest.mock import MagicMock
+
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from browser_use.agent.message_manager.service import MessageManager
+from browser_use.agent.message_manager.token_counter import TokenCounter
+from browser_use.agent.prompts import SystemPrompt
+from browser_use.agent.views import AgentOutput
+from browser_use.browser.views import BrowserState
+from browser_use.controller.service import Controller
+from browser_use.dom.diff.service import DOMDiffer
+from browser_use.dom.ranking.service import ElementRanker
+from browser_use.dom.views import DOMElementNode, DOMTextNode
+
+# run with:
+# python -m pytest tests/test_element_ranking.py
+
+
+def element(parent, tag, xpath, index, text='', **attributes):
+	node = DOMElementNode(
+		is_visible=True, parent=parent, tag_name=tag, xpath=xpath, attributes=attributes, children=[], highlight_index=index
+	)
+	if text:
+		node.children.append(DOMTextNode(is_visible=True, parent=node, text=text))
+	parent.children.append(node)
+	return node
+
+
+def make_grid(rows=2000):
+	"""A grid screen: a filter input, thousands of row links and a save button at the end"""
+	root = DOMElementNode(is_visible=True, parent=None, tag_name='body', xpath='/body', attributes={}, children=[])
+	selector_map = {0: element(root, 'input', '/body/input', 0, name='customer', placeholder='Customer')}
+	for i in range(rows):
+		selector_map[i + 1] = element(root, 'a', f'/body/table/tr[{i + 1}]/a', i + 1, f'Order {10000 + i} - Customer {i % 97}')
+	selector_map[rows + 1] = element(root, 'button', '/body/button', rows + 1, 'Save')
+	return root, selector_map
+
+
+def make_state():
+	tree, selector_map = make_grid()
+	return BrowserState(url='https://erp.example.com/orders', title='', element_tree=tree, tabs=[], selector_map=selector_map)
+
+
+def test_top_elements_fit_the_budget_in_page_order():
+	counter = TokenCounter(use_tiktoken=False)
+	ranker = ElementRanker(max_tokens=300)
+	tree, _ = make_grid()
+	entries = tree.clickable_element_entries(['name', 'placeholder'])
+
+	kept, omitted = ranker.rank(entries, 'Open order 10042 of the customer and save it', counter.count)
+
+	lines = [line for _, line, _ in kept]
+	assert sum(counter.count(line) for line in lines) <= 300
+	assert omitted == len(entries) - len(kept) > 1900
+	assert '43[:]<a >Order 10042 - Customer 42</a>' in lines
+	assert '2001[:]<button >Save</button>' in lines
+	assert lines[0].startswith('0[:]<input')
+	assert [int(line.split('[')[0]) for line in lines] == sorted(int(line.split('[')[0]) for line in lines)
+	assert ElementRanker.marker(omitted).startswith(f'... {omitted} more elements not shown')
+
+
+def test_small_lists_are_untouched():
+	tree, _ = make_grid(rows=5)
+	entries = tree.clickable_element_entries()
+	assert ElementRanker(max_tokens=1000).rank(entries, 'anything', len) == (entries, 0)
+
+
+def test_message_manager_ranks_by_goal_and_recent_interactions():
+	controller = Controller()
+	manager = MessageManager(
+		llm=MagicMock(spec=BaseChatModel),
+		task='Review the orders',
+		action_descriptions='',
+		system_prompt_class=SystemPrompt,
+		token_counter=TokenCounter(use_tiktoken=False),
+		element_ranker=ElementRanker(max_tokens=200),
+	)
+	ActionModel = controller.registry.create_action_model()
+	output = AgentOutput.type_with_custom_actions(ActionModel).model_validate(
+		{
+			'current_state': {'evaluation_previous_goal': '', 'memory': '', 'next_goal': 'Open order 11500'},
+			'action': [{'click_element': {'index': 1700}}],
+		}
+	)
+
+	manager.add_state_message(make_state())
+	manager._remove_last_state_message()
+	manager.add_model_output(output)
+	manager.add_state_message(make_state())
+
+	content = manager.history.messages[-1].message.content
+	assert '1501[:]<a>Order 11500 - Customer 45</a>' in content
+	assert '1700[:]<a>Order 11699 - Customer 50</a>' in content
+	assert 'more elements not shown (less relevant to the task)' in content
+	assert manager.history.messages[-1].metadata.input_tokens < 400
+
+
+def test_diff_mode_does_not_report_ranked_out_elements_as_removed():
+	controller = Controller()
+	manager = MessageManager(
+		llm=MagicMock(spec=BaseChatModel),
+		task='Review the orders',
+		action_descriptions='',
+		system_prompt_class=SystemPrompt,
+		token_counter=TokenCounter(use_tiktoken=False),
+		element_ranker=ElementRanker(max_tokens=200),
+		dom_differ=DOMDiffer(),
+	)
+	ActionModel = controller.registry.create_action_model()
+	output = AgentOutput.type_with_custom_actions(ActionModel).model_validate(
+		{
+			'current_state': {'evaluation_previous_goal': '', 'memory': '', 'next_goal': 'Open order 11500'},
+			'action': [{'click_element': {'index': 1700}}],
+		}
+	)
+
+	manager.add_state_message(make_state())
+	reference = manager.history.messages[-2].message
+	assert 'more elements not shown' in reference.content
+	manager._remove_last_state_message()
+
+	# A new goal changes the ranking but not the page
+	manager.add_model_output(output)
+	manager.add_state_message(make_state())
+	assert [m.message for m in manager.history.messages if m.message.id == 'dom_reference'] == [reference]
+	assert 'No changes since the full element list above.' in manager.history.messages[-1].message.content
+	manager._remove_last_state_message()
+
+	state = make_state()
+	state.selector_map[1501].children[0].text = 'Order 11500 - Customer 45 (opened)'
+	manager.add_state_message(state)
+	content = manager.history.messages[-1].message.content
+	assert '~ 1501[:]<a>Order 11500 - Customer 45 (opened)</a>' in content
+	assert '\n- ' not in content
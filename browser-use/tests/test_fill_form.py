@@ -0,0 +1,220 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from browser_use.agent.service import Agent
+from browser_use.agent.views import AgentHistory, AgentHistoryList
+from browser_use.browser.context import BrowserContext
+from browser_use.browser.views import BrowserState, BrowserStateHistory
+from browser_use.controller.service import Controller
+from browser_use.dom.views import DOMElementNode
+
+# run with:
+# python -m pytest tests/test_fill_form.py
+
+LATENCY = 0.005  # one CDP round trip
+
+
+def make_node(i, parent=None):
+	return DOMElementNode(
+		tag_name='input',
+		xpath=f'html/body/form/input[{i}]',
+		attributes={'id': f'field{i}'},
+		children=[],
+		is_visible=True,
+		parent=parent,
+		highlight_index=i,
+	)
+
+
+class FakeHandle:
+	def __init__(self, calls):
+		self.calls = calls
+
+	async def _call(self, name, *args):
+		self.calls.append(name)
+		await asyncio.sleep(LATENCY)
+
+	async def scroll_into_view_if_needed(self, timeout=None):
+		await self._call('scroll')
+
+	async def fill(self, value):
+		await self._call('fill')
+
+	async def type(self, value):
+		# Keystroke events: one round trip per character
+		for _ in value:
+			await self._call('key')
+
+	async def evaluate(self, script, arg):
+		await self._call('evaluate')
+		elements, values = arg
+		return [None if value != 'bad' else 'no option "bad"' for value in values]
+
+
+@pytest.fixture
+def context():
+	calls = []
+	context = BrowserContext(browser=MagicMock())
+	page = SimpleNamespace(wait_for_load_state=AsyncMock())
+
+	async def locate(element_node):
+		await asyncio.sleep(LATENCY)
+		return None if element_node.xpath.endswith('[404]') else FakeHandle(calls)
+
+	async def update_state(focus_element=-1):
+		# Re-extracting the DOM to highlight the field
+		await asyncio.sleep(10 * LATENCY)
+
+	context.get_current_page = AsyncMock(return_value=page)
+	context.get_locate_element = locate
+	context._update_state = update_state
+	return context, calls
+
+
+async def test_fill_mode_sets_a_frame_in_one_evaluate(context):
+	context, calls = context
+	fields = [(make_node(i), f'value {i}') for i in range(5)]
+
+	errors = await context._fill_element_nodes(fields)
+
+	assert errors == [None] * 5
+	assert calls == ['evaluate']
+
+
+async def test_fields_in_iframes_are_evaluated_per_frame(context):
+	context, calls = context
+	iframe = DOMElementNode(tag_name='iframe', xpath='html/body/iframe', attributes={}, children=[], is_visible=True, parent=None)
+	fields = [(make_node(1), 'a'), (make_node(2, parent=iframe), 'b'), (make_node(3), 'c')]
+
+	await context._fill_element_nodes(fields)
+
+	assert calls == ['evaluate', 'evaluate']
+
+
+async def test_errors_are_reported_per_field(context):
+	context, calls = context
+	fields = [(make_node(1), 'ok'), (make_node(404), 'x'), (make_node(3), 'bad')]
+
+	errors = await context._fill_element_nodes(fields)
+
+	assert errors[0] is None
+	assert 'not found' in errors[1]
+	assert 'no option "bad"' in errors[2]
+
+
+async def test_type_mode_sends_keystrokes(context):
+	context, calls = context
+
+	errors = await context._fill_element_nodes([(make_node(1), 'ab'), (make_node(2), 'c')], mode='type')
+
+	assert errors == [None, None]
+	assert calls == ['fill', 'key', 'key', 'fill', 'key']
+
+
+async def test_fill_form_action_reports_each_field():
+	controller = Controller()
+	nodes = {i: make_node(i) for i in range(3)}
+	browser = AsyncMock()
+	browser.get_session = AsyncMock(return_value=SimpleNamespace(cached_state=SimpleNamespace(selector_map=nodes)))
+	browser._fill_element_nodes = AsyncMock(return_value=[None, 'Failed to input text', None])
+	controller._log_action_to_file = AsyncMock()
+	action = controller.registry.create_action_model()(
+		fill_form={'fields': [{'index': i, 'value': f'v{i}'} for i in range(3)], 'mode': 'type'}
+	)
+
+	result = await controller.act(action, browser)
+
+	assert action.get_index() == 0
+	assert browser._fill_element_nodes.await_args.kwargs['mode'] == 'type'
+	assert result.error is None
+	assert result.extracted_content.splitlines() == [
+		'⌨️  Input "v0" into index 0',
+		'❌ Index 1: Failed to input text',
+		'⌨️  Input "v2" into index 2',
+	]
+	assert controller._log_action_to_file.await_count == 3
+
+
+async def test_fill_form_rejects_unknown_indexes():
+	controller = Controller()
+	browser = AsyncMock()
+	browser.get_session = AsyncMock(return_value=SimpleNamespace(cached_state=SimpleNamespace(selector_map={})))
+
+	with pytest.raises(RuntimeError, match=r'indexes \[7\]'):
+		await controller.registry.execute_action('fill_form', {'fields': [{'index': 7, 'value': 'x'}]}, browser=browser)
+
+
+async def test_form_fill_benchmark(context):
+	context, _ = context
+	fields = [(make_node(i), f'value {i:02d}') for i in range(10)]
+
+	start = time.perf_counter()
+	for node, value in fields:
+		await context._input_text_element_node(node, value)
+	before = time.perf_counter() - start
+
+	start = time.perf_counter()
+	await context._fill_element_nodes(fields)
+	after = time.perf_counter() - start
+
+	print(f'\n10 fields: {before * 1000:.0f}ms with input_text, {after * 1000:.0f}ms with fill_form')
+	assert after < before / 5
+
+
+def form_tree(indexes):
+	"""A form whose inputs carry the given highlight indexes"""
+	body = DOMElementNode(tag_name='body', xpath='html/body', attributes={}, children=[], is_visible=True, parent=None)
+	for i, index in enumerate(indexes):
+		node = make_node(i + 1, parent=body)
+		node.highlight_index = index
+		body.children.append(node)
+	return body
+
+
+async def test_rerun_remaps_every_field():
+	controller = Controller()
+	agent = Agent(task='Test task', llm=MagicMock(spec=BaseChatModel), controller=controller, use_llm_scheduler=False)
+	output = agent.AgentOutput.model_validate(
+		{
+			'current_state': {'evaluation_previous_goal': '', 'memory': '', 'next_goal': ''},
+			'action': [{'fill_form': {'fields': [{'index': 1, 'value': 'a'}, {'index': 2, 'value': 'b'}]}}, {'go_back': {}}],
+		}
+	)
+	recorded = form_tree([1, 2])
+	selector_map = {node.highlight_index: node for node in recorded.children}
+	history_item = AgentHistory(
+		model_output=output,
+		result=[],
+		state=BrowserStateHistory(
+			url='',
+			title='',
+			tabs=[],
+			interacted_element=AgentHistory.get_interacted_element(output, selector_map),
+			interacted_fields=AgentHistory.get_interacted_fields(output, selector_map),
+		),
+	)
+	assert [len(fields) if fields else None for fields in history_item.state.interacted_fields] == [2, None]
+	history_item = AgentHistoryList.load_from_dict(
+		AgentHistoryList(history=[history_item]).model_dump(), agent.AgentOutput
+	).history[0]
+	assert output.action[0].get_indexes() == [1, 2]
+
+	# On replay the page lists the same inputs under new indexes
+	replay_tree = form_tree([7, 4])
+	agent.browser_context = AsyncMock()
+	agent.browser_context.get_state = AsyncMock(
+		return_value=BrowserState(url='', title='', element_tree=replay_tree, selector_map={}, tabs=[])
+	)
+	controller.multi_act = AsyncMock(return_value=[])
+
+	await agent._execute_history_step(history_item, delay=0)
+
+	replayed = controller.multi_act.await_args.args[0]
+	assert [field.index for field in replayed[0].fill_form.fields] == [7, 4]
+	# Unchanged indexes are reported as such
+	assert replayed[0].set_index(7, 0) is False
@@ -0,0 +1,157 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from browser_use.agent.service import Agent
+from browser_use.scheduler.service import LLMScheduler
+from browser_use.scheduler.views import RateLimitInfo, parse_reset
+
+# run with:
+# python -m pytest tests/test_llm_scheduler.py
+
+
+class RateLimitError(Exception):
+	def __init__(self, headers):
+		super().__init__('429 Too Many Requests')
+		self.response = SimpleNamespace(headers=headers)
+
+
+@pytest.fixture
+def scheduler():
+	scheduler = LLMScheduler()
+	scheduler.reset()
+	yield scheduler
+	scheduler.reset()
+
+
+def make_llm(model='gpt-4o', api_key='sk-test'):
+	return SimpleNamespace(model_name=model, openai_api_key=api_key)
+
+
+def test_parse_rate_limit_headers():
+	info = RateLimitInfo.from_headers(
+		{
+			'X-RateLimit-Limit-Requests': '500',
+			'x-ratelimit-remaining-requests': '0',
+			'x-ratelimit-reset-requests': '1m30s',
+			'x-ratelimit-limit-tokens': '30000',
+			'x-ratelimit-remaining-tokens': '29000',
+			'x-ratelimit-reset-tokens': '120ms',
+			'retry-after': '2',
+		}
+	)
+	assert (info.request_limit, info.requests_remaining, info.requests_reset) == (500, 0, 90.0)
+	assert (info.token_limit, info.tokens_remaining, info.tokens_reset) == (30000, 29000, 0.12)
+	assert info.retry_after == 2.0
+
+	assert parse_reset('2099-01-01T00:00:00Z') > 0
+	assert RateLimitInfo.from_headers({'anthropic-ratelimit-requests-limit': '50'}).request_limit == 50
+
+
+def test_buckets_are_per_model_and_key(scheduler):
+	assert scheduler.key_for(make_llm()) == scheduler.key_for(make_llm())
+	assert scheduler.key_for(make_llm()) != scheduler.key_for(make_llm(api_key='sk-other'))
+	assert scheduler.key_for(make_llm()) != scheduler.key_for(make_llm(model='gpt-4o-mini'))
+	assert 'sk-test' not in scheduler.key_for(make_llm())
+
+
+async def test_waiters_are_served_by_priority_then_fairness(scheduler):
+	llm = make_llm()
+	scheduler.configure(llm, requests_per_minute=600)
+	key = scheduler.key_for(llm)
+	bucket = scheduler._buckets[key]
+	bucket.served['busy'] = 5
+	bucket.requests = 0
+
+	order = []
+
+	async def call(agent_id, priority=0):
+		async with scheduler.slot(llm, agent_id=agent_id, priority=priority):
+			order.append(agent_id)
+
+	await asyncio.gather(call('busy'), call('quiet'), call('urgent', priority=1))
+
+	assert order == ['urgent', 'quiet', 'busy']
+
+
+async def test_rate_limit_pauses_the_bucket(scheduler):
+	llm = make_llm()
+
+	with pytest.raises(RateLimitError):
+		async with scheduler.slot(llm):
+			raise RateLimitError({'retry-after': '0.3'})
+
+	start = time.perf_counter()
+	async with scheduler.slot(llm):
+		pass
+	assert 0.3 <= time.perf_counter() - start < 1.0
+	stats = scheduler.stats()[0]
+	assert stats.rate_limited == 1
+	# The limit learned from the 429 paces the calls after the one released by the pause
+	assert stats.request_limit is not None
+	assert scheduler._buckets[stats.key].wait_time(0) > 1.0
+
+
+async def test_token_budget_throttles_large_requests(scheduler):
+	llm = make_llm()
+	scheduler.configure(llm, tokens_per_minute=6000)
+
+	start = time.perf_counter()
+	async with scheduler.slot(llm, estimated_tokens=6000):
+		pass
+	async with scheduler.slot(llm, estimated_tokens=30) as slot:
+		slot.record(None)
+	# The second call waits for 30 tokens to refill at 100 tokens/s
+	assert 0.25 <= time.perf_counter() - start < 1.5
+
+
+async def test_headers_teach_the_limits(scheduler):
+	llm = make_llm()
+	async with scheduler.slot(llm) as slot:
+		slot.record(
+			SimpleNamespace(
+				usage_metadata={'total_tokens': 100},
+				response_metadata={'headers': {'x-ratelimit-limit-requests': '60', 'x-ratelimit-remaining-requests': '0'}},
+			)
+		)
+
+	stats = scheduler.stats()[0]
+	assert stats.request_limit == 60
+	# No requests left: the next call waits for the bucket to refill at one request per second
+	assert scheduler._buckets[stats.key].wait_time(0) > 0.5
+
+
+async def test_single_rate_limit_is_recovered_from(scheduler, monkeypatch):
+	monkeypatch.setattr('browser_use.scheduler.service.LEARNED_LIMIT_TTL', 0.5)
+	llm = make_llm()
+	key = scheduler.key_for(llm)
+
+	with pytest.raises(RateLimitError):
+		async with scheduler.slot(llm):
+			raise RateLimitError({'retry-after': '0.05'})
+	bucket = scheduler._buckets[key]
+	guessed = bucket.request_limit
+
+	async with scheduler.slot(llm):
+		pass
+	# Each call that goes through raises the guessed limit (the pause plus jitter is under 0.5s)
+	assert bucket.request_limit == guessed + 1
+
+	# Without another 429 the guess is dropped and calls are no longer paced
+	await asyncio.sleep(0.55)
+	assert bucket.wait_time(0) == 0
+	assert bucket.request_limit is None
+	start = time.perf_counter()
+	for _ in range(5):
+		async with scheduler.slot(llm):
+			pass
+	assert time.perf_counter() - start < 0.5
+
+
+def test_agents_only_use_the_scheduler_when_asked(scheduler):
+	assert Agent(task='Test task', llm=MagicMock(spec=BaseChatModel)).llm_scheduler is None
+	assert Agent(task='Test task', llm=MagicMock(spec=BaseChatModel), use_llm_scheduler=True).llm_scheduler is scheduler
@@ -0,0 +1,151 @@
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from playwright.async_api import FrameLocator
+
+from browser_use.browser.context import BrowserContext
+from browser_use.dom.service import DomService
+from browser_use.dom.views import DOMElementNode
+
+# run with:
+# python -m pytest tests/test_locator_cache.py
+
+
+def deep_tree(depth=40, iframe_at=None):
+	"""A chain of nested divs ending in a button, optionally with an iframe in between"""
+	root = DOMElementNode(tag_name='body', xpath='html/body', attributes={}, children=[], is_visible=True, parent=None)
+	node, xpath = root, 'html/body'
+	for i in range(depth):
+		tag = 'iframe' if i == iframe_at else 'div'
+		xpath = 'html/body' if tag == 'iframe' else f'{xpath}/div[{i % 3 + 1}]'
+		child = DOMElementNode(
+			tag_name=tag,
+			xpath=f'{xpath}/iframe[1]' if tag == 'iframe' else xpath,
+			attributes={'class': f'level-{i} row col-md-6 hover:bg-{i}'},
+			children=[],
+			is_visible=True,
+			parent=node,
+		)
+		node.children.append(child)
+		node = child
+	button = DOMElementNode(
+		tag_name='button',
+		xpath=f'{xpath}/button[1]',
+		attributes={'class': 'btn primary', 'type': 'submit', 'aria-label': 'Save'},
+		children=[],
+		is_visible=True,
+		parent=node,
+		highlight_index=0,
+	)
+	node.children.append(button)
+	return button
+
+
+def make_context(page):
+	context = BrowserContext(browser=MagicMock())
+	context.get_current_page = AsyncMock(return_value=page)
+	return context
+
+
+async def test_selectors_are_computed_once_per_node():
+	button = deep_tree(iframe_at=10)
+	page = MagicMock()
+	page.frame_locator.return_value = MagicMock(spec=FrameLocator)
+	context = make_context(page)
+
+	with patch.object(
+		BrowserContext, '_enhanced_css_selector_for_element', wraps=BrowserContext._enhanced_css_selector_for_element
+	) as build:
+		for _ in range(3):
+			await context.get_locate_element(button)
+
+	# One selector for the iframe and one for the button, no matter how often it is located
+	assert build.call_count == 2
+	assert button.css_selector.endswith('button:nth-of-type(1).btn.primary[type="submit"][aria-label="Save"]')
+	assert [iframe.tag_name for iframe in button.iframe_parents] == ['iframe']
+
+
+async def test_stamped_element_is_found_by_its_attribute():
+	button = deep_tree()
+	button.stamp_id = 'abc-7'
+	handle = AsyncMock()
+	page = MagicMock()
+	page.query_selector = AsyncMock(return_value=handle)
+	context = make_context(page)
+
+	assert await context.get_locate_element(button) is handle
+	page.query_selector.assert_awaited_once_with('[data-bu-idx="abc-7"]')
+
+
+async def test_missing_stamp_falls_back_to_the_css_selector():
+	button = deep_tree()
+	button.stamp_id = 'abc-7'
+	handle = AsyncMock()
+	page = MagicMock()
+	page.query_selector = AsyncMock(side_effect=[None, handle])
+	context = make_context(page)
+
+	assert await context.get_locate_element(button) is handle
+	assert page.query_selector.await_args_list[1].args == (button.css_selector,)
+
+
+async def test_stamp_in_iframe_is_checked_before_waiting_for_it():
+	button = deep_tree(iframe_at=5)
+	button.stamp_id = 'abc-7'
+	frame = MagicMock(spec=FrameLocator)
+	stamped, fallback = MagicMock(), MagicMock()
+	stamped.count = AsyncMock(return_value=0)
+	fallback.element_handle = AsyncMock(return_value='handle')
+	frame.locator.side_effect = [stamped, fallback]
+	page = MagicMock()
+	page.frame_locator.return_value = frame
+	context = make_context(page)
+
+	assert await context.get_locate_element(button) == 'handle'
+	stamped.element_handle.assert_not_called()
+
+
+def test_stamp_is_parsed_but_not_an_attribute():
+	node = DomService(MagicMock())._parse_node(
+		{
+			'tagName': 'button',
+			'xpath': 'html/body/button[1]',
+			'attributes': {'id': 'save'},
+			'highlightIndex': 3,
+			'stampId': 'abc-7',
+		}
+	)
+
+	assert node.stamp_id == 'abc-7'
+	assert 'data-bu-idx' not in node.attributes
+
+
+def test_selector_benchmark():
+	nodes = [deep_tree(iframe_at=20) for _ in range(200)]
+	n_lookups = 5  # e.g. highlight, locate, re-locate after a failed click
+
+	def uncached(node):
+		# What every get_locate_element call did before: walk the parents, build every selector
+		parents = []
+		current = node
+		while current.parent is not None:
+			parents.append(current.parent)
+			current = current.parent
+		iframes = [parent for parent in reversed(parents) if parent.tag_name == 'iframe']
+		return [BrowserContext._enhanced_css_selector_for_element(i) for i in iframes + [node]]
+
+	start = time.perf_counter()
+	for node in nodes:
+		for _ in range(n_lookups):
+			uncached(node)
+	before = time.perf_counter() - start
+
+	start = time.perf_counter()
+	for node in nodes:
+		for _ in range(n_lookups):
+			[iframe.css_selector for iframe in node.iframe_parents] + [node.css_selector]
+	after = time.perf_counter() - start
+
+	assert [iframe.css_selector for iframe in nodes[0].iframe_parents] + [nodes[0].css_selector] == uncached(nodes[0])
+	print(f'\n{len(nodes) * n_lookups} lookups: {before * 1000:.1f}ms regenerating selectors, {after * 1000:.1f}ms memoized')
+	assert after < before / 2
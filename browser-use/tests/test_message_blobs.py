@@ -0,0 +1,110 @@
+import gc
+import json
+from unittest.mock import MagicMock
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import HumanMessage
+
+from browser_use.agent.message_manager.blob_store import BlobStore
+from browser_use.agent.message_manager.service import MessageManager
+from browser_use.agent.message_manager.token_counter import TokenCounter
+from browser_use.agent.prompts import SystemPrompt
+from browser_use.agent.views import ActionResult
+from browser_use.browser.views import BrowserState
+
+# run with:
+# python -m pytest tests/test_message_blobs.py
+
+SCREENSHOT = 'iVBORw0KGgo' * 10_000
+
+
+def make_manager(store):
+	return MessageManager(
+		llm=MagicMock(spec=BaseChatModel),
+		task='Test task',
+		action_descriptions='',
+		system_prompt_class=SystemPrompt,
+		token_counter=TokenCounter(use_tiktoken=False),
+		blob_store=store,
+		blob_threshold=1000,
+	)
+
+
+def make_state():
+	element_tree = MagicMock()
+	element_tree.clickable_elements_to_string.return_value = '\n'.join(f'{i}[:]<a>Row {i}</a>' for i in range(500))
+	return BrowserState(
+		url='https://example.com', title='', element_tree=element_tree, tabs=[], selector_map={}, screenshot=SCREENSHOT
+	)
+
+
+def test_bulky_content_is_stored_on_disk(tmp_path):
+	store = BlobStore(tmp_path / 'agent')
+	manager = make_manager(store)
+	initial_size = store.size()
+
+	manager.add_state_message(make_state())
+
+	stored = manager.history.messages[-1]
+	assert stored.metadata.blob_id is not None
+	assert len(stored.message.content) <= 200
+	assert store.size() > initial_size + len(SCREENSHOT)
+
+	message = manager.get_messages()[-1]
+	assert '499[:]<a>Row 499</a>' in message.content[0]['text']
+	assert message.content[1]['image_url']['url'].endswith(SCREENSHOT)
+	# Token counts are taken before spilling
+	assert stored.metadata.input_tokens > manager.IMG_TOKENS
+
+	manager._remove_last_state_message()
+	assert store.size() == initial_size
+
+
+def test_compaction_works_on_spilled_messages(tmp_path):
+	store = BlobStore(tmp_path / 'agent')
+	manager = make_manager(store)
+	result = ActionResult(extracted_content='x' * 5000, include_in_memory=True)
+	manager.add_state_message(make_state(), [result])
+	kept = manager.history.messages[-2]
+	assert kept.metadata.blob_id is not None
+	assert manager._is_result(kept.message)
+	manager._remove_last_state_message()
+
+	manager._add_message_with_tokens(HumanMessage(content=[{'type': 'text', 'text': 'old ' * 500}, {'image_url': SCREENSHOT}]))
+	manager._add_message_with_tokens(HumanMessage(content='current state'))
+	manager.max_input_tokens = manager.history.total_tokens - 1
+	manager.cut_messages()
+
+	assert manager.get_messages()[-2].content == 'old ' * 500
+	assert manager.get_messages()[-3].content == 'Action result: ' + 'x' * 5000
+
+
+def test_restored_history_is_spilled_again(tmp_path):
+	source = make_manager(None)
+	source._add_message_with_tokens(HumanMessage(content='Action result: ' + 'x' * 5000))
+	messages = source.history_messages()
+	tokens = [m.metadata.input_tokens for m in source.history.messages]
+
+	store = BlobStore(tmp_path / 'agent')
+	manager = make_manager(store)
+	manager.add_state_message(make_state())
+	manager.restore_history(messages, tokens)
+
+	# The replaced history's blobs are released, the restored bulky messages are stored again
+	assert [m.metadata.blob_id is not None for m in manager.history.messages] == [len(str(m.content)) >= 1000 for m in messages]
+	assert store.size() == sum(len(json.dumps(m.content)) for m in messages if len(str(m.content)) >= 1000)
+	assert manager.history.total_tokens == sum(tokens)
+	assert [m.content for m in manager.history_messages()] == [m.content for m in messages]
+
+
+def test_store_directory_is_removed_with_the_store(tmp_path):
+	store = BlobStore(tmp_path / 'agent')
+	store.put('data')
+	directory = store.directory
+	del store
+	gc.collect()
+	assert not directory.exists()
+
+	store = BlobStore()
+	store.close()
+	assert not store.directory.exists()
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from browser_use.utils import MetricsRegistry, metrics, time_execution_async, time_execution_sync
+
+# run with:
+# python -m pytest tests/test_metrics.py
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+	metrics.reset()
+	yield
+	metrics.reset()
+
+
+async def test_sync_decorator_times_the_awaited_coroutine():
+	@time_execution_sync('--slow_state')
+	async def slow_state():
+		await asyncio.sleep(0.05)
+		return 'state'
+
+	assert await slow_state() == 'state'
+	assert metrics.histogram('slow_state').sum >= 0.05
+
+
+async def test_async_decorator_records_failures_too():
+	@time_execution_async('--failing')
+	async def failing():
+		raise RuntimeError('boom')
+
+	with pytest.raises(RuntimeError):
+		await failing()
+	assert metrics.histogram('failing').count == 1
+
+
+def test_sync_decorator_on_plain_function_uses_qualname():
+	@time_execution_sync()
+	def add(a, b):
+		return a + b
+
+	assert add(1, 2) == 3
+	assert metrics.snapshot()['test_sync_decorator_on_plain_function_uses_qualname.<locals>.add']['count'] == 1
+
+
+def test_quantiles_and_prometheus_text():
+	registry = MetricsRegistry()
+	for ms in range(1, 101):
+		registry.observe('act', ms / 1000)
+
+	snapshot = registry.snapshot()['act']
+	assert (snapshot['p50'], snapshot['p95'], snapshot['p99']) == (0.05, 0.095, 0.099)
+
+	text = registry.to_prometheus()
+	assert '# TYPE browser_use_operation_duration_seconds summary' in text
+	assert 'browser_use_operation_duration_seconds{operation="act",quantile="0.95"} 0.095' in text
+	assert 'browser_use_operation_duration_seconds_count{operation="act"} 100' in text
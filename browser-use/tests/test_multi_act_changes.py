@@ -0,0 +1,129 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from browser_use.agent.views import ActionResult
+from browser_use.controller.service import Controller
+
+# run with:
+# python -m pytest tests/test_multi_act_changes.py
+
+
+def element(path_hash):
+	return SimpleNamespace(hash=SimpleNamespace(branch_path_hash=path_hash))
+
+
+class FakePage:
+	"""Browser context whose DOM only changes when an action says so"""
+
+	def __init__(self, n_elements, get_state_delay=0.0):
+		self.selector_map = {i: element(f'path-{i}') for i in range(n_elements)}
+		self.mutations = 0
+		self.get_state_delay = get_state_delay
+		self.get_state_calls = 0
+		self.context = AsyncMock()
+		self.context.config = SimpleNamespace(wait_between_actions=0)
+		self.context.get_session = AsyncMock(return_value=SimpleNamespace(cached_state=self._state()))
+		self.context.get_state = self.get_state
+		self.context.get_dom_change_signature = self.signature
+
+	def _state(self):
+		return SimpleNamespace(selector_map=dict(self.selector_map))
+
+	async def signature(self):
+		return (f'main:{self.mutations}',)
+
+	async def get_state(self):
+		self.get_state_calls += 1
+		await asyncio.sleep(self.get_state_delay)
+		return self._state()
+
+
+@pytest.fixture
+def controller():
+	controller = Controller()
+	controller.executed = []
+
+	async def act(action, browser_context):
+		controller.executed.append(action.get_index())
+		return ActionResult()
+
+	controller.act = act
+	return controller
+
+
+def input_actions(controller, n):
+	return [controller.registry.create_action_model()(input_text={'index': i, 'text': f'value {i}'}) for i in range(n)]
+
+
+async def test_unchanged_dom_skips_get_state(controller):
+	page = FakePage(10)
+
+	results = await controller.multi_act(input_actions(controller, 10), page.context)
+
+	assert len(results) == 10
+	assert page.get_state_calls == 0
+
+
+async def test_changed_dom_is_checked_for_new_elements(controller):
+	page = FakePage(10)
+	actions = input_actions(controller, 5)
+
+	async def act(action, browser_context):
+		controller.executed.append(action.get_index())
+		if action.get_index() == 1:
+			# Typing reveals an autocomplete list
+			page.mutations += 1
+			page.selector_map[99] = element('path-99')
+		return ActionResult()
+
+	controller.act = act
+	results = await controller.multi_act(actions, page.context)
+
+	assert page.get_state_calls == 1
+	assert controller.executed == [0, 1]
+	assert len(results) == 2
+
+
+async def test_changes_without_new_elements_continue(controller):
+	page = FakePage(10)
+
+	async def act(action, browser_context):
+		controller.executed.append(action.get_index())
+		page.mutations += 1
+		return ActionResult()
+
+	controller.act = act
+	await controller.multi_act(input_actions(controller, 4), page.context)
+
+	assert controller.executed == [0, 1, 2, 3]
+	assert page.get_state_calls == 3
+
+
+async def test_unreadable_signature_falls_back_to_get_state(controller):
+	page = FakePage(3)
+	page.context.get_dom_change_signature = AsyncMock(return_value=None)
+
+	await controller.multi_act(input_actions(controller, 3), page.context)
+
+	assert page.get_state_calls == 2
+
+
+async def test_form_fill_benchmark(controller):
+	# Both runs go through multi_act; without a signature every indexed action re-reads the DOM,
+	# as before. A get_state on a real page takes tens to hundreds of milliseconds; 50ms here
+	timings = {}
+	for name, readable in (('get_state per action', False), ('signature check', True)):
+		page = FakePage(10, get_state_delay=0.05)
+		if not readable:
+			page.context.get_dom_change_signature = AsyncMock(return_value=None)
+		start = time.perf_counter()
+		await controller.multi_act(input_actions(controller, 10), page.context)
+		timings[name] = (time.perf_counter() - start, page.get_state_calls)
+
+	print('\n10-field form: ' + ', '.join(f'{name} {t * 1000:.0f}ms ({n} get_state)' for name, (t, n) in timings.items()))
+	assert timings['get_state per action'][1] == 9
+	assert timings['signature check'][1] == 0
@@ -0,0 +1,76 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from browser_use.agent.service import Agent
+from browser_use.agent.views import ActionResult
+from browser_use.browser.views import BrowserState
+
+# run with:
+# python -m pytest tests/test_pipeline_steps.py
+
+
+def make_state(url: str) -> BrowserState:
+	return BrowserState(url=url, title='', element_tree=MagicMock(), tabs=[], selector_map={}, screenshot='')
+
+
+@pytest.fixture
+def pipelined_agent():
+	events = []
+	urls = iter(f'https://example.com/{i}' for i in range(10))
+
+	async def get_state(use_vision=True):
+		events.append('get_state')
+		await asyncio.sleep(0.01)
+		return make_state(next(urls))
+
+	async def multi_act(actions, browser_context, **kwargs):
+		events.append('multi_act')
+		return [ActionResult()]
+
+	with patch('browser_use.agent.service.MessageManager'):
+		agent = Agent(task='Test task', llm=MagicMock(spec=BaseChatModel), pipeline_steps=True)
+	agent.browser_context = AsyncMock()
+	agent.browser_context.get_state = AsyncMock(side_effect=get_state)
+	agent.controller = AsyncMock()
+	agent.controller.multi_act = AsyncMock(side_effect=multi_act)
+	agent.get_next_action = AsyncMock(return_value=MagicMock(action=[]))
+	agent._make_history_item = MagicMock(side_effect=lambda *args: events.append('history'))
+	agent.telemetry = MagicMock()
+	return agent, events
+
+
+async def test_next_state_is_prefetched_after_actions(pipelined_agent):
+	agent, events = pipelined_agent
+
+	await agent.step()
+	assert agent._prefetched_state is not None
+	# The prefetch starts after the actions, and the history item is still booked in the same step
+	assert events == ['get_state', 'multi_act', 'get_state', 'history']
+
+	await agent.step()
+	# The second step used the prefetched state instead of extracting it again
+	states = [call.args[1] for call in agent._make_history_item.call_args_list]
+	assert [s.url for s in states] == ['https://example.com/0', 'https://example.com/1']
+	assert agent.browser_context.get_state.await_count == 3
+
+
+async def test_no_prefetch_after_done_and_discard_on_pause(pipelined_agent):
+	agent, events = pipelined_agent
+
+	agent.controller.multi_act = AsyncMock(return_value=[ActionResult(is_done=True, extracted_content='ok')])
+	await agent.step()
+	assert agent._prefetched_state is None
+
+	agent.controller.multi_act = AsyncMock(return_value=[ActionResult()])
+	await agent.step()
+	pending = agent._prefetched_state
+	assert pending is not None
+
+	agent.pause()
+	agent.stop()
+	assert not await agent._handle_control_flags()
+	assert agent._prefetched_state is None
+	assert pending.done()
@@ -0,0 +1,100 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from browser_use.agent.service import Agent
+from browser_use.browser.views import BrowserState
+from browser_use.controller.service import Controller
+from browser_use.profiler.service import Profiler, profile_span, summarize_spans, to_chrome_trace, to_otel
+
+# run with:
+# python -m pytest tests/test_profiler.py
+
+
+def test_spans_nest_and_profile_span_needs_an_active_profiler():
+	profiler = Profiler()
+
+	with profile_span('outside'):
+		pass
+	with profiler.activate(), profiler.span('step'):
+		with profile_span('inner', 'browser', index=3):
+			pass
+
+	spans = {s.name: s for s in profiler.collect()}
+	assert set(spans) == {'step', 'inner'}
+	assert spans['inner'].parent_id == spans['step'].span_id
+	assert spans['inner'].attributes == {'index': 3}
+	assert profiler.collect() == []
+
+
+async def test_spans_from_other_tasks_get_their_own_track():
+	profiler = Profiler()
+
+	async def background():
+		with profile_span('prefetch'):
+			await asyncio.sleep(0)
+
+	with profiler.activate(), profiler.span('step'):
+		await asyncio.create_task(background(), name='prefetch-task')
+
+	trace = to_chrome_trace(profiler.collect())
+	tids = {e['name']: e['tid'] for e in trace['traceEvents'] if e['ph'] == 'X'}
+	assert tids['prefetch'] != tids['step']
+
+
+@pytest.fixture
+def agent():
+	llm = MagicMock(spec=BaseChatModel)
+	agent = Agent(task='Test task', llm=llm, controller=Controller(), profile_steps=True)
+	state = BrowserState(url='https://example.com', title='', element_tree=MagicMock(), tabs=[], selector_map={}, screenshot='')
+	agent.browser_context = AsyncMock()
+	agent.browser_context.get_state = AsyncMock(return_value=state)
+	agent.browser_context.get_session = AsyncMock(return_value=SimpleNamespace(cached_state=state))
+	agent.browser_context.config = SimpleNamespace(wait_between_actions=0)
+	agent.telemetry = MagicMock()
+	agent.get_next_action = AsyncMock(
+		return_value=agent.AgentOutput.model_validate(
+			{
+				'current_state': {'evaluation_previous_goal': '', 'memory': '', 'next_goal': ''},
+				'action': [{'go_back': {}}],
+			}
+		)
+	)
+	return agent
+
+
+async def test_step_spans_are_stored_on_history(agent, tmp_path):
+	await agent.step()
+
+	history = agent.history.history[0]
+	names = [s.name for s in history.spans]
+	for name in ('step', 'get_state', 'prompt_build', 'token_counting', 'llm_call', 'actions', 'action:go_back', 'post_step'):
+		assert name in names
+	step = next(s for s in history.spans if s.name == 'step')
+	assert all(s.start >= step.start and s.end <= step.end + 1e-6 for s in history.spans)
+	assert 'spans' in history.model_dump()
+
+	agent.history.export_trace(tmp_path / 'trace.json')
+	trace = json.loads((tmp_path / 'trace.json').read_text())
+	assert {e['name'] for e in trace['traceEvents']} >= set(names)
+
+	otel = to_otel(agent.history.spans(), trace_id='0' * 32)
+	otel_spans = otel['resourceSpans'][0]['scopeSpans'][0]['spans']
+	assert len(otel_spans) == len(names)
+	assert sum('parentSpanId' not in s for s in otel_spans) == 1
+
+	summary = summarize_spans(agent.history.spans())
+	assert '1 steps' in summary and 'llm_call' in summary
+
+
+async def test_profiling_is_opt_in(agent):
+	assert not Agent(task='Test task', llm=MagicMock(spec=BaseChatModel)).profiler.enabled
+	agent.profiler = Profiler(enabled=False)
+	await agent.step()
+
+	assert agent.history.history[0].spans == []
+	assert 'spans' not in agent.history.history[0].model_dump()
@@ -0,0 +1,86 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from langchain_anthropic import ChatAnthropic
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, SystemMessage
+
+from browser_use.agent.message_manager.service import MessageManager
+from browser_use.agent.message_manager.token_counter import TokenCounter
+from browser_use.agent.prompts import SystemPrompt
+from browser_use.agent.service import Agent
+from browser_use.browser.views import BrowserState
+from browser_use.controller.service import Controller
+
+# run with:
+# python -m pytest tests/test_prompt_caching.py
+
+
+def make_manager(llm):
+	return MessageManager(
+		llm=llm,
+		task='Test task',
+		action_descriptions='actions',
+		system_prompt_class=SystemPrompt,
+		token_counter=TokenCounter(use_tiktoken=False),
+	)
+
+
+def make_state():
+	return BrowserState(url='https://example.com', title='', element_tree=MagicMock(), tabs=[], selector_map={})
+
+
+def test_system_prompt_is_byte_stable():
+	first = SystemPrompt('actions', current_date=datetime(2024, 1, 1, 9, 0)).get_system_message()
+	second = SystemPrompt('actions', current_date=datetime(2025, 6, 30, 17, 45)).get_system_message()
+	assert first.content == second.content
+
+	# The date moved to the state message at the end of the prompt
+	manager = make_manager(MagicMock(spec=BaseChatModel))
+	manager.add_state_message(make_state())
+	assert 'Current date and time: ' in manager.get_messages()[-1].content
+
+
+def test_anthropic_messages_get_cache_markers():
+	manager = make_manager(ChatAnthropic(model='claude-3-5-sonnet-20241022', api_key='x'))
+	manager.add_state_message(make_state())
+
+	messages = manager.get_messages()
+	system, task, state = messages[0], messages[1], messages[-1]
+	assert isinstance(system, SystemMessage)
+	assert system.content[0]['cache_control'] == {'type': 'ephemeral'}
+	assert task.content[0]['cache_control'] == {'type': 'ephemeral'}
+	assert isinstance(state.content, str)
+	# The stored history is unchanged
+	assert isinstance(manager.history.messages[0].message.content, str)
+
+
+def test_other_providers_get_plain_messages():
+	manager = make_manager(MagicMock(spec=BaseChatModel))
+	manager.add_state_message(make_state())
+	assert all(isinstance(m.content, str) for m in manager.get_messages())
+
+
+def test_cached_input_tokens_are_reported():
+	agent = Agent(
+		task='Test task', llm=MagicMock(spec=BaseChatModel), controller=Controller(), use_llm_scheduler=False, generate_gif=False
+	)
+	agent._record_usage(
+		AIMessage(
+			content='',
+			usage_metadata={
+				'input_tokens': 5000,
+				'output_tokens': 100,
+				'total_tokens': 5100,
+				'input_token_details': {'cache_read': 4000},
+			},
+		),
+		0,
+	)
+	openai_message = AIMessage(
+		content='', response_metadata={'token_usage': {'prompt_tokens': 3000, 'prompt_tokens_details': {'cached_tokens': 2048}}}
+	)
+	agent._record_usage(openai_message, 0)
+
+	assert agent.usage.input_tokens == 8000
+	assert agent.usage.cached_input_tokens == 6048
@@ -0,0 +1,104 @@
+import time
+from unittest.mock import MagicMock
+
+from pydantic import BaseModel
+
+from browser_use.controller.registry.service import Registry
+from browser_use.controller.registry.views import RegisteredAction
+from browser_use.controller.service import Controller
+
+# run with:
+# python -m pytest tests/test_registry_dispatch.py -s
+
+
+class ClickParams(BaseModel):
+	index: int
+	xpath: str = ''
+
+
+def make_registry():
+	registry = Registry()
+
+	@registry.action('Click', param_model=ClickParams, requires_browser=True)
+	async def click(params: ClickParams, browser):
+		return params.index
+
+	@registry.action('Type')
+	async def type_text(text: str, delay: int = 0):
+		return text
+
+	return registry
+
+
+def test_dispatch_strategy_is_precomputed():
+	registry = make_registry()
+	assert registry.registry.actions['click'].takes_param_model is True
+	assert registry.registry.actions['type_text'].takes_param_model is False
+
+
+async def test_validated_params_are_passed_through():
+	registry = make_registry()
+	params = ClickParams(index=3)
+	function = registry.registry.actions['click'].function
+	calls = []
+
+	async def spy(p, browser):
+		calls.append(p)
+		return await function(p, browser=browser)
+
+	registry.registry.actions['click'].function = spy
+	assert await registry.execute_action('click', params, browser=MagicMock()) == 3
+	assert calls[0] is params
+	# Dicts and equivalent models from other param classes are still validated
+	assert await registry.execute_action('click', {'index': 4}, browser=MagicMock()) == 4
+	assert await registry.execute_action('type_text', {'text': 'hi'}) == 'hi'
+
+
+async def test_actions_added_directly_are_inspected_once():
+	registry = Registry()
+
+	async def scroll(params: ClickParams):
+		return params.index
+
+	registry.registry.actions['scroll'] = RegisteredAction(
+		name='scroll', description='Scroll', function=scroll, param_model=ClickParams
+	)
+	assert await registry.execute_action('scroll', {'index': 7}) == 7
+	assert registry.registry.actions['scroll'].takes_param_model is True
+
+
+async def test_controller_act_skips_the_dump_validate_round_trip():
+	controller = Controller()
+	ActionModel = controller.registry.create_action_model()
+	action = ActionModel.model_validate({'go_back': {}})
+	browser = MagicMock()
+
+	async def go_back(browser):
+		return 'went back'
+
+	controller.registry.registry.actions['go_back'].function = go_back
+	result = await controller.act(action, browser)
+	assert result.extracted_content == 'went back'
+
+
+async def test_benchmark_10k_dispatches():
+	registry = make_registry()
+	action = registry.registry.actions['click']
+	browser = object()
+	params = ClickParams(index=1)
+	n = 10_000
+
+	# Previous behaviour: params dumped to a dict, re-validated and the signature inspected on every call
+	start = time.perf_counter()
+	for _ in range(n):
+		action.takes_param_model = None
+		await registry.execute_action('click', params.model_dump(), browser=browser)
+	reflective = time.perf_counter() - start
+
+	start = time.perf_counter()
+	for _ in range(n):
+		await registry.execute_action('click', params, browser=browser)
+	precomputed = time.perf_counter() - start
+
+	# Timings only; wall-clock comparisons are too noisy to assert on
+	print(f'\n{n} dispatches: {reflective * 1000:.0f} ms with introspection, {precomputed * 1000:.0f} ms precomputed')
@@ -0,0 +1,134 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk
+
+from browser_use.agent.service import Agent
+from browser_use.agent.streaming import ActionStreamParser
+from browser_use.agent.views import ActionResult
+from browser_use.browser.views import BrowserState
+from browser_use.controller.service import Controller
+
+# run with:
+# python -m pytest tests/test_streaming_actions.py
+
+RESPONSE = {
+	'current_state': {'evaluation_previous_goal': 'Unknown "action": [', 'memory': '', 'next_goal': 'Fill the form'},
+	'action': [
+		{'input_text': {'index': 1, 'text': 'a } b'}},
+		{'input_text': {'index': 2, 'text': 'c'}},
+		{'click_element': {'index': 3}},
+	],
+}
+
+
+def test_parser_emits_each_action_when_it_completes():
+	doc = '```json\n' + json.dumps(RESPONSE) + '\n```'
+	parser = ActionStreamParser()
+	emitted = []
+	for i in range(0, len(doc), 7):
+		for item in parser.feed(doc[i : i + 7]):
+			emitted.append((i, item))
+
+	assert [item for _, item in emitted] == RESPONSE['action']
+	# Items are emitted while the document is still streaming, not at the end
+	assert emitted[0][0] < emitted[-1][0] < len(doc) - 7
+
+
+@pytest.fixture
+def streaming_agent():
+	events = []
+	doc = json.dumps(RESPONSE)
+
+	async def astream(messages):
+		for i in range(0, len(doc), 10):
+			await asyncio.sleep(0.001)
+			yield AIMessageChunk(content=doc[i : i + 10])
+		events.append('stream_end')
+
+	llm = MagicMock(spec=BaseChatModel)
+	llm.astream = astream
+	with patch('browser_use.agent.service.MessageManager'):
+		agent = Agent(task='Test task', llm=llm, controller=Controller(), stream_actions=True)
+
+	state = BrowserState(url='https://example.com', title='', element_tree=MagicMock(), tabs=[], selector_map={}, screenshot='')
+	agent.browser_context = AsyncMock()
+	agent.browser_context.get_state = AsyncMock(return_value=state)
+	agent.browser_context.get_session = AsyncMock(return_value=SimpleNamespace(cached_state=state))
+	agent.browser_context.config = SimpleNamespace(wait_between_actions=0)
+	agent._make_history_item = MagicMock()
+	agent.telemetry = MagicMock()
+
+	async def act(action, browser_context):
+		events.append(next(iter(action.model_dump(exclude_unset=True))))
+		return ActionResult()
+
+	agent.controller.act = act
+	return agent, events
+
+
+async def test_actions_are_dispatched_before_the_response_ends(streaming_agent):
+	agent, events = streaming_agent
+
+	await agent.step()
+
+	# All three actions complete in the stream before its final closing braces arrive
+	assert events == ['input_text', 'input_text', 'click_element', 'stream_end']
+	assert len(agent._last_result) == 3
+	model_output = agent._make_history_item.call_args.args[0]
+	assert len(model_output.action) == 3
+
+	stats = agent.streaming_stats[0]
+	assert stats['actions'] == 3
+	assert stats['time_to_first_action'] < stats['response_time']
+
+
+async def test_unparseable_stream_is_a_step_error(streaming_agent):
+	agent, events = streaming_agent
+
+	async def astream(messages):
+		yield AIMessageChunk(content='{"action": [{"input_text": {"index": 1, "text": "x"}}], "current_state": ')
+
+	agent.llm.astream = astream
+	await agent.step()
+
+	assert agent.consecutive_failures == 1
+	assert 'Could not parse response' in agent._last_result[0].error
+
+
+async def test_actions_before_an_invalid_one_are_the_step(streaming_agent):
+	agent, events = streaming_agent
+	doc = json.dumps(dict(RESPONSE, action=RESPONSE['action'][:2] + [{'click_element': {'index': 'third'}}]))
+
+	async def astream(messages):
+		for i in range(0, len(doc), 10):
+			yield AIMessageChunk(content=doc[i : i + 10])
+
+	agent.llm.astream = astream
+	await agent.step()
+
+	assert agent.consecutive_failures == 0
+	assert events == ['input_text', 'input_text']
+	model_output = agent._make_history_item.call_args.args[0]
+	assert [next(iter(action.model_dump(exclude_unset=True))) for action in model_output.action] == ['input_text', 'input_text']
+
+
+@pytest.mark.parametrize('method', ['json_mode', 'function_calling'])
+def test_stream_uses_the_structured_output_binding(method):
+	from langchain_openai import ChatOpenAI
+
+	agent = Agent(task='Test task', llm=ChatOpenAI(model='gpt-4o', api_key='x'), controller=Controller(), stream_actions=True)
+	agent.tool_calling_method = 'json_schema'
+	agent._get_streaming_llm()
+	# A method switch rebuilds the binding
+	agent.tool_calling_method = method
+
+	kwargs = agent._get_streaming_llm().kwargs
+	if method == 'json_mode':
+		assert kwargs['response_format'] == {'type': 'json_object'}
+	else:
+		assert kwargs['tools'][0]['function']['name'] == agent.AgentOutput.__name__
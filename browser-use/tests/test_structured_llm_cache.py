@@ -0,0 +1,77 @@
+from unittest.mock import MagicMock, patch
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from pydantic import BaseModel
+
+from browser_use.agent.service import Agent
+from browser_use.agent.views import AgentOutput
+from browser_use.controller.service import Controller
+
+# run with:
+# python -m pytest tests/test_structured_llm_cache.py
+
+
+def make_agent(controller: Controller) -> Agent:
+	llm = MagicMock(spec=BaseChatModel)
+	with patch('browser_use.agent.service.MessageManager'):
+		return Agent(task='Test task', llm=llm, controller=controller)
+
+
+def test_structured_llm_is_built_once_per_action_set():
+	controller = Controller()
+	agent = make_agent(controller)
+
+	first = agent._get_structured_llm()
+	assert agent._get_structured_llm() is first
+	assert agent.llm.with_structured_output.call_count == 1
+
+	@controller.registry.action('Say hello')
+	def say_hello(name: str):
+		return f'hello {name}'
+
+	rebuilt = agent._get_structured_llm()
+	assert agent.llm.with_structured_output.call_count == 2
+	assert 'say_hello' in agent.ActionModel.model_fields
+	assert agent._get_structured_llm() is rebuilt
+
+
+def test_action_models_are_shared_between_identical_registries():
+	first, second = Controller(), Controller()
+	model = first.registry.create_action_model()
+
+	assert second.registry.create_action_model() is model
+	assert AgentOutput.type_with_custom_actions(model) is AgentOutput.type_with_custom_actions(model)
+
+	first.registry.registry.actions.pop('go_back')
+	assert first.registry.create_action_model() is not model
+
+
+def test_shared_action_model_accepts_params_of_any_identical_registry():
+	first, second = Controller(), Controller()
+	model = first.registry.create_action_model()
+	params = second.registry.registry.actions['go_back'].param_model()
+
+	assert model(go_back=params).model_dump(exclude_unset=True) == {'go_back': {}}
+
+
+def test_equivalent_param_models_get_their_own_action_model():
+	def make_params():
+		# Same name and fields, so the JSON schemas are identical
+		class SearchParams(BaseModel):
+			q: str
+
+		return SearchParams
+
+	models, param_models = [], [make_params(), make_params()]
+	for params in param_models:
+		controller = Controller()
+
+		@controller.registry.action('Search the site', param_model=params)
+		async def custom_search(params):
+			return params.q
+
+		models.append(controller.registry.create_action_model())
+
+	assert models[0] is not models[1]
+	for model, params in zip(models, param_models):
+		assert model(custom_search=params(q='x')).model_dump(exclude_unset=True) == {'custom_search': {'q': 'x'}}
@@ -0,0 +1,65 @@
+from unittest.mock import MagicMock, patch
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+
+from browser_use.agent.message_manager.service import MessageManager
+from browser_use.agent.message_manager.token_counter import TokenCounter, get_token_counter
+from browser_use.agent.prompts import SystemPrompt
+
+# run with:
+# python -m pytest tests/test_token_counter.py
+
+
+class WordEncoding:
+	def __init__(self):
+		self.calls = 0
+
+	def encode(self, text, disallowed_special=()):
+		self.calls += 1
+		return text.split()
+
+
+def test_counts_are_memoized_by_content():
+	counter = TokenCounter(use_tiktoken=False)
+	counter._encoding = encoding = WordEncoding()
+	dom = ' '.join(f'{i}[:]<button>Item {i}</button>' for i in range(1000))
+
+	assert counter.count(dom) == 2000
+	# An equal string built separately hits the cache instead of being encoded again
+	assert counter.count(''.join(list(dom))) == 2000
+	assert encoding.calls == 1
+
+
+def test_cache_is_bounded():
+	counter = TokenCounter(use_tiktoken=False, cache_size=2)
+	for text in ('aaa', 'bbbbbb', 'ccccccccc'):
+		counter.count(text)
+	assert len(counter._cache) == 2
+
+
+def test_provider_ratio_scales_reference_counts():
+	counter = TokenCounter(ratio=1.5, use_tiktoken=False)
+	counter._encoding = WordEncoding()
+	assert counter.count('one two three four') == 6
+
+
+def test_character_estimate_without_tokenizer():
+	llm = MagicMock(spec=BaseChatModel)
+	counter = get_token_counter(llm, chars_per_token=4)
+	assert counter._encoding is None
+	assert counter.count('x' * 40) == 10
+
+
+def test_message_manager_counts_tool_calls_as_json():
+	llm = MagicMock(spec=BaseChatModel)
+	counter = TokenCounter(use_tiktoken=False)
+	with patch.object(counter, 'count', wraps=counter.count) as count:
+		manager = MessageManager(
+			llm=llm, task='Test task', action_descriptions='', system_prompt_class=SystemPrompt, token_counter=counter
+		)
+		message = AIMessage(content='', tool_calls=[{'name': 'AgentOutput', 'args': {'action': [{'go_back': {}}]}, 'id': '1'}])
+		manager._count_tokens(message)
+
+	assert manager.token_counter is counter
+	assert 'AgentOutput{"action":[{"go_back":{}}]}' in [c.args[0] for c in count.call_args_list]